@@ -1,11 +1,20 @@
-import boto3
 import json
-from datetime import datetime, timedelta, timezone
-from collections import defaultdict
-import statistics
+from datetime import datetime
 
-dynamodb = boto3.resource('dynamodb')
+from common.aws import lazy_resource
+from common.messages import day_buckets, ACTIVITY_FIELDS, RESPONSE_LOOKAHEAD
+from common.records import load_records
+from common.rollups import load_rollups, rollups_enabled, METRICS_TABLE
+from common.columnar import frame_from_rows, rollup_frame
+from common.payloads import hourly_payload
+from common.timezones import day_range, today
+from common.cache import cached_endpoint
+from common.responses import compressed_endpoint, dumps
+from common.conditional import conditional_endpoint
+
+dynamodb = lazy_resource('dynamodb')
 messages_table = dynamodb.Table('crm-mensagens')
+metrics_table = dynamodb.Table(METRICS_TABLE)
 
 CORS_HEADERS = {
     "Content-Type": "application/json",
@@ -14,85 +23,47 @@ CORS_HEADERS = {
     "Access-Control-Allow-Headers": "*"
 }
 
-def parse_timestamp(ts):
-    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+def parse_date(query):
+    """(dia, date como pedido); ValueError se inválido."""
+    # Data padrão = hoje (no fuso da implantação)
+    date_str = query.get("date") or today().isoformat()
+    try:
+        return datetime.fromisoformat(date_str).date(), date_str
+    except ValueError:
+        raise ValueError(f"date inválida: {date_str} (formato YYYY-MM-DD)") from None
+
+def version_scope(query):
+    day, _ = parse_date(query)  # ValueError → sem versão (400)
+    start, end = day_range(day, day)
+    return start, end + RESPONSE_LOOKAHEAD, day.isoformat()
 
+@compressed_endpoint
+@cached_endpoint("hourly", ("date",))
+@conditional_endpoint("hourly", ("date",), version_scope, lambda: metrics_table, CORS_HEADERS)
 def lambda_handler(event, context):
     query = event.get("queryStringParameters") or {}
-    # Data padrão = hoje
-    now = datetime.now(timezone.utc) - timedelta(hours=3)
-    date_str = query.get("date") or now.date().isoformat()
-    date_ref = datetime.fromisoformat(date_str)
-
-    # Carrega todas as mensagens (mesmo padrão das outras lambdas)
-    items = []
-    response = messages_table.scan()
-    items.extend(response.get("Items", []))
-    while "LastEvaluatedKey" in response:
-        response = messages_table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
-        items.extend(response.get("Items", []))
-
-    # Ordena por timestamp
-    items.sort(key=lambda m: m["timestamp"])
-
-    # Agrupadores
-    counts_per_hour = defaultdict(int)
-    resp_times_per_hour = defaultdict(list)
-    all_resp_times = []
-
-    for i in range(len(items)):
-        msg = items[i]
-        ts = parse_timestamp(msg["timestamp"])
-        # Fuso -3 aplicado
-        local_ts = ts - timedelta(hours=0)  # já ajustamos no now
-        if local_ts.date() != date_ref.date():
-            continue
+    try:
+        day, date_str = parse_date(query)
+    except ValueError as exc:
+        return {
+            "statusCode": 400,
+            "headers": CORS_HEADERS,
+            "body": json.dumps({"error": str(exc)})
+        }
+    start, end = day_range(day, day)
 
-        hour_label = f"{local_ts.hour:02d}:00"
-        counts_per_hour[hour_label] += 1
+    # Rollups horários (UTC) que cobrem o dia local: da tabela de métricas ou calculados das mensagens
+    if rollups_enabled():
+        frame = frame_from_rows(load_rollups(metrics_table, day_buckets(start, end)))
+    else:
+        # Lê só o dia pedido (+ folga para achar a resposta do time), já ordenado
+        records = load_records(messages_table, start, end + RESPONSE_LOOKAHEAD, fields=ACTIVITY_FIELDS)
+        frame = rollup_frame(records)
 
-        if msg.get("direction") == "client":
-            for j in range(i + 1, len(items)):
-                nxt = items[j]
-                t1 = ts
-                t2 = parse_timestamp(nxt["timestamp"])
-                if nxt.get("direction") == "team":
-                    delta_min = (t2 - t1).total_seconds() / 60
-                    if 0 < delta_min < 180:
-                        resp_times_per_hour[hour_label].append(delta_min)
-                        all_resp_times.append(delta_min)
-                    break
-
-    # Monta dados no formato do contrato
-    data = []
-    total_messages = 0
-    for h in range(24):
-        label = f"{h:02d}:00"
-        msgs = counts_per_hour.get(label, 0)
-        total_messages += msgs
-        avg_rt = round(statistics.mean(resp_times_per_hour.get(label, [])), 2) if resp_times_per_hour.get(label) else 0
-        data.append({
-            "hour": label,
-            "messages": msgs,
-            "responseTime": {
-                "average": avg_rt,
-                "unit": "minutes"
-            }
-        })
-
-    summary = {
-        "totalMessages": total_messages,
-        "averageResponseTime": round(statistics.mean(all_resp_times), 2) if all_resp_times else 0
-    }
-
-    result = {
-        "date": date_str,
-        "data": data,
-        "summary": summary
-    }
+    result = hourly_payload(frame, day, date_str)
 
     return {
         "statusCode": 200,
         "headers": CORS_HEADERS,
-        "body": json.dumps(result)
+        "body": dumps(result)
     }
@@ -1,12 +1,21 @@
-import boto3
 import json
-from datetime import datetime, timedelta, timezone
-from collections import defaultdict
-import statistics
-import calendar
-
-dynamodb = boto3.resource('dynamodb')
+from datetime import datetime, timezone
+
+from common.aws import lazy_resource
+from common.messages import day_buckets, ACTIVITY_FIELDS, RESPONSE_LOOKAHEAD
+from common.records import load_records
+from common.rollups import load_rollups, rollups_enabled, METRICS_TABLE
+from common.columnar import frame_from_rows, group_mask, rollup_frame, select
+from common.payloads import weekly_from_buckets, weekly_payload
+from common.day_summaries import DAY, GRANULARITIES, group_buckets, load_range_totals, summaries_enabled
+from common.timezones import day_range
+from common.cache import cached_endpoint
+from common.responses import compressed_endpoint, dumps
+from common.conditional import conditional_endpoint
+
+dynamodb = lazy_resource('dynamodb')
 messages_table = dynamodb.Table('crm-mensagens')
+metrics_table = dynamodb.Table(METRICS_TABLE)
 
 CORS_HEADERS = {
     "Content-Type": "application/json",
@@ -15,97 +24,78 @@ CORS_HEADERS = {
     "Access-Control-Allow-Headers": "*"
 }
 
-def parse_timestamp(ts):
-    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+PARAMS = ("startDate", "endDate", "groupId", "granularity")
+# Maior intervalo aceito (dois anos): limita o que uma leitura calcula e grava em resumos
+MAX_RANGE_DAYS = 731
 
-def lambda_handler(event, context):
-    query = event.get("queryStringParameters") or {}
+def parse_day(query, name):
+    try:
+        return datetime.fromisoformat(query[name]).date()
+    except ValueError:
+        raise ValueError(f"{name} inválida: {query[name]} (formato YYYY-MM-DD)") from None
 
+def parse_query(query):
+    """(primeiro dia, último dia, groupId, granularity); ValueError se inválidos."""
     # Datas obrigatórias
     if not query.get("startDate") or not query.get("endDate"):
+        raise ValueError("Parâmetros startDate e endDate são obrigatórios")
+    start_day = parse_day(query, "startDate")
+    end_day = parse_day(query, "endDate")
+    if end_day < start_day or (end_day - start_day).days + 1 > MAX_RANGE_DAYS:
+        raise ValueError(f"Período precisa ter de 1 a {MAX_RANGE_DAYS} dias")
+    granularity = query.get("granularity") or DAY
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity inválida: {granularity} (válidas: {', '.join(GRANULARITIES)})")
+    return start_day, end_day, query.get("groupId"), granularity
+
+def version_scope(query):
+    start_day, end_day, _, _ = parse_query(query)  # ValueError → sem versão (400)
+    start, end = day_range(start_day, end_day)
+    return start, end + RESPONSE_LOOKAHEAD, None
+
+def load_frame(first_day, last_day, group_filter):
+    """Frame dos dias locais [first_day, last_day], só do grupo se pedido."""
+    # Período em dias locais (fuso da implantação) = [first_day 00:00, last_day+1 00:00)
+    start, end = day_range(first_day, last_day)
+
+    # Rollups horários (UTC): da tabela de métricas ou calculados das mensagens
+    if rollups_enabled():
+        frame = frame_from_rows(load_rollups(metrics_table, day_buckets(start, end), group_id=group_filter))
+    else:
+        records = load_records(messages_table, start, end + RESPONSE_LOOKAHEAD,
+                               group_id=group_filter, fields=ACTIVITY_FIELDS)
+        frame = rollup_frame(records)
+
+    if group_filter:
+        frame = select(frame, group_mask(frame, group_filter))
+    return frame
+
+@compressed_endpoint
+@cached_endpoint("weekly", PARAMS)
+@conditional_endpoint("weekly", PARAMS, version_scope, lambda: metrics_table, CORS_HEADERS)
+def lambda_handler(event, context):
+    query = event.get("queryStringParameters") or {}
+
+    try:
+        start_day, end_day, group_filter, granularity = parse_query(query)
+    except ValueError as exc:
         return {
             "statusCode": 400,
             "headers": CORS_HEADERS,
-            "body": json.dumps({"error": "Parâmetros startDate e endDate são obrigatórios"})
+            "body": json.dumps({"error": str(exc)})
         }
 
-    start_date = datetime.fromisoformat(query["startDate"])
-    end_date = datetime.fromisoformat(query["endDate"])
-    group_filter = query.get("groupId")
-
-    # Carrega todas as mensagens (mesmo padrão das outras lambdas)
-    items = []
-    response = messages_table.scan()
-    items.extend(response.get("Items", []))
-    while "LastEvaluatedKey" in response:
-        response = messages_table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
-        items.extend(response.get("Items", []))
-
-    # Ordena por timestamp
-    items.sort(key=lambda m: m["timestamp"])
-
-    # Agrupadores
-    counts_per_day = defaultdict(int)
-    resp_times_per_day = defaultdict(list)
-    all_resp_times = []
-
-    for i in range(len(items)):
-        msg = items[i]
-        ts = parse_timestamp(msg["timestamp"]) - timedelta(hours=3)  # fuso -3
-        if ts.date() < start_date.date() or ts.date() > end_date.date():
-            continue
-        if group_filter and msg.get("groupId") != group_filter:
-            continue
-
-        date_label = ts.date().isoformat()
-        counts_per_day[date_label] += 1
-
-        if msg.get("direction") == "client":
-            for j in range(i + 1, len(items)):
-                nxt = items[j]
-                if nxt.get("direction") == "team":
-                    t1 = ts
-                    t2 = parse_timestamp(nxt["timestamp"]) - timedelta(hours=3)
-                    delta_min = (t2 - t1).total_seconds() / 60
-                    if 0 < delta_min < 180:
-                        resp_times_per_day[date_label].append(delta_min)
-                        all_resp_times.append(delta_min)
-                    break
-
-    # Monta dados no formato do contrato
-    data = []
-    total_messages = 0
-    for day in sorted(counts_per_day.keys()):
-        msgs = counts_per_day.get(day, 0)
-        total_messages += msgs
-        avg_rt = round(statistics.mean(resp_times_per_day.get(day, [])), 2) if resp_times_per_day.get(day) else 0
-        day_of_week = calendar.day_name[datetime.fromisoformat(day).weekday()]
-        data.append({
-            "date": day,
-            "dayOfWeek": day_of_week,
-            "messages": msgs,
-            "responseTime": {
-                "average": avg_rt,
-                "unit": "minutes"
-            }
-        })
-
-    summary = {
-        "totalMessages": total_messages,
-        "averageResponseTime": round(statistics.mean(all_resp_times), 2) if all_resp_times else 0
-    }
-
-    result = {
-        "period": {
-            "start": start_date.date().isoformat(),
-            "end": end_date.date().isoformat()
-        },
-        "data": data,
-        "summary": summary
-    }
+    if summaries_enabled():
+        # Meses/semanas/dias fechados dos resumos gravados; só os abertos (hoje) são calculados
+        segments = load_range_totals(metrics_table, start_day, end_day, datetime.now(timezone.utc),
+                                     lambda first, last: load_frame(first, last, group_filter),
+                                     group_id=group_filter, granularity=granularity)
+        result = weekly_from_buckets(group_buckets(segments, granularity), start_day, end_day, granularity)
+    else:
+        result = weekly_payload(load_frame(start_day, end_day, group_filter), start_day, end_day, granularity)
 
     return {
         "statusCode": 200,
         "headers": CORS_HEADERS,
-        "body": json.dumps(result)
+        "body": dumps(result)
     }
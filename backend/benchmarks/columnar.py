@@ -0,0 +1,146 @@
+import argparse
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.columnar import (  # noqa: E402
+    CLIENT_CODE, average_minutes, epoch_hour, frame_from_rows, hour_range, last_per_group, rollup_frame, select,
+    sum_by,
+)
+from common.records import to_records  # noqa: E402
+from common.rollups import compute_rollups  # noqa: E402
+from local import synthetic  # noqa: E402
+
+# ==============================
+# ⏱️ Loops em Python (activity/* e metricsToday antigos) x motor colunar (NumPy)
+# Mesma janela para as duas variantes: rollups das mensagens e, em cima deles,
+# hourly de cada dia, weekly do período inteiro e metricsToday de cada dia.
+# Uso: python benchmarks/columnar.py --sizes 100000 1000000
+# ==============================
+
+END = datetime(2025, 8, 6, tzinfo=timezone.utc)
+
+
+def days_of(args):
+    first = (END - timedelta(days=args.days)).date()
+    return [first + timedelta(days=i) for i in range(args.days + 1)]
+
+
+# ------------------------------
+# Loops antigos (sobre as linhas de compute_rollups)
+# ------------------------------
+
+def loop_hourly(rows, day):
+    counts, rt_sum, rt_count = defaultdict(int), defaultdict(float), defaultdict(int)
+    for row in rows:
+        if row["date"] != day:
+            continue
+        counts[row["hour"]] += row["messages"]
+        rt_sum[row["hour"]] += row["rtSum"]
+        rt_count[row["hour"]] += row["rtCount"]
+    data = []
+    for h in range(24):
+        label = f"{h:02d}"
+        count = rt_count.get(label, 0)
+        data.append((counts.get(label, 0), round(rt_sum[label] / count, 2) if count else 0))
+    return data
+
+
+def loop_weekly(rows, start_date):
+    per_day = defaultdict(lambda: {"messages": 0, "rtSum": 0.0, "rtCount": 0})
+    for row in rows:
+        local = datetime.fromisoformat(f"{row['date']}T{row['hour']}:00:00") - timedelta(hours=3)
+        if local.date() < start_date:
+            continue
+        stats = per_day[local.date()]
+        stats["messages"] += row["messages"]
+        stats["rtSum"] += row["rtSum"]
+        stats["rtCount"] += row["rtCount"]
+    return len(per_day)
+
+
+def loop_metrics(rows, day):
+    total, rt_sum, rt_count, last = 0, 0, 0, {}
+    for row in rows:
+        if row["date"] != day:
+            continue
+        total += row["messages"]
+        rt_sum += row["rtLastSum"]
+        rt_count += row["rtLastCount"]
+        group = row["groupId"]
+        if row["messages"] and (group not in last or row["lastTimestamp"] > last[group][0]):
+            last[group] = (row["lastTimestamp"], row["lastDirection"])
+    return total, len(last), sum(1 for _, d in last.values() if d == "client")
+
+
+def loops(records, days):
+    rows = list(compute_rollups(records).values())
+    started = time.perf_counter()
+    for day in days:
+        loop_hourly(rows, day.isoformat())
+        loop_metrics(rows, day.isoformat())
+    loop_weekly(rows, days[0])
+    return rows, time.perf_counter() - started
+
+
+# ------------------------------
+# Motor colunar (mesmas agregações dos handlers)
+# ------------------------------
+
+def columnar_endpoints(frame, days):
+    for day in days:
+        first_hour = epoch_hour(day)
+        today = hour_range(frame, first_hour, 24)
+        per_hour = sum_by(today, today["hour"] - first_hour, 24)
+        [average_minutes(s, c) for s, c in zip(per_hour["rtSumSec"], per_hour["rtCount"])]
+        _, directions = last_per_group(today)
+        int(today["messages"].sum()), int((directions == CLIENT_CODE).sum())
+        average_minutes(today["rtLastSumSec"].sum(), today["rtLastCount"].sum())
+    local_day = (frame["hour"] - 3 - epoch_hour(days[0])) // 24
+    in_period = (local_day >= 0) & (local_day < len(days))
+    sum_by(select(frame, in_period), local_day[in_period], len(days))
+
+
+def columnar(records, days):
+    frame = rollup_frame(records)
+    started = time.perf_counter()
+    columnar_endpoints(frame, days)
+    return frame, time.perf_counter() - started
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result, aggregate_time = fn(*args)
+    return result, time.perf_counter() - started, aggregate_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agregação em loops x motor colunar")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--groups", type=int, default=500)
+    args = parser.parse_args()
+    days = days_of(args)
+
+    print(f"📊 {args.groups} grupos, {args.days} dias; tempos em segundos (total = rollups + agregações)")
+    print(f"{'mensagens':>10} {'loops total':>12} {'agregações':>11} {'colunar total':>14} {'agregações':>11} "
+          f"{'de rollups gravados':>20}")
+    for size in args.sizes:
+        records = to_records(synthetic.generate_messages(size, groups=args.groups, days=args.days, end=END))
+        rows, loop_time, loop_agg = timed(loops, records, days)
+        _, col_time, col_agg = timed(columnar, records, days)
+
+        # Modo rollups: linhas lidas da tabela → frame → agregações
+        started = time.perf_counter()
+        columnar_endpoints(frame_from_rows(rows), days)
+        stored_time = time.perf_counter() - started
+        print(f"{size:>10} {loop_time:>12.3f} {loop_agg:>11.3f} {col_time:>14.3f} {col_agg:>11.3f} "
+              f"{stored_time:>20.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import base64
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common import responses  # noqa: E402
+from local import harness  # noqa: E402
+
+# ==============================
+# ⏱️ /groups/overview com 1k e 10k grupos: tamanho do corpo e latência ponta a ponta
+# Variantes: JSON com espaços (como antes), JSON compacto, gzip e br (se o
+# módulo brotli estiver instalado). Ponta a ponta = handler (p50, já com a
+# compressão) + RTT + bytes no fio (base64 decodificado pelo API Gateway)
+# na banda informada.
+# Uso: python benchmarks/compression.py --groups 1000 10000 --mbps 10 --rtt-ms 50
+# ==============================
+
+
+def p50(samples):
+    return sorted(samples)[len(samples) // 2]
+
+
+def invoke(module, tables, accept, repeat):
+    event = {"queryStringParameters": None, "headers": {"Accept-Encoding": accept} if accept else {}}
+    latencies = []
+    with harness.installed(module, tables, harness.MATERIALIZED), contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = module.lambda_handler(event, None)
+            latencies.append(time.perf_counter() - started)
+    return response, p50(latencies)
+
+
+def wire_bytes(response):
+    if response.get("isBase64Encoded"):
+        return len(base64.b64decode(response["body"]))
+    return len(response["body"].encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressão das respostas do /groups/overview")
+    parser.add_argument("--groups", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--messages-per-group", type=int, default=20)
+    parser.add_argument("--mbps", type=float, default=10, help="banda do cliente (Mbit/s)")
+    parser.add_argument("--rtt-ms", type=float, default=50)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    module = harness.load_handler("groupsOverview")
+    variants = [("json com espaços", None), ("json compacto", None), ("gzip", "gzip")]
+    if responses._brotli() is not None:
+        variants.append(("br", "br"))
+
+    print(f"📊 banda {args.mbps} Mbit/s, RTT {args.rtt_ms} ms, {args.messages_per_group} mensagens/grupo")
+    print(f"{'grupos':>7} {'variante':<17} {'bytes':>10} {'handler (ms)':>13} {'ponta a ponta (ms)':>19}")
+    for groups in args.groups:
+        tables = harness.build_dataset(groups * args.messages_per_group, groups=groups, days=7)
+        for label, accept in variants:
+            response, handler_time = invoke(module, tables, accept, args.repeat)
+            size = wire_bytes(response)
+            if label == "json com espaços":
+                size = len(json.dumps(json.loads(response["body"])).encode("utf-8"))
+            total = handler_time * 1000 + args.rtt_ms + size * 8 / (args.mbps * 1000)
+            print(f"{groups:>7} {label:<17} {size:>10} {handler_time * 1000:>13.1f} {total:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from local import harness  # noqa: E402
+
+# ==============================
+# ⏱️ Todos os lambda_handler contra as tabelas locais
+# Dataset sintético determinístico (grupos com tamanho Zipf, mix cliente/time,
+# dias de histórico, tamanho do texto); por handler e modo (raw = lê
+# crm-mensagens, materialized = rollups + estado por grupo): latência p50/p95,
+# pico de memória de uma invocação e read units consumidas.
+# Uso: python benchmarks/handlers.py --sizes 10000 100000 1000000 --zipf 1.1
+# ==============================
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def measure(module, name, tables, args):
+    quiet = io.StringIO()
+    with contextlib.redirect_stdout(quiet):
+        # Primeira chamada fora da conta (instância fria: caches de nomes, imports)
+        harness.invoke(module, name)
+
+        harness.reset_stats(tables)
+        tracemalloc.start()
+        harness.invoke(module, name)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        units = harness.read_units(tables)
+
+        latencies = []
+        started = time.perf_counter()
+        while len(latencies) < args.repeat:
+            call = time.perf_counter()
+            harness.invoke(module, name)
+            latencies.append(time.perf_counter() - call)
+            if len(latencies) >= 3 and time.perf_counter() - started > args.budget:
+                break
+        quiet.truncate(0)
+    return latencies, peak, units
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos lambda_handler com dados sintéticos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--groups", type=int, default=200)
+    parser.add_argument("--zipf", type=float, default=1.1, help="assimetria do tamanho dos grupos (0 = uniforme)")
+    parser.add_argument("--client-ratio", type=float, default=0.6)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--text-length", type=int, default=None, help="tamanho médio do texto das mensagens")
+    parser.add_argument("--handlers", nargs="+", choices=sorted(harness.HANDLERS), default=list(harness.HANDLERS))
+    parser.add_argument("--modes", nargs="+", choices=[harness.RAW, harness.MATERIALIZED],
+                        default=[harness.RAW, harness.MATERIALIZED])
+    parser.add_argument("--repeat", type=int, default=20, help="invocações medidas por handler")
+    parser.add_argument("--budget", type=float, default=30, help="segundos máximos por handler (mínimo 3 invocações)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="latência simulada por chamada ao DynamoDB")
+    args = parser.parse_args()
+
+    modules = {name: harness.load_handler(name) for name in args.handlers}
+    print(f"📊 {args.groups} grupos (zipf={args.zipf}), client-ratio={args.client_ratio}, {args.days} dias, "
+          f"texto={args.text_length or 'curto'}, latência={args.latency_ms} ms")
+    print(f"{'mensagens':>10} {'modo':<13} {'handler':<15} {'p50 (ms)':>10} {'p95 (ms)':>10} "
+          f"{'pico (MB)':>10} {'RCU':>10} {'n':>4}")
+    for size in args.sizes:
+        started = time.perf_counter()
+        tables = harness.build_dataset(size, groups=args.groups, days=args.days, client_ratio=args.client_ratio,
+                                       zipf=args.zipf, text_length=args.text_length,
+                                       materialized=harness.MATERIALIZED in args.modes,
+                                       latency_ms=args.latency_ms)
+        print(f"   dataset de {size} mensagens em {time.perf_counter() - started:.1f} s")
+        for mode in args.modes:
+            for name, module in modules.items():
+                with harness.installed(module, tables, mode):
+                    latencies, peak, units = measure(module, name, tables, args)
+                print(f"{size:>10} {mode:<13} {name:<15} {percentile(latencies, 0.5) * 1000:>10.1f} "
+                      f"{percentile(latencies, 0.95) * 1000:>10.1f} {peak / 2**20:>10.1f} {units:>10.1f} "
+                      f"{len(latencies):>4}")
+        del tables
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.messages import parse_timestamp  # noqa: E402
+from common.pairing import pair_responses  # noqa: E402
+from local import synthetic  # noqa: E402
+
+# ==============================
+# ⏱️ Busca aninhada (activity/* antigo) x pareamento por grupo em uma passada
+# Uso: python benchmarks/pairing.py --sizes 10000 100000 1000000 --client-ratio 0.98
+# ==============================
+
+
+def legacy(items):
+    # Loop original de hourly.py/weekly.py: busca para frente re-parseando timestamps
+    samples = []
+    for i in range(len(items)):
+        msg = items[i]
+        ts = parse_timestamp(msg["timestamp"])
+        if msg.get("direction") == "client":
+            for j in range(i + 1, len(items)):
+                nxt = items[j]
+                if nxt.get("direction") == "team":
+                    delta_min = (parse_timestamp(nxt["timestamp"]) - ts).total_seconds() / 60
+                    if 0 < delta_min < 180:
+                        samples.append(delta_min)
+                    break
+    return samples
+
+
+def single_pass(items):
+    events = []
+    for msg in items:
+        ts = parse_timestamp(msg["timestamp"])
+        events.append((msg["groupId"], ts.timestamp(), msg["direction"], None))
+    return pair_responses(events)
+
+
+def timed(fn, items):
+    started = time.perf_counter()
+    samples = fn(items)
+    return time.perf_counter() - started, len(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pareamento de tempo de resposta")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--groups", type=int, default=200)
+    parser.add_argument("--client-ratio", type=float, default=0.98)
+    parser.add_argument("--legacy-limit", type=int, default=100_000,
+                        help="acima disso o loop antigo não é executado")
+    args = parser.parse_args()
+
+    print(f"📊 client-ratio={args.client_ratio}, {args.groups} grupos")
+    print(f"{'mensagens':>10} {'aninhado (s)':>14} {'uma passada (s)':>16} {'amostras':>10}")
+    for size in args.sizes:
+        items = list(synthetic.generate_messages(size, groups=args.groups,
+                                                 client_ratio=args.client_ratio))
+        new_time, new_samples = timed(single_pass, items)
+        if size <= args.legacy_limit:
+            old_time, _ = timed(legacy, items)
+            old = f"{old_time:>14.3f}"
+        else:
+            old = f"{'—':>14}"
+        print(f"{size:>10} {old} {new_time:>16.3f} {new_samples:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.messages import ACTIVITY_FIELDS, iter_scan  # noqa: E402
+from local import synthetic  # noqa: E402
+
+# ==============================
+# ⏱️ Loop de scan sequencial x parallel scan em streaming com projeção
+# Cada variante roda em um subprocesso para medir o pico de RSS isolado.
+# Uso: python benchmarks/parallel_scan.py --messages 1000000 --segments 8 --latency-ms 20
+# ==============================
+
+
+def sequential(table):
+    # Padrão antigo copiado nas lambdas
+    items = []
+    response = table.scan()
+    items.extend(response.get("Items", []))
+    while "LastEvaluatedKey" in response:
+        response = table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
+        items.extend(response.get("Items", []))
+    return sum(1 for m in items if m["direction"] == "client")
+
+
+def parallel(table, segments):
+    items = iter_scan(table, segments=segments, fields=ACTIVITY_FIELDS)
+    return sum(1 for m in items if m["direction"] == "client")
+
+
+def peak_rss_mb():
+    # ru_maxrss vem em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_variant(args):
+    table = synthetic.load(
+        synthetic.messages_table(latency_ms=args.latency_ms),
+        synthetic.generate_messages(args.messages, groups=args.groups, days=args.days),
+    )
+    base = peak_rss_mb()
+    started = time.perf_counter()
+    if args.variant == "sequential":
+        clients = sequential(table)
+    else:
+        clients = parallel(table, args.segments)
+    elapsed = time.perf_counter() - started
+    print(f"{args.variant:<10} clientes={clients:>8}  páginas={table.request_count:>5}  "
+          f"tempo={elapsed:>7.2f} s  pico RSS extra={peak_rss_mb() - base:>8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan sequencial x parallel scan")
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="latência simulada por página")
+    parser.add_argument("--variant", choices=["sequential", "parallel"])
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args)
+        return
+
+    print(f"📊 {args.messages} mensagens, {args.segments} segmentos, {args.latency_ms} ms/página")
+    for variant in ("sequential", "parallel"):
+        subprocess.run([sys.executable, __file__, "--variant", variant] + sys.argv[1:], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common import sketch  # noqa: E402
+from common.columnar import percentiles_by, rollup_frame  # noqa: E402
+from common.pairing import pair_responses  # noqa: E402
+from common.records import to_records  # noqa: E402
+from common.rollups import compute_rollups  # noqa: E402
+from local import synthetic  # noqa: E402
+
+# ==============================
+# ⏱️ Percentis exatos (todas as amostras) x sketches mergeáveis (common.sketch)
+# Mesmos buckets dos endpoints: hora do dia (hourly) e dia (weekly), em UTC.
+#   erro    → maior erro relativo do sketch contra o quantil exato (posto inferior)
+#   exato   → ordenar todas as amostras do período por bucket
+#   sketch  → somar os baldes das linhas horárias (percentiles_by, NumPy)
+#   merge   → somar os dicts {balde: contagem} das linhas em Python (stream/checker)
+# Uso: python benchmarks/percentiles.py --sizes 100000 1000000
+# ==============================
+
+END = datetime(2025, 8, 6, tzinfo=timezone.utc)
+
+
+def exact_samples(records):
+    events = [(r.group_id, r.epoch, r.direction, r.epoch) for r in records]
+    pairs = pair_responses(events)
+    epoch = np.fromiter((client for client, _, _ in pairs), dtype=np.int64, count=len(pairs))
+    seconds = np.fromiter((round(delta * 60) for _, _, delta in pairs), dtype=np.int64, count=len(pairs))
+    return epoch // 3600, seconds
+
+
+def exact_percentiles(bucket, seconds, size):
+    # Posto inferior floor(q * (n - 1)) dentro de cada bucket, como common.sketch.quantile
+    order = np.lexsort((seconds, bucket))
+    bucket, seconds = bucket[order], seconds[order]
+    counts = np.bincount(bucket, minlength=size)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = {}
+    for label, q in sketch.QUANTILES:
+        rank = np.floor(q * (counts - 1)).astype(np.int64)
+        values = seconds[np.minimum(starts + np.maximum(rank, 0), len(seconds) - 1)] / 60
+        result[label] = np.where(counts > 0, values, np.nan)
+    return result
+
+
+def max_relative_error(estimated, exact):
+    errors = [0.0]
+    for label, _ in sketch.QUANTILES:
+        for i, value in enumerate(exact[label]):
+            if not np.isnan(value) and value:
+                errors.append(abs(estimated[i][label] - value) / value)
+    return max(errors)
+
+
+def run(size, args):
+    records = to_records(synthetic.generate_messages(size, groups=args.groups, days=args.days, end=END))
+    frame = rollup_frame(records)
+    rows = list(compute_rollups(records).values())
+    sample_hour, seconds = exact_samples(records)
+    first = int(min(frame["hour"].min(), sample_hour.min()))
+
+    result = {"samples": len(seconds), "entries": len(frame["rtSketch"][0]) / max(len(frame["hour"]), 1)}
+    for name, frame_bucket, sample_bucket, buckets in (
+        ("hourly", frame["hour"] % 24, sample_hour % 24, 24),
+        ("weekly", (frame["hour"] - first) // 24, (sample_hour - first) // 24, args.days + 1),
+    ):
+        started = time.perf_counter()
+        exact = exact_percentiles(sample_bucket, seconds, buckets)
+        exact_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        estimated = percentiles_by(frame, frame_bucket, buckets)
+        sketch_time = time.perf_counter() - started
+        result[name] = (max_relative_error(estimated, exact), exact_time, sketch_time)
+
+    started = time.perf_counter()
+    merged = {}
+    for row in rows:
+        sketch.merge(merged, row["rtSketch"])
+    sketch.percentiles(merged)
+    result["merge"] = time.perf_counter() - started
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Percentis exatos x sketches mergeáveis")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--groups", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"📊 {args.groups} grupos, {args.days} dias; α = {sketch.RELATIVE_ACCURACY}, tempos em segundos")
+    print(f"{'mensagens':>10} {'amostras':>9} {'baldes/linha':>13} {'bucket':>7} {'erro máx':>9} "
+          f"{'exato':>8} {'sketch':>8} {'merge dicts':>12}")
+    for size in args.sizes:
+        result = run(size, args)
+        for name in ("hourly", "weekly"):
+            error, exact_time, sketch_time = result[name]
+            print(f"{size:>10} {result['samples']:>9} {result['entries']:>13.2f} {name:>7} {error:>9.4f} "
+                  f"{exact_time:>8.3f} {sketch_time:>8.3f} {result['merge']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
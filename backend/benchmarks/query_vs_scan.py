@@ -0,0 +1,63 @@
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.messages import query_window  # noqa: E402
+from local import synthetic  # noqa: E402
+
+# ==============================
+# ⏱️ Scan completo x query por janela (dayShard-timestamp-index)
+# Uso: python benchmarks/query_vs_scan.py --messages 200000 --days 30 --latency-ms 5
+# ==============================
+
+
+def scan_window(table, start, end):
+    # Padrão antigo das lambdas: scan paginado + filtro em Python
+    lo, hi = start.strftime("%Y-%m-%dT%H:%M:%S"), end.strftime("%Y-%m-%dT%H:%M:%S")
+    items = []
+    response = table.scan()
+    items.extend(response.get("Items", []))
+    while "LastEvaluatedKey" in response:
+        response = table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
+        items.extend(response.get("Items", []))
+    return [m for m in items if lo <= m["timestamp"] < hi]
+
+
+def measure(label, table, fn):
+    table.reset_stats()
+    started = time.perf_counter()
+    items = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<8} itens={len(items):>8}  requisições={table.request_count:>5}  "
+          f"RCU={table.consumed_read_units:>10.1f}  tempo={elapsed * 1000:>9.1f} ms")
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan x query por janela em crm-mensagens")
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--groups", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="latência simulada por requisição")
+    args = parser.parse_args()
+
+    end = datetime(2025, 8, 5, 12, tzinfo=timezone.utc)
+    table = synthetic.load(
+        synthetic.messages_table(latency_ms=args.latency_ms),
+        synthetic.generate_messages(args.messages, groups=args.groups, days=args.days, end=end),
+    )
+
+    start = datetime(2025, 8, 5, tzinfo=timezone.utc)
+    window_end = start + timedelta(days=1)
+    print(f"📊 {args.messages} mensagens em {args.days} dias — janela de 1 dia")
+    scanned = measure("scan", table, lambda: scan_window(table, start, window_end))
+    queried = measure("query", table, lambda: query_window(table, start, window_end))
+    assert len(scanned) == len(queried), "query e scan divergiram"
+
+
+if __name__ == "__main__":
+    main()
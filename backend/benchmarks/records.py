@@ -0,0 +1,141 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.messages import ACTIVITY_FIELDS, CONVERSATION_FIELDS, parse_timestamp  # noqa: E402
+from common.pairing import EACH_CLIENT, LAST_CLIENT, pair_responses  # noqa: E402
+from common.records import CLIENT, MessageRecord, to_records  # noqa: E402
+from common.rollups import _add_sample, bucket_of, compute_rollups, new_row  # noqa: E402
+from local import synthetic  # noqa: E402
+
+# ==============================
+# ⏱️ Dicts crus do boto3 x MessageRecord (__slots__, epoch int, content preguiçoso)
+# Cada variante roda em um subprocesso: bytes retidos pela lista de mensagens,
+# CPU da carga (conversão/ordenação) e de rollups + leitura dos textos do cliente.
+# Uso: python benchmarks/records.py --messages 1000000
+# ==============================
+
+END = datetime(2025, 8, 6, tzinfo=timezone.utc)
+
+
+def legacy_count(row, msg):
+    direction = msg.get("direction")
+    row["messages"] += 1
+    if direction == "client":
+        row["clientMessages"] += 1
+    elif direction == "team":
+        row["teamMessages"] += 1
+    if row["lastTimestamp"] is None or msg["timestamp"] >= row["lastTimestamp"]:
+        row["lastTimestamp"] = msg["timestamp"]
+        row["lastDirection"] = direction
+
+
+def dict_pipeline(items, with_text):
+    # compute_rollups sobre dicts (parse do timestamp por mensagem) e content/from
+    # decodificados a cada uso (texto + relevância, nome do cliente)
+    rows = {}
+    events = []
+    for msg in items:
+        key = bucket_of(msg["timestamp"]) + (msg["groupId"],)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = new_row(*key)
+        legacy_count(row, msg)
+        events.append((msg["groupId"], parse_timestamp(msg["timestamp"]).timestamp(), msg.get("direction"), row))
+    for row, _, delta_min in pair_responses(events, mode=EACH_CLIENT):
+        _add_sample(row, delta_min)
+    for row, _, delta_min in pair_responses(events, mode=LAST_CLIENT):
+        _add_sample(row, delta_min, last=True)
+
+    for msg in items:
+        if with_text and msg["direction"] == "client":
+            json.loads(msg["content"]).get("text", "")
+            json.loads(msg["content"]).get("text", "")
+            json.loads(msg["from"]).get("name")
+    return len(rows)
+
+
+def record_pipeline(records, with_text):
+    rows = compute_rollups(records)
+    for record in records:
+        if with_text and record.direction is CLIENT:
+            record.text
+            record.text
+            record.sender.get("name")
+    return len(rows)
+
+
+def deep_size(messages):
+    # Bytes retidos pela lista: cada objeto alcançável contado uma vez
+    # (strings internadas/compartilhadas, como groupId e direction, contam uma vez só)
+    seen = set()
+    total = 0
+    stack = [messages]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, list):
+            stack.extend(obj)
+        elif isinstance(obj, MessageRecord):
+            stack.extend(getattr(obj, name) for name in MessageRecord.__slots__)
+    return total
+
+
+def run_variant(args):
+    fields = CONVERSATION_FIELDS if args.fields == "conversation" else ACTIVITY_FIELDS
+    items = [{name: item[name] for name in fields}
+             for item in synthetic.generate_messages(args.messages, groups=args.groups,
+                                                     days=args.days, end=END)]
+
+    started = time.perf_counter()
+    if args.variant == "dicts":
+        items.sort(key=lambda m: m["timestamp"])
+        messages = items
+    else:
+        messages = to_records(items)
+    load_time = time.perf_counter() - started
+    del items
+    retained = deep_size(messages)
+
+    started = time.perf_counter()
+    pipeline = dict_pipeline if args.variant == "dicts" else record_pipeline
+    rows = pipeline(messages, with_text=args.fields == "conversation")
+    process_time = time.perf_counter() - started
+    print(f"{args.variant:<8} mensagens={len(messages):>8}  retido={retained / 2**20:>7.1f} MB "
+          f"({retained / len(messages):>5.0f} B/msg)  carga={load_time:>6.2f} s  "
+          f"processamento={process_time:>6.2f} s  rollups={rows}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dicts crus x registros compactos")
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--fields", choices=["conversation", "activity"], default="conversation",
+                        help="projeção lida (alerts/groupsOverview x activity/metricsToday)")
+    parser.add_argument("--variant", choices=["dicts", "records"])
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args)
+        return
+
+    print(f"📊 {args.messages} mensagens, {args.groups} grupos, {args.days} dias, projeção {args.fields}")
+    for variant in ("dicts", "records"):
+        subprocess.run([sys.executable, __file__, "--variant", variant] + sys.argv[1:], check=True)
+
+
+if __name__ == "__main__":
+    main()
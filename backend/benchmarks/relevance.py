@@ -0,0 +1,79 @@
+import argparse
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+from rapidfuzz import fuzz
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.relevance import IGNORED_MESSAGES, RelevanceClassifier  # noqa: E402
+from local import synthetic  # noqa: E402
+
+# ==============================
+# ⏱️ is_irrelevant_message antigo x classificador pré-compilado
+# Uso: python benchmarks/relevance.py --messages 50000
+# ==============================
+
+
+def legacy_normalize(text):
+    text = text.lower().strip()
+    text = "".join(
+        c for c in unicodedata.normalize("NFD", text)
+        if unicodedata.category(c) != "Mn"
+    )
+    return re.sub(r"[^\w\s]", "", text)
+
+
+def legacy(text):
+    # Versão copiada em alerts/app.py e groupsOverview/app.py
+    if not text:
+        return True
+    norm = legacy_normalize(text)
+    for term in IGNORED_MESSAGES:
+        norm_term = legacy_normalize(term)
+        if fuzz.ratio(norm, norm_term) > 85:
+            return True
+        if re.search(rf"\b{re.escape(norm_term)}\b", norm):
+            return True
+    return False
+
+
+def one_by_one(classifier, texts):
+    return [classifier.is_irrelevant(t) for t in texts]
+
+
+def timed(fn, texts):
+    started = time.perf_counter()
+    result = fn(texts)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classificador de relevância")
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--short-ratio", type=float, default=0.4)
+    args = parser.parse_args()
+
+    texts = list(synthetic.whatsapp_texts(args.messages, short_ratio=args.short_ratio))
+    print(f"📊 {len(texts)} mensagens, {len(set(texts))} distintas")
+
+    variants = [
+        ("antigo", lambda ts: [legacy(t) for t in ts]),
+        ("sem memo", lambda ts: one_by_one(RelevanceClassifier(IGNORED_MESSAGES, memo_size=0), ts)),
+        ("memo", lambda ts: one_by_one(RelevanceClassifier(IGNORED_MESSAGES), ts)),
+        ("lote", lambda ts: RelevanceClassifier(IGNORED_MESSAGES).classify_many(ts)),
+    ]
+    expected = None
+    for name, fn in variants:
+        elapsed, result = timed(fn, texts)
+        expected = expected or result
+        status = "ok" if result == expected else "DIVERGENTE"
+        print(f"{name:<9}{elapsed * 1e6 / len(texts):>8.2f} µs/mensagem  "
+              f"irrelevantes={sum(result):>7}  {status}")
+
+
+if __name__ == "__main__":
+    main()
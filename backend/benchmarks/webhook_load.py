@@ -0,0 +1,123 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common import ingest  # noqa: E402
+from local import synthetic  # noqa: E402
+from local.queue import LocalQueue  # noqa: E402
+from local.table import LocalResource  # noqa: E402
+
+# ==============================
+# ⏱️ Carga no POST /webhook/whatsapp: rajadas de broadcast → fila → BatchWriteItem
+# Mesmo caminho das lambdas (assinatura, validação, SendMessageBatch; consumidores
+# em paralelo gravando em lotes de 25), com latência por chamada simulada, contra
+# o jeito atual: um PutItem por mensagem.
+# Uso: python benchmarks/webhook_load.py --messages 100000 --burst 500 --consumers 8
+# ==============================
+
+END = datetime(2025, 8, 6, tzinfo=timezone.utc)
+SECRET = "bench"
+
+
+def ingest_bursts(bodies, queue):
+    # webhook/app.py sem o boto3: uma invocação por rajada
+    accepted = 0
+    for body, signature in bodies:
+        assert ingest.valid_signature(body, signature, SECRET)
+        records, rejected = ingest.to_records(ingest.parse_events(body))
+        ingest.enqueue(queue, queue.url, records)
+        accepted += len(records)
+    return accepted
+
+
+def consume(queue, resource, batch_size):
+    # webhook/consumer.py: cada thread é uma instância da lambda consumidora
+    while (event := queue.receive(batch_size)) is not None:
+        batches = [(r["messageId"], json.loads(r["body"])) for r in event["Records"]]
+        failures = ingest.write_records(resource, batches)
+        queue.settle(event, {"batchItemFailures": [{"itemIdentifier": f} for f in failures]})
+
+
+def run_batched(args, bodies):
+    queue = LocalQueue(latency_ms=args.latency_ms)
+    messages = synthetic.messages_table()
+    resource = LocalResource(messages, synthetic.groups_table(), latency_ms=args.latency_ms,
+                             max_batch_keys=args.max_batch_keys)
+
+    started = time.perf_counter()
+    accepted = ingest_bursts(bodies, queue)
+    ingest_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=consume, args=(queue, resource, args.batch_size))
+               for _ in range(args.consumers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    flush_time = time.perf_counter() - started
+
+    assert len(messages) == accepted, (len(messages), accepted)
+    return accepted, ingest_time, flush_time, queue, resource
+
+
+def run_single_puts(args, events):
+    # Hoje: um PutItem por mensagem, com a mesma concorrência
+    table = synthetic.messages_table(latency_ms=args.latency_ms)
+    items = [r["i"] for r in ingest.to_records(events)[0]]
+    chunks = [items[i::args.consumers] for i in range(args.consumers)]
+
+    def put_all(chunk):
+        for item in chunk:
+            table.put_item(Item=item)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=put_all, args=(chunk,)) for chunk in chunks]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return len(items), time.perf_counter() - started, table.request_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga no webhook com gravação em lote")
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--burst", type=int, default=500, help="eventos por POST (broadcast)")
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--consumers", type=int, default=8, help="instâncias concorrentes da consumidora")
+    parser.add_argument("--batch-size", type=int, default=10, help="mensagens SQS por invocação")
+    parser.add_argument("--latency-ms", type=float, default=5, help="latência de cada chamada SQS/DynamoDB")
+    parser.add_argument("--max-batch-keys", type=int, default=None,
+                        help="itens processados por BatchWriteItem (simula UnprocessedItems)")
+    parser.add_argument("--single-limit", type=int, default=20_000,
+                        help="mensagens gravadas no modo um PutItem por mensagem")
+    args = parser.parse_args()
+
+    events = list(synthetic.webhook_events(args.messages, groups=args.groups, end=END))
+    bodies = []
+    for i in range(0, len(events), args.burst):
+        body = json.dumps(events[i:i + args.burst])
+        bodies.append((body, ingest.sign(body, SECRET)))
+
+    print(f"📊 {args.messages} mensagens em rajadas de {args.burst}, {args.consumers} consumidores, "
+          f"latência {args.latency_ms} ms/chamada")
+    accepted, ingest_time, flush_time, queue, resource = run_batched(args, bodies)
+    print(f"webhook     {accepted / ingest_time:>10.0f} msg/s  ({len(bodies)} POSTs, "
+          f"{queue.request_count} SendMessageBatch, {queue.sent} mensagens SQS)")
+    print(f"lote (25)   {accepted / flush_time:>10.0f} msg/s  ({resource.request_count} BatchWriteItem, "
+          f"{queue.redelivered} reentregas)")
+    print(f"ponta a ponta {accepted / (ingest_time + flush_time):>8.0f} msg/s")
+
+    count, single_time, requests = run_single_puts(args, events[:args.single_limit])
+    print(f"PutItem     {count / single_time:>10.0f} msg/s  ({requests} PutItem, {count} mensagens)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from functools import lru_cache
+
+# ==============================
+# ☁️ Clientes e recursos AWS criados no primeiro uso
+# Importar o boto3 (~250 ms) e montar boto3.resource('dynamodb') (~150 ms,
+# carrega o modelo do serviço) no import do handler pesa em todo cold start,
+# mesmo quando a invocação não chega a usar a tabela (cache, modo
+# materializado). Os handlers seguem com `dynamodb`, `*_table` e `sqs` no
+# módulo, mas como proxies: o objeto do boto3 nasce no primeiro atributo
+# acessado e é reaproveitado pela instância (warm).
+# ==============================
+
+
+@lru_cache(maxsize=None)
+def resource(service):
+    import boto3
+    return boto3.resource(service)
+
+
+@lru_cache(maxsize=None)
+def client(service):
+    import boto3
+    return boto3.client(service)
+
+
+class LazyTable:
+    """Table do DynamoDB; `name` não cria nada, o resto vai para o boto3."""
+
+    def __init__(self, service, name):
+        self.name = name
+        self._service = service
+        self._table = None
+
+    def __getattr__(self, attr):
+        if self._table is None:
+            self._table = resource(self._service).Table(self.name)
+        return getattr(self._table, attr)
+
+
+class LazyResource:
+    def __init__(self, service):
+        self._service = service
+
+    def Table(self, name):
+        return LazyTable(self._service, name)
+
+    def __getattr__(self, attr):
+        return getattr(resource(self._service), attr)
+
+
+class LazyClient:
+    def __init__(self, service):
+        self._service = service
+
+    def __getattr__(self, attr):
+        return getattr(client(self._service), attr)
+
+
+def lazy_resource(service):
+    return LazyResource(service)
+
+
+def lazy_client(service):
+    return LazyClient(service)
@@ -0,0 +1,181 @@
+import functools
+import json
+import os
+import time
+
+from botocore.exceptions import ClientError
+
+from common.conditional import etag_matches, not_modified, request_params
+
+# ==============================
+# 🗄️ Cache de respostas dos endpoints do dashboard
+# Chave: endpoint + parâmetros de query relevantes (normalizados).
+#   1. memória do processo: sobrevive entre invocações da mesma instância (warm)
+#   2. tabela compartilhada (opcional, CACHE_TABLE): DynamoDB com TTL em
+#      expiresAt, vale para todas as instâncias
+# Só respostas 200 entram no cache; o header X-Cache diz de onde veio.
+# Com a ETag guardada junto, If-None-Match igual numa resposta em cache → 304.
+# ==============================
+
+# Segundos que cada resposta fica válida (0 desliga o cache do endpoint)
+TTL_SECONDS = {
+    "alerts": 30,
+    "groupsOverview": 30,
+    "groups": 30,
+    "groupStats": 60,
+    "metricsToday": 60,
+    "hourly": 60,
+    "weekly": 300,
+    "dashboard": 30,
+}
+
+MAX_MEMORY_ENTRIES = 256
+# Itens do DynamoDB têm limite de 400 KB
+MAX_SHARED_BODY_BYTES = 350 * 1024
+
+_memory = {}
+_shared = {"table": None, "loaded": False}
+stats = {"memoryHits": 0, "sharedHits": 0, "misses": 0}
+
+
+def cache_enabled():
+    return os.environ.get("RESULT_CACHE_ENABLED", "true").lower() == "true"
+
+
+def ttl_for(endpoint):
+    # CACHE_TTL_<ENDPOINT> sobrescreve o padrão (ex.: CACHE_TTL_WEEKLY=600)
+    value = os.environ.get(f"CACHE_TTL_{endpoint.upper()}")
+    return int(value) if value else TTL_SECONDS.get(endpoint, 0)
+
+
+def cache_key(endpoint, query, params):
+    values = {}
+    for name in params:
+        value = (query or {}).get(name)
+        if value is None or str(value).strip() == "":
+            continue
+        value = str(value).strip()
+        if name in ("limit",) and value.isdigit():
+            value = str(int(value))
+        elif name in ("priority",):
+            value = value.lower()
+        values[name] = value
+    return endpoint + "?" + json.dumps(values, sort_keys=True, separators=(",", ":"))
+
+
+def set_shared_table(table):
+    _shared["table"] = table
+    _shared["loaded"] = True
+
+
+def shared_table():
+    if not _shared["loaded"]:
+        name = os.environ.get("CACHE_TABLE")
+        if name:
+            import boto3
+            _shared["table"] = boto3.resource("dynamodb").Table(name)
+        _shared["loaded"] = True
+    return _shared["table"]
+
+
+def clear_cache():
+    _memory.clear()
+    _shared.update(table=None, loaded=False)
+    for name in stats:
+        stats[name] = 0
+
+
+def _memory_get(key, now):
+    entry = _memory.get(key)
+    if entry is None:
+        return None
+    if entry[0] <= now:
+        del _memory[key]
+        return None
+    return entry[1]
+
+
+def _memory_put(key, cached, expires):
+    if key not in _memory and len(_memory) >= MAX_MEMORY_ENTRIES:
+        now = time.time()
+        for old in [k for k, (exp, _) in _memory.items() if exp <= now]:
+            del _memory[old]
+        while len(_memory) >= MAX_MEMORY_ENTRIES:
+            del _memory[next(iter(_memory))]  # mais antigo inserido
+    _memory[key] = (expires, cached)
+
+
+def _shared_get(table, key, now):
+    try:
+        item = table.get_item(Key={"cacheKey": key}).get("Item")
+    except ClientError as exc:
+        print(f"⚠️ cache compartilhado indisponível: {exc}")
+        return None, None
+    # O TTL do DynamoDB apaga com atraso: confere a expiração aqui também
+    if not item or int(item["expiresAt"]) <= now:
+        return None, None
+    return {"headers": json.loads(item["headers"]), "body": item["body"]}, int(item["expiresAt"])
+
+
+def _shared_put(table, key, cached, expires):
+    if len(cached["body"].encode("utf-8")) > MAX_SHARED_BODY_BYTES:
+        return
+    try:
+        table.put_item(Item={"cacheKey": key, "body": cached["body"],
+                             "headers": json.dumps(cached["headers"]), "expiresAt": int(expires)})
+    except ClientError as exc:
+        print(f"⚠️ cache compartilhado indisponível: {exc}")
+
+
+def _response(event, cached, source):
+    etag = cached["headers"].get("ETag")
+    if source != "MISS" and etag_matches(event, etag):
+        return not_modified(etag, dict(cached["headers"], **{"X-Cache": source}))
+    return {
+        "statusCode": 200,
+        "headers": dict(cached["headers"], **{"X-Cache": source}),
+        "body": cached["body"],
+    }
+
+
+def cached_endpoint(endpoint, params=()):
+    """Decorator do lambda_handler: serve a resposta do cache enquanto válida.
+
+    params: parâmetros de query/caminho que mudam a resposta (os demais são ignorados na chave).
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            ttl = ttl_for(endpoint)
+            if not cache_enabled() or ttl <= 0:
+                return handler(event, context)
+
+            key = cache_key(endpoint, request_params(event), params)
+            now = time.time()
+            cached = _memory_get(key, now)
+            if cached is not None:
+                stats["memoryHits"] += 1
+                print(f"🗄️ cache {endpoint} HIT-MEMORY {stats}")
+                return _response(event, cached, "HIT-MEMORY")
+
+            table = shared_table()
+            if table is not None:
+                cached, expires = _shared_get(table, key, now)
+                if cached is not None:
+                    stats["sharedHits"] += 1
+                    _memory_put(key, cached, expires)
+                    print(f"🗄️ cache {endpoint} HIT-SHARED {stats}")
+                    return _response(event, cached, "HIT-SHARED")
+
+            stats["misses"] += 1
+            print(f"🗄️ cache {endpoint} MISS {stats}")
+            response = handler(event, context)
+            if response.get("statusCode") != 200:
+                return response
+            cached = {"headers": dict(response.get("headers") or {}), "body": response["body"]}
+            _memory_put(key, cached, now + ttl)
+            if table is not None:
+                _shared_put(table, key, cached, now + ttl)
+            return _response(event, cached, "MISS")
+        return wrapper
+    return decorator
@@ -0,0 +1,338 @@
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+
+import numpy as np
+
+from common.pairing import MAX_RESPONSE_MINUTES
+from common.records import CLIENT, TEAM
+from common.sketch import BUCKETS, QUANTILES, SKETCH_FIELDS, UPPER_BOUNDS, bucket_value
+from common.timezones import offset_table, timezone_name
+
+# ==============================
+# 🧮 Motor colunar (NumPy) para activity/* e metricsToday
+# Um "frame" é um dict de arrays com uma linha por (hora UTC, grupo), as mesmas
+# linhas dos rollups de common/rollups.py:
+#   hour   → epoch em horas (epoch // 3600)
+#   group  → índice em frame["groups"]
+#   messages, clientMessages, teamMessages, rtSumSec, rtCount,
+#   rtLastSumSec, rtLastCount (tempo de resposta em segundos, inteiro),
+#   rtMinSec, rtMaxSec (nan sem amostra), lastDirection (código)
+#   rtSketch, rtLastSketch → sketches de percentis (common.sketch) esparsos:
+#   tupla (linha, balde, contagem) de arrays, só os baldes com amostras
+# Vem das mensagens (rollup_frame) ou dos rollups gravados (frame_from_rows);
+# os endpoints só agregam o frame com bincount.
+# ==============================
+
+OTHER_CODE, CLIENT_CODE, TEAM_CODE = 0, 1, 2
+DIRECTION_CODES = {CLIENT: CLIENT_CODE, TEAM: TEAM_CODE}
+DIRECTION_NAMES = {CLIENT_CODE: CLIENT, TEAM_CODE: TEAM}
+
+COUNT_FIELDS = ("messages", "clientMessages", "teamMessages", "rtSumSec", "rtCount", "rtLastSumSec", "rtLastCount")
+
+HOUR = 3600
+DAY = 86400
+
+_UPPER_BOUNDS = np.array(UPPER_BOUNDS)
+_BUCKET_VALUES = np.array([bucket_value(i) for i in range(BUCKETS)])
+
+
+def epoch_hour(day, hour=0):
+    """Epoch em horas do início de day (date ou YYYY-MM-DD) + hour, em UTC."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return int(start.timestamp()) // HOUR + hour
+
+
+def day_of_hour(hour):
+    return (datetime(1970, 1, 1) + timedelta(hours=int(hour))).date()
+
+
+def empty_frame():
+    frame = {"hour": np.zeros(0, dtype=np.int64), "group": np.zeros(0, dtype=np.int32), "groups": []}
+    for name in COUNT_FIELDS:
+        frame[name] = np.zeros(0, dtype=np.int64)
+    frame["rtMinSec"] = np.zeros(0)
+    frame["rtMaxSec"] = np.zeros(0)
+    frame["lastDirection"] = np.zeros(0, dtype=np.int8)
+    for name in SKETCH_FIELDS:
+        frame[name] = _empty_sketch()
+    return frame
+
+
+def _empty_sketch():
+    return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+
+def _sketch(sample_row, seconds):
+    # Mesmo balde de common.sketch.bucket (bisect_left nos mesmos limites)
+    if not len(sample_row):
+        return _empty_sketch()
+    bins = np.minimum(np.searchsorted(_UPPER_BOUNDS, seconds, side="left"), BUCKETS - 1)
+    keys, counts = np.unique(sample_row.astype(np.int64) * BUCKETS + bins, return_counts=True)
+    return keys // BUCKETS, keys % BUCKETS, counts.astype(np.int64)
+
+
+def load_columns(records):
+    """Colunas das mensagens: epoch (s), índice do grupo, código da direção."""
+    n = len(records)
+    index = {}
+    epoch = np.fromiter((r.epoch for r in records), dtype=np.int64, count=n)
+    group = np.fromiter((index.setdefault(r.group_id, len(index)) for r in records), dtype=np.int32, count=n)
+    direction = np.fromiter((DIRECTION_CODES.get(r.direction, OTHER_CODE) for r in records), dtype=np.int8, count=n)
+    return epoch, group, direction, list(index)
+
+
+def _pairs(epoch, group, direction, max_minutes):
+    # Mensagens do cliente → próxima do time no mesmo grupo, vetorizado.
+    # Retorna (posição do cliente, segundos até a resposta, é a última antes da resposta)
+    events = np.flatnonzero(direction != OTHER_CODE)
+    order = events[np.argsort(group[events], kind="stable")]  # por grupo, em ordem de tempo
+    g, d, e = group[order], direction[order], epoch[order]
+
+    team = np.flatnonzero(d == TEAM_CODE)
+    client = np.flatnonzero(d == CLIENT_CODE)
+    if not len(team) or not len(client):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+
+    nxt = np.searchsorted(team, client)
+    answered = nxt < len(team)
+    client, nxt = client[answered], team[nxt[answered]]
+    same_group = g[nxt] == g[client]
+    client, nxt = client[same_group], nxt[same_group]
+
+    delta = e[nxt] - e[client]
+    valid = (delta > 0) & (delta < max_minutes * 60)
+    client, nxt, delta = client[valid], nxt[valid], delta[valid]
+    return order[client], delta, nxt == client + 1
+
+
+def rollup_frame(records, max_minutes=MAX_RESPONSE_MINUTES):
+    """Frame calculado das mensagens (MessageRecord ordenados por timestamp)."""
+    if not records:
+        return empty_frame()
+    epoch, group, direction, groups = load_columns(records)
+    n, size = len(epoch), len(groups)
+
+    key = (epoch // HOUR) * size + group
+    keys, row = np.unique(key, return_inverse=True)
+    rows = len(keys)
+    # Última mensagem de cada linha: primeira ocorrência no array invertido
+    _, first_reversed = np.unique(key[::-1], return_index=True)
+    last = n - 1 - first_reversed
+
+    frame = {
+        "hour": keys // size,
+        "group": (keys % size).astype(np.int32),
+        "groups": groups,
+        "messages": np.bincount(row, minlength=rows),
+        "clientMessages": np.bincount(row, weights=direction == CLIENT_CODE, minlength=rows).astype(np.int64),
+        "teamMessages": np.bincount(row, weights=direction == TEAM_CODE, minlength=rows).astype(np.int64),
+        "lastDirection": direction[last],
+    }
+
+    client, delta, is_last = _pairs(epoch, group, direction, max_minutes)
+    sample_row = row[client]
+    frame["rtSumSec"] = np.bincount(sample_row, weights=delta, minlength=rows).astype(np.int64)
+    frame["rtCount"] = np.bincount(sample_row, minlength=rows)
+    frame["rtLastSumSec"] = np.bincount(sample_row[is_last], weights=delta[is_last], minlength=rows).astype(np.int64)
+    frame["rtLastCount"] = np.bincount(sample_row[is_last], minlength=rows)
+    frame["rtMinSec"] = np.full(rows, np.inf)
+    frame["rtMaxSec"] = np.full(rows, -np.inf)
+    np.minimum.at(frame["rtMinSec"], sample_row, delta)
+    np.maximum.at(frame["rtMaxSec"], sample_row, delta)
+    frame["rtMinSec"][frame["rtCount"] == 0] = np.nan
+    frame["rtMaxSec"][frame["rtCount"] == 0] = np.nan
+    frame["rtSketch"] = _sketch(sample_row, delta)
+    frame["rtLastSketch"] = _sketch(sample_row[is_last], delta[is_last])
+    return frame
+
+
+def frame_from_rows(rows):
+    """Frame a partir de rollups já agregados (load_rollups / compute_rollups)."""
+    rows = list(rows)
+    if not rows:
+        return empty_frame()
+    index = {}
+    day_hours = {}
+    hours, groups = [], []
+    for row in rows:
+        base = day_hours.get(row["date"])
+        if base is None:
+            base = day_hours[row["date"]] = epoch_hour(row["date"])
+        hours.append(base + int(row["hour"]))
+        groups.append(index.setdefault(row["groupId"], len(index)))
+
+    def seconds(name):
+        # Minutos gravados com 4 casas → segundos inteiros exatos
+        return np.array([round(row[name] * 60) for row in rows], dtype=np.int64)
+
+    def optional_seconds(name):
+        return np.array([np.nan if row[name] is None else row[name] * 60 for row in rows])
+
+    def sketch(name):
+        entries = [(i, b, c) for i, row in enumerate(rows) for b, c in row[name].items()]
+        if not entries:
+            return _empty_sketch()
+        return tuple(np.array(column, dtype=np.int64) for column in zip(*entries))
+
+    frame = {
+        "hour": np.array(hours, dtype=np.int64),
+        "group": np.array(groups, dtype=np.int32),
+        "groups": list(index),
+        "messages": np.array([row["messages"] for row in rows], dtype=np.int64),
+        "clientMessages": np.array([row["clientMessages"] for row in rows], dtype=np.int64),
+        "teamMessages": np.array([row["teamMessages"] for row in rows], dtype=np.int64),
+        "rtSumSec": seconds("rtSum"),
+        "rtCount": np.array([row["rtCount"] for row in rows], dtype=np.int64),
+        "rtLastSumSec": seconds("rtLastSum"),
+        "rtLastCount": np.array([row["rtLastCount"] for row in rows], dtype=np.int64),
+        "rtMinSec": optional_seconds("rtMin"),
+        "rtMaxSec": optional_seconds("rtMax"),
+        "lastDirection": np.array([DIRECTION_CODES.get(row["lastDirection"], OTHER_CODE) for row in rows],
+                                  dtype=np.int8),
+    }
+    for name in SKETCH_FIELDS:
+        frame[name] = sketch(name)
+    return frame
+
+
+def rows_from_frame(frame):
+    """Volta para o formato de compute_rollups ({(date, hour, groupId): row})."""
+    rows = {}
+    keys = []
+    for i in range(len(frame["hour"])):
+        hour = int(frame["hour"][i])
+        key = (day_of_hour(hour).isoformat(), f"{hour % 24:02d}", frame["groups"][frame["group"][i]])
+        rt_min, rt_max = frame["rtMinSec"][i], frame["rtMaxSec"][i]
+        rows[key] = {
+            "date": key[0], "hour": key[1], "groupId": key[2],
+            "messages": int(frame["messages"][i]),
+            "clientMessages": int(frame["clientMessages"][i]),
+            "teamMessages": int(frame["teamMessages"][i]),
+            "rtSum": round(int(frame["rtSumSec"][i]) / 60, 4),
+            "rtCount": int(frame["rtCount"][i]),
+            "rtLastSum": round(int(frame["rtLastSumSec"][i]) / 60, 4),
+            "rtLastCount": int(frame["rtLastCount"][i]),
+            "rtMin": None if np.isnan(rt_min) else round(rt_min / 60, 4),
+            "rtMax": None if np.isnan(rt_max) else round(rt_max / 60, 4),
+            "lastDirection": DIRECTION_NAMES.get(int(frame["lastDirection"][i])),
+        }
+        keys.append(key)
+        for name in SKETCH_FIELDS:
+            rows[key][name] = {}
+    for name in SKETCH_FIELDS:
+        for i, b, c in zip(*frame[name]):
+            rows[keys[i]][name][int(b)] = int(c)
+    return rows
+
+
+# ==============================
+# 📊 Agregações
+# ==============================
+
+def select(frame, mask):
+    """Linhas do frame onde mask (booleano) é verdadeiro; sketches reindexados."""
+    selected = {name: values[mask] for name, values in frame.items()
+                if name != "groups" and name not in SKETCH_FIELDS}
+    selected["groups"] = frame["groups"]
+    position = np.cumsum(mask) - 1
+    for name in SKETCH_FIELDS:
+        row, bins, counts = frame[name]
+        keep = mask[row]
+        selected[name] = position[row[keep]], bins[keep], counts[keep]
+    return selected
+
+
+def hour_range(frame, first_hour, hours):
+    """Linhas com hour em [first_hour, first_hour + hours)."""
+    return select(frame, (frame["hour"] >= first_hour) & (frame["hour"] < first_hour + hours))
+
+
+@lru_cache(maxsize=None)
+def _offset_arrays(name):
+    starts, offsets = offset_table(name)
+    return np.array(starts[1:], dtype=np.int64), np.array(offsets, dtype=np.int64)
+
+
+def local_hours(hours, name=None):
+    """Hora local (epoch local em horas) de cada hora UTC do array.
+
+    Em fusos com offset fracionário (ex.: +05:30) a hora UTC vai inteira para a
+    hora local em que começa.
+    """
+    starts, offsets = _offset_arrays(name or timezone_name())
+    offset = offsets[np.searchsorted(starts, hours * HOUR, side="right")]
+    return (hours * HOUR + offset) // HOUR
+
+
+def local_window(frame, first_day, days, name=None):
+    """Linhas nos dias locais [first_day, first_day + days) e a hora local de cada uma
+    relativa à meia-noite de first_day (0 .. days * 24 - 1)."""
+    local = local_hours(frame["hour"], name) - epoch_hour(first_day)
+    inside = (local >= 0) & (local < days * 24)
+    return select(frame, inside), local[inside]
+
+
+def group_mask(frame, group_id):
+    if group_id not in frame["groups"]:
+        return np.zeros(len(frame["hour"]), dtype=bool)
+    return frame["group"] == frame["groups"].index(group_id)
+
+
+def sum_by(frame, bucket, size, fields=("messages", "rtSumSec", "rtCount")):
+    """Soma de cada campo por bucket (array de 0..size-1, um por linha do frame)."""
+    totals = {name: np.bincount(bucket, weights=frame[name], minlength=size).astype(np.int64) for name in fields}
+    totals["rows"] = np.bincount(bucket, minlength=size)
+    return totals
+
+
+def average_minutes(seconds_sum, count):
+    return round(int(seconds_sum) / int(count) / 60, 2) if count else 0
+
+
+def sketches_by(frame, bucket, size, name="rtSketch"):
+    """Sketch ({balde: contagem}, common.sketch) somado por bucket: lista de size dicts."""
+    row, bins, counts = frame[name]
+    dense = np.bincount(bucket[row] * BUCKETS + bins, weights=counts, minlength=size * BUCKETS).astype(np.int64)
+    result = [{} for _ in range(size)]
+    for key in np.flatnonzero(dense):
+        result[key // BUCKETS][int(key % BUCKETS)] = int(dense[key])
+    return result
+
+
+def percentiles_by(frame, bucket, size, name="rtSketch"):
+    """p50/p90/p99 (minutos, 0 sem amostras) dos sketches somados por bucket.
+
+    Lista de size dicts, com o mesmo resultado de common.sketch.percentiles.
+    """
+    row, bins, counts = frame[name]
+    dense = np.bincount(bucket[row] * BUCKETS + bins, weights=counts, minlength=size * BUCKETS)
+    cumulative = np.cumsum(dense.reshape(size, BUCKETS), axis=1)
+    total = cumulative[:, -1]
+    result = [{} for _ in range(size)]
+    for label, q in QUANTILES:
+        rank = np.floor(q * (total - 1))
+        index = np.minimum((cumulative <= rank[:, None]).sum(axis=1), BUCKETS - 1)
+        for i, value in enumerate(_BUCKET_VALUES[index]):
+            result[i][label] = round(float(value) / 60, 2) if total[i] else 0
+    return result
+
+
+def last_per_group(frame):
+    """Código da direção da última mensagem de cada grupo com mensagens no frame."""
+    _, group, direction = last_by(frame, np.zeros(len(frame["hour"]), dtype=np.int64))
+    return group, direction
+
+
+def last_by(frame, bucket):
+    """(bucket, grupo, código da direção) da última mensagem de cada (bucket, grupo) com mensagens."""
+    active = frame["messages"] > 0
+    hour, group, direction = frame["hour"][active], frame["group"][active], frame["lastDirection"][active]
+    bucket = bucket[active]
+    order = np.lexsort((hour, group, bucket))
+    bucket, group, direction = bucket[order], group[order], direction[order]
+    if not len(group):
+        return bucket, group, direction
+    is_last = np.append((group[1:] != group[:-1]) | (bucket[1:] != bucket[:-1]), True)
+    return bucket[is_last], group[is_last], direction[is_last]
@@ -0,0 +1,144 @@
+import functools
+import hashlib
+import json
+import os
+
+from common.messages import day_buckets, iter_pages
+from common.timezones import timezone_name
+
+# ==============================
+# 🏷️ Requisições condicionais (ETag / If-None-Match → 304)
+# Versão dos dados por dia UTC (marca d'água) em crm-metricas:
+#   date = "watermark", metricType = YYYY-MM-DD
+#   changes (ADD, mensagens inseridas no dia), lastTimestamp (última do lote)
+# mantida pelo stream de crm-mensagens (rollups/app.py). A ETag de uma
+# resposta = hash do endpoint + parâmetros + fuso/flags + marcas d'água dos
+# dias da janela + o que mais mudar a resposta sem mensagem nova (ex.: o
+# minuto, em alerts). Se bater com If-None-Match, 304 com um único query
+# (uma partição, intervalo de dias) e sem agregar nada.
+# ==============================
+
+WATERMARK_DATE = "watermark"
+
+# Flags que mudam a resposta (modo de leitura) entram na versão
+VERSION_FLAGS = ("ROLLUPS_ENABLED", "GROUP_STATE_ENABLED")
+
+
+def conditional_enabled():
+    return os.environ.get("CONDITIONAL_REQUESTS_ENABLED", "true").lower() == "true"
+
+
+# ==============================
+# 📥 Marca d'água (stream)
+# ==============================
+
+def bump_watermarks(metrics_table, items):
+    """Soma as mensagens de um lote do stream na marca d'água de cada dia UTC."""
+    days = {}
+    for item in items:
+        ts = item["timestamp"]
+        count, last = days.get(ts[:10], (0, ts))
+        days[ts[:10]] = (count + 1, max(last, ts))
+    for day, (count, last) in days.items():
+        metrics_table.update_item(
+            Key={"date": WATERMARK_DATE, "metricType": day},
+            UpdateExpression="ADD #c :c SET #t = :t",
+            ExpressionAttributeNames={"#c": "changes", "#t": "lastTimestamp"},
+            ExpressionAttributeValues={":c": count, ":t": last},
+        )
+    return len(days)
+
+
+def load_watermarks(metrics_table, start, end):
+    """(dia, changes, lastTimestamp) dos dias UTC que cobrem [start, end), em um query."""
+    from boto3.dynamodb.conditions import Key
+
+    days = day_buckets(start, end)
+    if not days:
+        return []
+    pages = iter_pages(
+        metrics_table.query,
+        KeyConditionExpression=Key("date").eq(WATERMARK_DATE) & Key("metricType").between(days[0], days[-1]),
+    )
+    return [
+        (item["metricType"], int(item.get("changes", 0)), item.get("lastTimestamp"))
+        for page in pages for item in page
+    ]
+
+
+# ==============================
+# 🔖 ETag
+# ==============================
+
+def make_etag(endpoint, query, params, watermarks, extra=None):
+    values = {name: (query or {}).get(name) for name in params}
+    flags = {name: os.environ.get(name, "false").lower() for name in VERSION_FLAGS}
+    raw = json.dumps([endpoint, values, timezone_name(), flags, extra, watermarks],
+                     sort_keys=True, separators=(",", ":"), default=str)
+    # Fraca: mesma representação, não necessariamente os mesmos bytes (gzip)
+    return 'W/"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def request_params(event):
+    """Parâmetros de query + de caminho (ex.: groupId em /groups/{groupId}/stats)."""
+    return dict(event.get("queryStringParameters") or {}, **(event.get("pathParameters") or {}))
+
+
+def request_header(event, name):
+    name = name.lower()
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def etag_matches(event, etag):
+    header = request_header(event, "If-None-Match")
+    if not header or not etag:
+        return False
+    # Comparação fraca: ignora W/ dos dois lados; "*" casa com qualquer versão
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def not_modified(etag, headers):
+    return {
+        "statusCode": 304,
+        "headers": dict(headers, **{"ETag": etag, "Cache-Control": "no-cache"}),
+        "body": "",
+    }
+
+
+def conditional_endpoint(endpoint, params, scope, table, headers):
+    """Decorator do lambda_handler: ETag nas respostas 200 e 304 se If-None-Match bater.
+
+    scope(query) → (início, fim, extra): janela de mensagens da resposta e o que
+    mais a muda sem mensagem nova; None (ou ValueError) pula a versão (ex.: 400).
+    table() → tabela de métricas (o handler troca a dele nos testes).
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            if not conditional_enabled():
+                return handler(event, context)
+            query = request_params(event)
+            try:
+                window = scope(query)
+            except ValueError:
+                window = None
+            if window is None:
+                return handler(event, context)
+
+            start, end, extra = window
+            etag = make_etag(endpoint, query, params, load_watermarks(table(), start, end), extra)
+            if etag_matches(event, etag):
+                print(f"🏷️ {endpoint} 304 {etag}")
+                return not_modified(etag, headers)
+
+            response = handler(event, context)
+            if response.get("statusCode") == 200:
+                response["headers"] = dict(response.get("headers") or {}, **{"ETag": etag,
+                                                                              "Cache-Control": "no-cache"})
+            return response
+        return wrapper
+    return decorator
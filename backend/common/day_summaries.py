@@ -0,0 +1,247 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from botocore.exceptions import ClientError
+
+from common import sketch
+from common.messages import RESPONSE_LOOKAHEAD, iter_pages
+from common.records import epoch_seconds
+from common.timezones import day_label, day_range, day_start, local_day, timezone_name
+
+# ==============================
+# 🗓️ Resumos imutáveis de dias, semanas e meses fechados (/activity/weekly)
+# Um dia local fecha quando acaba a janela de resposta dele (fim do dia +
+# RESPONSE_LOOKAHEAD): mensagens novas não mudam mais os totais. Semana ISO
+# e mês fecham com o último dia. O resumo (common.payloads.day_totals, somado
+# para semana/mês) é gravado em crm-metricas na primeira leitura:
+#   date = "<nível>#<formato>#<fuso>#<groupId ou *>"
+#   metricType = YYYY-MM-DD | YYYY-Www | YYYY-MM (local)
+#   rows, messages, rtSumSec, rtCount, rtq_<balde> (sketch), version
+# Atrasadas: o stream soma, por dia local, as mensagens que chegam depois do
+# dia fechado:
+#   date = "late#<fuso>", metricType = YYYY-MM-DD, changes (ADD)
+# version = soma de changes dos dias do resumo; diferente → recalculado.
+# Um intervalo é coberto pelos buckets mais grossos que cabem nele (plan_range):
+# meses inteiros, semanas inteiras e dias nas bordas. Qualquer tamanho custa
+# poucos queries (um por nível e borda) + os dias abertos.
+# ==============================
+
+LATE_PREFIX = "late#"
+# Muda quando o conteúdo do resumo mudar: resumos antigos deixam de ser lidos
+SUMMARY_FORMAT = 1
+
+TOTAL_FIELDS = ("rows", "messages", "rtSumSec", "rtCount")
+
+DAY, WEEK, MONTH = "day", "week", "month"
+GRANULARITIES = (DAY, WEEK, MONTH)
+# Níveis que cobrem cada granularidade, do mais grosso ao dia
+PLAN_LEVELS = {DAY: (DAY,), WEEK: (WEEK, DAY), MONTH: (MONTH, WEEK, DAY)}
+
+
+def summaries_enabled():
+    return os.environ.get("DAY_SUMMARIES_ENABLED", "true").lower() == "true"
+
+
+def summary_partition(group_id=None, level=DAY, name=None):
+    return f"{level}#{SUMMARY_FORMAT}#{name or timezone_name()}#{group_id or '*'}"
+
+
+def late_partition(name=None):
+    return f"{LATE_PREFIX}{name or timezone_name()}"
+
+
+def bucket_key(level, day):
+    if level == WEEK:
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if level == MONTH:
+        return day.strftime("%Y-%m")
+    return day.isoformat()
+
+
+def bucket_bounds(level, day):
+    """(primeiro, último dia) do bucket do nível que contém day."""
+    if level == WEEK:
+        first = day - timedelta(days=day.weekday())
+        return first, first + timedelta(days=6)
+    if level == MONTH:
+        first = day.replace(day=1)
+        return first, (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return day, day
+
+
+def merge_totals(parts):
+    totals = {name: sum(part[name] for part in parts) for name in TOTAL_FIELDS}
+    totals["rtSketch"] = {}
+    for part in parts:
+        sketch.merge(totals["rtSketch"], part["rtSketch"])
+    return totals
+
+
+def group_buckets(segments, granularity):
+    """Segmentos (nível, chave, primeiro, último, totais) somados por bucket da granularidade.
+
+    Retorna [(chave, primeiro, último dia, totais)], em ordem.
+    """
+    buckets = []
+    for _, _, first, last, totals in segments:
+        key = bucket_key(granularity, first)
+        if buckets and buckets[-1][0] == key:
+            buckets[-1][2], buckets[-1][3] = last, merge_totals([buckets[-1][3], totals])
+        else:
+            buckets.append([key, first, last, totals])
+    return [tuple(bucket) for bucket in buckets]
+
+
+def is_closed(day, now, name=None):
+    """Se a janela do dia local (até fim do dia + RESPONSE_LOOKAHEAD) já passou."""
+    return now >= day_range(day, day, name)[1] + RESPONSE_LOOKAHEAD
+
+
+# ==============================
+# 📥 Atrasadas (stream)
+# ==============================
+
+def late_days(items, now, name=None):
+    """{YYYY-MM-DD: mensagens} dos dias locais já fechados cuja janela as mensagens tocam."""
+    now_epoch = int(now.timestamp())
+    lookahead = int(RESPONSE_LOOKAHEAD.total_seconds())
+    days = {}
+    for item in items:
+        epoch = epoch_seconds(item["timestamp"])
+        # O dia da mensagem e, se ela cair na janela de resposta dele, o anterior
+        for day in range(local_day(epoch - lookahead, name), local_day(epoch, name) + 1):
+            if now_epoch >= day_start(day + 1, name) + lookahead:
+                days[day_label(day)] = days.get(day_label(day), 0) + 1
+    return days
+
+
+def bump_late_days(metrics_table, items, now=None):
+    """Soma as mensagens atrasadas de um lote do stream no contador de cada dia fechado."""
+    days = late_days(items, now or datetime.now(timezone.utc))
+    for day, count in days.items():
+        metrics_table.update_item(
+            Key={"date": late_partition(), "metricType": day},
+            UpdateExpression="ADD #c :c",
+            ExpressionAttributeNames={"#c": "changes"},
+            ExpressionAttributeValues={":c": count},
+        )
+    return len(days)
+
+
+# ==============================
+# 📤 Resumos
+# ==============================
+
+def _query_days(metrics_table, partition, first_key, last_key):
+    from boto3.dynamodb.conditions import Key
+
+    pages = iter_pages(
+        metrics_table.query,
+        KeyConditionExpression=Key("date").eq(partition) & Key("metricType").between(first_key, last_key),
+    )
+    return {item["metricType"]: item for page in pages for item in page}
+
+
+def summary_from_item(item):
+    totals = {name: int(item.get(name, 0)) for name in TOTAL_FIELDS}
+    totals["rtSketch"] = sketch.from_attributes("rtSketch", item)
+    return totals
+
+
+def item_from_summary(partition, key, totals, version):
+    item = {"date": partition, "metricType": key, "version": version}
+    item.update({name: totals[name] for name in TOTAL_FIELDS})
+    item.update(sketch.to_attributes("rtSketch", totals["rtSketch"]))
+    return item
+
+
+def plan_range(first_day, last_day, now, granularity=DAY):
+    """Segmentos (nível, chave, primeiro, último dia) que cobrem [first_day, last_day].
+
+    Semana/mês só inteiros, fechados e dentro de um bucket da granularidade
+    (semana ISO que atravessa o mês não entra em granularity=month); o resto em dias.
+    """
+    segments = []
+    day = first_day
+    while day <= last_day:
+        for level in PLAN_LEVELS[granularity]:
+            first, last = bucket_bounds(level, day)
+            if level == DAY or (first == day and last <= last_day and is_closed(last, now)
+                                and bucket_key(granularity, first) == bucket_key(granularity, last)):
+                break
+        segments.append((level, bucket_key(level, day), day, last))
+        day = last + timedelta(days=1)
+    return segments
+
+
+def _runs(segments):
+    # Segmentos consecutivos do mesmo nível → um query por sequência
+    runs = []
+    for segment in segments:
+        if runs and segment[2] - runs[-1][-1][3] == timedelta(days=1):
+            runs[-1].append(segment)
+        else:
+            runs.append([segment])
+    return runs
+
+
+def _version(late, first, last):
+    first, last = first.isoformat(), last.isoformat()
+    return sum(count for day, count in late.items() if first <= day <= last)
+
+
+def load_range_totals(metrics_table, first_day, last_day, now, compute, group_id=None, granularity=DAY):
+    """Totais de cada segmento de plan_range: [(nível, chave, primeiro, último dia, totais)].
+
+    Fechados vêm dos resumos gravados (se a versão bate com as atrasadas). Dias
+    faltando saem de compute(primeiro, último) → frame, uma chamada por
+    sequência; semanas/meses faltando somam os dias. Os fechados calculados são gravados
+    (de um groupId, só se ele tiver mensagens no que foi calculado).
+    """
+    from common.payloads import day_totals
+
+    segments = plan_range(first_day, last_day, now, granularity)
+    closed = [segment for segment in segments if is_closed(segment[3], now)]
+
+    late, totals = {}, {}
+    if closed:
+        items = _query_days(metrics_table, late_partition(), closed[0][2].isoformat(), closed[-1][3].isoformat())
+        late = {day: int(item.get("changes", 0)) for day, item in items.items()}
+    for level in PLAN_LEVELS[granularity]:
+        for run in _runs([segment for segment in closed if segment[0] == level]):
+            stored = _query_days(metrics_table, summary_partition(group_id, level), run[0][1], run[-1][1])
+            for segment in run:
+                item = stored.get(segment[1])
+                if item is not None and int(item.get("version", -1)) == _version(late, segment[2], segment[3]):
+                    totals[segment] = summary_from_item(item)
+
+    missing = [segment for segment in segments if segment not in totals]
+    for run in _runs([segment for segment in missing if segment[0] == DAY]):
+        first, last = run[0][2], run[-1][3]
+        for segment, day_total in zip(run, day_totals(compute(first, last), first, len(run))):
+            totals[segment] = day_total
+    for segment in missing:
+        if segment[0] != DAY:
+            days = load_range_totals(metrics_table, segment[2], segment[3], now, compute, group_id)
+            totals[segment] = merge_totals([day[-1] for day in days])
+
+    fresh = [item_from_summary(summary_partition(group_id, level), key, totals[(level, key, first, last)],
+                               _version(late, first, last))
+             for level, key, first, last in missing if is_closed(last, now)]
+    if group_id and not any(totals[segment]["rows"] for segment in missing):
+        # groupId sem nenhuma mensagem no período (inexistente?): não cria partição de resumos
+        fresh = []
+    if fresh:
+        # Resumo é cache: falhar ao gravar não derruba a leitura
+        try:
+            with metrics_table.batch_writer() as batch:
+                for item in fresh:
+                    batch.put_item(Item=item)
+        except ClientError as exc:
+            print(f"⚠️ resumos não gravados: {exc}")
+            fresh = []
+    if segments:
+        print(f"🗓️ {len(segments)} segmentos: {len(segments) - len(missing)} resumos, "
+              f"{len(missing)} calculados, {len(fresh)} gravados")
+    return [segment + (totals[segment],) for segment in segments]
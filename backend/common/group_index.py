@@ -0,0 +1,205 @@
+import heapq
+import itertools
+from datetime import timedelta, timezone
+
+from common.group_state import STATE_FIELDS, state_from_item
+from common.groups import name_key
+from common.pagination import decode_cursor, encode_cursor
+from common.payloads import IDLE_MINUTES, MIN_WAIT_MINUTES, group_status
+
+# ==============================
+# 🗂️ Listagem paginada de grupos (GET /groups) pelos índices de crm-groupId
+# O item de cada grupo guarda, junto com o estado da conversa, a partição
+# status (group_state.stored_status), que só muda com mensagem nova:
+#   waiting = última mensagem do cliente e relevante
+#   client  = última mensagem do cliente e irrelevante
+#   team    = última mensagem do time
+# GSIs, um por sortBy, todos com partição status:
+#   status-lastActivity-index, status-messageCount-index, status-nameKey-index
+# Projeção INCLUDE só com INDEX_FIELDS: o que state_from_item e a ordenação
+# usam (stateVersion e o ponteiro do stream não vão para os índices).
+# O status da API também depende do relógio (mensagem irrelevante deixa de
+# ser waiting depois de MIN_WAIT_MINUTES; sem mensagens há IDLE_MINUTES o
+# grupo fica idle), então cada status é a união de até duas faixas
+# (partição + intervalo de lastActivity). Cada faixa é lida em ordem, só o
+# necessário para a página, e as faixas são intercaladas (heapq.merge).
+# O cursor guarda a chave (valor do sortBy, groupId) do último grupo entregue
+# e o sortBy que a gerou (cursor de outra ordenação é rejeitado).
+# ==============================
+
+STATUSES = ("waiting", "active", "idle")
+PARTITIONS = ("waiting", "client", "team")
+
+# sortBy → (índice, atributo de ordenação, decrescente)
+SORTS = {
+    "lastActivity": ("status-lastActivity-index", "lastActivity", True),
+    "messageCount": ("status-messageCount-index", "messageCount", True),
+    "name": ("status-nameKey-index", "nameKey", False),
+}
+DEFAULT_SORT = "lastActivity"
+
+# Atributos não chave projetados nos índices
+INDEX_FIELDS = ("groupName", "nameKey") + STATE_FIELDS
+
+
+def format_cutoff(dt):
+    # Mesmo formato dos timestamps gravados, para comparar como string
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def lanes(status, now):
+    """[(partição, condição em lastActivity ou None)] cuja união é o status no instante now.
+
+    A condição recebe Key ou Attr (boto3.dynamodb.conditions): vira condição de
+    chave no índice por lastActivity e FilterExpression nos demais.
+    """
+    recent = format_cutoff(now - timedelta(minutes=MIN_WAIT_MINUTES))
+    idle = format_cutoff(now - timedelta(minutes=IDLE_MINUTES))
+    if status is None:
+        return [(partition, None) for partition in PARTITIONS]
+    return {
+        "waiting": [("waiting", None),
+                    ("client", lambda c: c("lastActivity").gt(recent))],
+        "active": [("team", lambda c: c("lastActivity").gte(idle)),
+                   ("client", lambda c: c("lastActivity").between(idle, recent))],
+        "idle": [("team", lambda c: c("lastActivity").lt(idle)),
+                 ("client", lambda c: c("lastActivity").lt(idle))],
+    }[status]
+
+
+def sort_value(item, attribute):
+    if attribute == "nameKey":
+        return item.get("nameKey") or name_key(item.get("groupName"), item["groupId"])
+    value = item[attribute]
+    return int(value) if attribute == "messageCount" else value
+
+
+def _valid_key(after, attribute):
+    # (valor do sortBy, groupId): int para messageCount, str nos demais
+    if not isinstance(after, list) or len(after) != 2:
+        return False
+    value, group_id = after
+    if attribute == "messageCount":
+        value_ok = isinstance(value, int) and not isinstance(value, bool)
+    else:
+        value_ok = isinstance(value, str)
+    return value_ok and isinstance(group_id, str)
+
+
+def parse_cursor(cursor, page, sort_by=DEFAULT_SORT):
+    """(chave depois da qual a página começa ou None, número da página); ValueError se inválido.
+
+    O cursor só vale para o sortBy que o gerou.
+    """
+    if not cursor:
+        return None, page
+    state = decode_cursor(cursor)
+    try:
+        after, page, cursor_sort = state["k"], int(state["p"]) + 1, state["s"]
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError("cursor inválido") from exc
+    if cursor_sort != sort_by:
+        raise ValueError(f"cursor gerado para sortBy={cursor_sort}, não {sort_by}")
+    if not _valid_key(after, SORTS[sort_by][1]):
+        raise ValueError("cursor inválido")
+    return tuple(after), page
+
+
+def take_page(ordered, limit, page, after, sort_by):
+    """Página de itens (já em ordem, depois do cursor) → (itens, página, próximo cursor)."""
+    attribute = SORTS[sort_by][1]
+    skip = 0 if after is not None else (page - 1) * limit
+    chunk = list(itertools.islice(ordered, skip, skip + limit + 1))
+    next_cursor = None
+    if len(chunk) > limit:
+        chunk = chunk[:limit]
+        last = chunk[-1]
+        next_cursor = encode_cursor({"k": [sort_value(last, attribute), last["groupId"]], "p": page,
+                                     "s": sort_by})
+    return chunk, page, next_cursor
+
+
+# ==============================
+# 📥 Pelos índices (estado por grupo ligado)
+# ==============================
+
+def _lane_items(groups_table, index, attribute, descending, partition, condition, after, page_size):
+    from boto3.dynamodb.conditions import Attr, Key
+
+    key = Key("status").eq(partition)
+    kwargs = {"IndexName": index, "ScanIndexForward": not descending, "Limit": page_size}
+    if condition is not None:
+        if attribute == "lastActivity":
+            key = key & condition(Key)
+        else:
+            kwargs["FilterExpression"] = condition(Attr)
+    if after is not None:
+        # Posição (não precisa existir): continua a faixa depois do último grupo entregue
+        kwargs["ExclusiveStartKey"] = {"status": partition, attribute: after[0], "groupId": after[1]}
+    while True:
+        response = groups_table.query(KeyConditionExpression=key, **kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def query_groups(groups_table, now, status=None, sort_by=DEFAULT_SORT, limit=20, page=1, cursor=None):
+    """Página de GET /groups lida dos índices → (estados, página, próximo cursor)."""
+    index, attribute, descending = SORTS[sort_by]
+    after, page = parse_cursor(cursor, page, sort_by)
+    # Sem cursor, page > 1 precisa passar pelas páginas anteriores
+    page_size = limit + 1 if after is not None else page * limit + 1
+    streams = [
+        _lane_items(groups_table, index, attribute, descending, partition, condition, after, page_size)
+        for partition, condition in lanes(status, now)
+    ]
+    ordered = heapq.merge(*streams, key=lambda item: (sort_value(item, attribute), item["groupId"]),
+                          reverse=descending)
+    items, page, next_cursor = take_page(ordered, limit, page, after, sort_by)
+    return [state_from_item(item) for item in items], page, next_cursor
+
+
+def count_groups(groups_table, now, status=None):
+    """Total de grupos no status (Select COUNT nas faixas: lê a partição inteira)."""
+    from boto3.dynamodb.conditions import Key
+
+    index = SORTS["lastActivity"][0]
+    total = 0
+    for partition, condition in lanes(status, now):
+        key = Key("status").eq(partition)
+        if condition is not None:
+            key = key & condition(Key)
+        kwargs = {"IndexName": index, "KeyConditionExpression": key, "Select": "COUNT"}
+        while True:
+            response = groups_table.query(**kwargs)
+            total += response["Count"]
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return total
+
+
+# ==============================
+# 🧮 Em memória (estado reconstruído das mensagens)
+# ==============================
+
+def list_groups(states, names, now, status=None, sort_by=DEFAULT_SORT, limit=20, page=1, cursor=None):
+    """Mesma página de query_groups a partir de estados já carregados → (estados, página, cursor, total)."""
+    _, attribute, descending = SORTS[sort_by]
+    after, page = parse_cursor(cursor, page, sort_by)
+    rows = []
+    for state in states:
+        if status is not None and group_status(state, now) != status:
+            continue
+        rows.append(dict(state, nameKey=name_key(names.get(state["groupId"]), state["groupId"])))
+
+    def key(row):
+        return sort_value(row, attribute), row["groupId"]
+
+    rows.sort(key=key, reverse=descending)
+    total = len(rows)
+    if after is not None:
+        rows = [row for row in rows if (key(row) < after if descending else key(row) > after)]
+    items, page, next_cursor = take_page(iter(rows), limit, page, after, sort_by)
+    return items, page, next_cursor, total
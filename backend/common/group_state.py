@@ -0,0 +1,291 @@
+import os
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+from common import stream
+from common.messages import iter_scan
+from common.pairing import MAX_RESPONSE_MINUTES
+from common.records import CLIENT, TEAM, epoch_seconds, to_records
+from common.groups import name_key
+from common.relevance import is_irrelevant_message
+from common.timezones import local_date_str
+
+# ==============================
+# 👥 Estado da conversa por grupo (atributos no item de crm-groupId)
+#   messageCount, lastActivity/lastDirection, waiting,
+#   lastClient / lastRelevantClient ({id, timestamp, text, name}), lastTeam,
+#   lastDay/lastDayMessages (mensagens no dia local da última atividade),
+#   rtSum/rtCount (tempo de resposta, última mensagem do cliente → time)
+# Atualizado pelo stream de crm-mensagens (groupState/app.py); alerts e
+# groupsOverview leem só a tabela de grupos.
+# Junto com o estado vão as chaves dos índices de GET /groups (common.group_index):
+#   status (stored_status) e nameKey (nome sem caixa; o webhook atualiza com o nome)
+# e, entre a escrita e os marcadores do lote, o ponteiro applying
+# (common.stream): uma reentrega do lote não soma de novo em
+# messageCount/lastDayMessages/rtSum/rtCount.
+# ==============================
+
+STREAM_CONSUMER = "groupState"
+
+STATE_FIELDS = (
+    "messageCount", "lastActivity", "lastDirection", "waiting", "lastClient",
+    "lastRelevantClient", "lastTeam", "lastDay", "lastDayMessages", "rtSum", "rtCount",
+)
+
+
+def group_state_enabled():
+    # Só liga depois do replay (parâmetro GroupStateEnabled no template)
+    return os.environ.get("GROUP_STATE_ENABLED", "false").lower() == "true"
+
+
+def new_state(group_id):
+    return {
+        "groupId": group_id, "messageCount": 0, "lastActivity": None, "lastDirection": None,
+        "waiting": False, "lastClient": None, "lastRelevantClient": None, "lastTeam": None,
+        "lastDay": None, "lastDayMessages": 0, "rtSum": 0, "rtCount": 0,
+    }
+
+
+def client_info(record):
+    text = record.text
+    return {
+        "id": record.message_id,
+        "timestamp": record.timestamp,
+        "text": text,
+        "name": record.sender.get("name"),
+        "relevant": not is_irrelevant_message(text),
+    }
+
+
+def _newer(ts, current):
+    return current is None or ts > current
+
+
+def fold(state, record):
+    """Aplica uma mensagem (MessageRecord) ao estado do grupo (tolera mensagens fora de ordem)."""
+    ts = record.timestamp
+    direction = record.direction
+    state["messageCount"] += 1
+
+    day = local_date_str(record.epoch)
+    if _newer(day, state["lastDay"]):
+        state["lastDay"] = day
+        state["lastDayMessages"] = 1
+    elif day == state["lastDay"]:
+        state["lastDayMessages"] += 1
+
+    last_client = state["lastClient"]
+    if direction is CLIENT:
+        if last_client is None or _newer(ts, last_client["timestamp"]):
+            info = client_info(record)
+            state["lastClient"] = info
+            relevant = state["lastRelevantClient"]
+            if info["relevant"] and (relevant is None or _newer(ts, relevant["timestamp"])):
+                state["lastRelevantClient"] = {k: v for k, v in info.items() if k != "relevant"}
+    elif direction is TEAM:
+        # Primeira resposta depois da última mensagem do cliente
+        if last_client and _newer(last_client["timestamp"], state["lastTeam"]) and ts > last_client["timestamp"]:
+            delta_min = (record.epoch - epoch_seconds(last_client["timestamp"])) / 60
+            if 0 < delta_min < MAX_RESPONSE_MINUTES:
+                state["rtSum"] += delta_min
+                state["rtCount"] += 1
+        if _newer(ts, state["lastTeam"]):
+            state["lastTeam"] = ts
+
+    if _newer(ts, state["lastActivity"]):
+        state["lastActivity"] = ts
+        state["lastDirection"] = direction
+    state["waiting"] = state["lastDirection"] == "client"
+    return state
+
+
+def stored_status(state):
+    """Partição do grupo nos índices: só muda com mensagem nova (o relógio fica na consulta)."""
+    if state["lastDirection"] != CLIENT:
+        return "team"
+    return "waiting" if state["lastClient"]["relevant"] else "client"
+
+
+def build_states(records):
+    """Replay: estado de cada grupo a partir das mensagens (MessageRecord) ordenadas por timestamp."""
+    states = {}
+    for record in records:
+        group_id = record.group_id
+        if group_id not in states:
+            states[group_id] = new_state(group_id)
+        fold(states[group_id], record)
+    return states
+
+
+# ==============================
+# 📥 Leitura
+# ==============================
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    return value
+
+
+def state_from_item(item):
+    state = new_state(item["groupId"])
+    for name in STATE_FIELDS:
+        if name in item:
+            state[name] = _plain(item[name])
+    if "groupName" in item:
+        state["groupName"] = item["groupName"]
+    return state
+
+
+def load_states(groups_table):
+    """Estado de todos os grupos com mensagens: uma leitura paginada de crm-groupId."""
+    from boto3.dynamodb.conditions import Attr
+
+    # Só o que vira estado (sem stateVersion/applying do stream)
+    return [
+        state_from_item(item)
+        for item in iter_scan(groups_table, fields=("groupId", "groupName") + STATE_FIELDS,
+                              FilterExpression=Attr("messageCount").gt(0))
+    ]
+
+
+# ==============================
+# 📤 Escrita
+# ==============================
+
+def _dynamo(value):
+    if isinstance(value, float):
+        return Decimal(str(round(value, 4)))
+    if isinstance(value, dict):
+        return {k: _dynamo(v) for k, v in value.items()}
+    return value
+
+
+def write_state(groups_table, state, version=None, replace=False, applying=None):
+    # replace=True sobrescreve sem checar a versão (replay)
+    from boto3.dynamodb.conditions import Attr
+
+    names = {"#v": "stateVersion", "#st": "status", "#nk": "nameKey", "#ap": "applied"}
+    values = {":v": int(version or 0) + 1, ":st": stored_status(state),
+              ":nk": name_key(state.get("groupName"), state["groupId"])}
+    sets = ["#v = :v", "#st = :st", "#nk = if_not_exists(#nk, :nk)"]
+    for i, name in enumerate(STATE_FIELDS):
+        names[f"#s{i}"] = name
+        values[f":s{i}"] = _dynamo(state[name])
+        sets.append(f"#s{i} = :s{i}")
+    if applying is not None:
+        names["#ag"], values[":ag"] = "applying", applying
+        sets.append("#ag = :ag")
+    kwargs = {}
+    if not replace:
+        kwargs["ConditionExpression"] = (
+            Attr("stateVersion").not_exists() if version is None else Attr("stateVersion").eq(version)
+        )
+    # applied: mapa de messageIds das versões anteriores, removido dos itens antigos
+    groups_table.update_item(
+        Key={"groupId": state["groupId"]},
+        UpdateExpression="SET " + ", ".join(sets) + " REMOVE #ap",
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+        **kwargs,
+    )
+
+
+def write_states(groups_table, states):
+    for state in states.values():
+        write_state(groups_table, state, replace=True)
+
+
+def _finish_batch(groups_table, dynamodb, group_id, version, token, now):
+    # Estado já gravado com o lote `token`: marca as mensagens dele e tira o ponteiro
+    from boto3.dynamodb.conditions import Attr
+
+    batch = stream.load_batch(dynamodb, STREAM_CONSUMER, token)
+    if batch is None:
+        print(f"⚠️ Lote {token} do grupo {group_id} expirou antes dos marcadores")
+    else:
+        stream.write_markers(dynamodb, STREAM_CONSUMER, batch["messageIds"], now)
+    try:
+        groups_table.update_item(
+            Key={"groupId": group_id},
+            UpdateExpression="REMOVE #ag",
+            ConditionExpression=Attr("stateVersion").eq(version),
+            ExpressionAttributeNames={"#ag": "applying"},
+        )
+    except ClientError as exc:
+        # Outro shard já gravou uma versão nova (e terminou este lote antes)
+        if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
+def _load_state_item(groups_table, dynamodb, group_id, now):
+    # Item do grupo com o lote anterior (se houver) já marcado
+    item = groups_table.get_item(Key={"groupId": group_id}, ConsistentRead=True).get("Item")
+    if item and item.get("applying"):
+        _finish_batch(groups_table, dynamodb, group_id, item["stateVersion"], item["applying"], now)
+    return item
+
+
+def _apply_group(groups_table, dynamodb, group_id, records, max_attempts, now):
+    item = _load_state_item(groups_table, dynamodb, group_id, now)
+    fresh = stream.fresh_records(records, stream.applied_ids(dynamodb, STREAM_CONSUMER, records))
+    if not fresh:
+        return False
+    token = stream.save_batch(dynamodb, STREAM_CONSUMER, group_id, fresh, now)
+    # Bloqueio otimista: outro shard pode ter atualizado o mesmo grupo
+    for attempt in range(max_attempts):
+        version = item.get("stateVersion") if item else None
+        state = state_from_item(item) if item else new_state(group_id)
+        for record in fresh:
+            fold(state, record)
+        try:
+            write_state(groups_table, state, version, applying=token)
+            break
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "ConditionalCheckFailedException" or attempt == max_attempts - 1:
+                raise
+        item = _load_state_item(groups_table, dynamodb, group_id, now)
+    _finish_batch(groups_table, dynamodb, group_id, int(version or 0) + 1, token, now)
+    return True
+
+
+def apply_group_messages(groups_table, items, dynamodb, max_attempts=5, now=None):
+    """Aplica um lote de mensagens novas no estado dos grupos (stream de crm-mensagens).
+
+    Idempotente por mensagem (marcadores em crm-stream-applied, via dynamodb).
+    Retorna (grupos atualizados, groupIds que falharam).
+    """
+    by_group = {}
+    for record in to_records(items):
+        by_group.setdefault(record.group_id, []).append(record)
+
+    updated, failed = 0, set()
+    for group_id, records in by_group.items():
+        try:
+            updated += _apply_group(groups_table, dynamodb, group_id, records, max_attempts, now)
+        except (ClientError, RuntimeError) as exc:
+            print(f"⚠️ Estado do grupo {group_id} não aplicado: {exc}")
+            failed.add(group_id)
+    return updated, failed
+
+
+def diff_states(expected, actual, tolerance=0.01):
+    """Diferenças entre o replay (expected) e o estado gravado (actual), por grupo."""
+    actual = {s["groupId"]: s for s in actual}
+    diffs = []
+    for group_id, state in expected.items():
+        stored = actual.get(group_id)
+        if stored is None:
+            diffs.append((group_id, "ausente", None, None))
+            continue
+        for name in STATE_FIELDS:
+            want, got = state[name], stored[name]
+            if isinstance(want, float) or isinstance(got, float):
+                if abs(want - got) > tolerance:
+                    diffs.append((group_id, name, want, got))
+            elif want != got:
+                diffs.append((group_id, name, want, got))
+    return diffs
@@ -0,0 +1,154 @@
+import calendar
+from datetime import date, timedelta
+
+from common.rollups import TYPE_KEYS
+
+# ==============================
+# 📋 GET /groups/{groupId}/stats — corpo da resposta
+# Dois insumos, ambos de um grupo só:
+#   frame de rollups horários (common.columnar) → mensagens, tempo de
+#     resposta (média, melhor, pior) e atividade por hora/dia/mês
+#   linhas de membros por hora (common.rollups, "members#...") → membros e
+#     mensagens por tipo; gravadas pelo stream ou calculadas das mensagens
+# Períodos em dias locais: today, week (7 dias), month (30 dias) terminando
+# hoje, ou custom (startDate/endDate).
+# ==============================
+
+PERIODS = ("today", "week", "month", "custom")
+DEFAULT_PERIOD = "week"
+PERIOD_DAYS = {"today": 1, "week": 7, "month": 30}
+MAX_CUSTOM_DAYS = 366
+
+# Membros na resposta (os que mais escreveram)
+MAX_MEMBERS = 100
+
+
+def period_days(query, today):
+    """(primeiro, último dia local) do período pedido; ValueError se inválido."""
+    period = query.get("period") or ("custom" if query.get("startDate") or query.get("endDate") else DEFAULT_PERIOD)
+    if period not in PERIODS:
+        raise ValueError(f"period inválido: {period} (válidos: {', '.join(PERIODS)})")
+    if period != "custom":
+        return today - timedelta(days=PERIOD_DAYS[period] - 1), today
+    if not query.get("startDate") or not query.get("endDate"):
+        raise ValueError("period=custom exige startDate e endDate")
+    try:
+        first, last = date.fromisoformat(query["startDate"]), date.fromisoformat(query["endDate"])
+    except ValueError:
+        raise ValueError("startDate e endDate precisam estar no formato YYYY-MM-DD") from None
+    if last < first or (last - first).days + 1 > MAX_CUSTOM_DAYS:
+        raise ValueError(f"Período precisa ter de 1 a {MAX_CUSTOM_DAYS} dias")
+    return first, last
+
+
+def member_stats(rows, active_since):
+    """(membros ordenados por mensagens, resumo, mensagens por tipo) das linhas de membros do período.
+
+    active_since: epoch a partir do qual o membro conta como ativo.
+    """
+    from common.records import epoch_seconds
+
+    members = {}
+    by_type = dict.fromkeys(TYPE_KEYS.values(), 0)
+    for row in rows:
+        for kind, count in row["types"].items():
+            by_type[kind] += count
+        for member_id, hour_member in row["members"].items():
+            member = members.get(member_id)
+            if member is None:
+                member = members[member_id] = {"id": member_id, "name": None, "role": "member",
+                                               "lastActive": None, "messageCount": 0, "nameAt": None}
+            member["messageCount"] += hour_member["count"]
+            # admin = alguém do time (direction team)
+            if hour_member["team"]:
+                member["role"] = "admin"
+            if member["lastActive"] is None or hour_member["last"] > member["lastActive"]:
+                member["lastActive"] = hour_member["last"]
+            # Nome da última mensagem que trouxe nome
+            if hour_member["name"] and (member["nameAt"] is None or hour_member["nameAt"] > member["nameAt"]):
+                member["name"], member["nameAt"] = hour_member["name"], hour_member["nameAt"]
+
+    ordered = sorted(members.values(), key=lambda m: (-m["messageCount"], m["id"]))
+    summary = {
+        "total": len(ordered),
+        "active": sum(1 for m in ordered if epoch_seconds(m["lastActive"]) >= active_since),
+        "admins": sum(1 for m in ordered if m["role"] == "admin"),
+    }
+    return [{k: v for k, v in m.items() if k != "nameAt"} for m in ordered], summary, by_type
+
+
+def _entry(label, totals, i, average_minutes):
+    return dict(label, messages=int(totals["messages"][i]), responseTime={
+        "average": average_minutes(totals["rtSumSec"][i], totals["rtCount"][i]),
+        "unit": "minutes"
+    })
+
+
+def activity(frame, first_day, last_day):
+    """(atividade por hora do dia, por dia e por mês, totais) do frame nos dias locais do período."""
+    import numpy as np
+    from common.columnar import average_minutes, local_window, sum_by
+
+    num_days = (last_day - first_day).days + 1
+    frame, local_hour = local_window(frame, first_day, num_days)
+    days = [first_day + timedelta(days=offset) for offset in range(num_days)]
+    months = sorted({day.strftime("%Y-%m") for day in days})
+    month_of_day = np.array([months.index(day.strftime("%Y-%m")) for day in days], dtype=np.int64)
+
+    per_hour = sum_by(frame, local_hour % 24, 24)
+    per_day = sum_by(frame, local_hour // 24, num_days)
+    per_month = sum_by(frame, month_of_day[local_hour // 24], len(months))
+
+    hourly = [_entry({"hour": f"{h:02d}:00"}, per_hour, h, average_minutes) for h in range(24)]
+    daily = [_entry({"date": day.isoformat(), "dayOfWeek": calendar.day_name[day.weekday()]},
+                    per_day, offset, average_minutes) for offset, day in enumerate(days)]
+    monthly = [_entry({"month": month}, per_month, i, average_minutes) for i, month in enumerate(months)]
+
+    samples = frame["rtCount"] > 0
+    totals = {
+        "messages": int(frame["messages"].sum()),
+        "average": average_minutes(frame["rtSumSec"].sum(), frame["rtCount"].sum()),
+        "best": round(float(np.nanmin(frame["rtMinSec"][samples])) / 60, 2) if samples.any() else 0,
+        "worst": round(float(np.nanmax(frame["rtMaxSec"][samples])) / 60, 2) if samples.any() else 0,
+    }
+    return {"hourly": hourly, "daily": daily, "monthly": monthly}, totals
+
+
+def group_stats_payload(group, frame, member_rows, first_day, last_day, today, active_since, today_frame):
+    """Corpo de /groups/{groupId}/stats.
+
+    group: item de crm-groupId (ou {"groupId": ...}); frame / today_frame: rollups do grupo
+    no período / em hoje (o mesmo frame se hoje estiver no período); member_rows: linhas de
+    membros do grupo nas horas do período.
+    """
+    from common.columnar import local_window
+
+    period_activity, totals = activity(frame, first_day, last_day)
+    today_frame, _ = local_window(today_frame, today, 1)
+    members, member_summary, by_type = member_stats(member_rows, active_since)
+
+    return {
+        "group": {
+            "id": group["groupId"],
+            "name": group.get("groupName") or group["groupId"],
+            "description": group.get("description"),
+            "createdAt": group.get("createdAt"),
+        },
+        "period": {"start": first_day.isoformat(), "end": last_day.isoformat()},
+        "metrics": {
+            "members": member_summary,
+            "messages": {
+                "total": totals["messages"],
+                "today": int(today_frame["messages"].sum()),
+                "byType": by_type,
+            },
+            "responseTime": {
+                "average": totals["average"],
+                "best": totals["best"],
+                "worst": totals["worst"],
+                "unit": "minutes",
+            },
+        },
+        "activity": period_activity,
+        "members": members[:MAX_MEMBERS],
+    }
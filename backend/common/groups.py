@@ -0,0 +1,75 @@
+import time
+
+# ==============================
+# 🏷️ Nomes dos grupos (crm-groupId) com cache em memória
+# O cache é do módulo: sobrevive entre invocações da mesma instância (warm)
+# e é compartilhado por alerts e groupsOverview.
+# ==============================
+
+NAME_TTL_SECONDS = 300
+BATCH_GET_LIMIT = 100  # máximo de chaves por BatchGetItem
+MAX_BATCH_ATTEMPTS = 5
+
+# groupId -> (groupName ou None, expira em)
+_names = {}
+
+
+def _fresh(group_id, now):
+    entry = _names.get(group_id)
+    return entry is not None and entry[1] > now
+
+
+def remember_names(items, now=None):
+    """Guarda no cache os nomes de itens já lidos de crm-groupId (scan, estado)."""
+    expires = (now or time.monotonic()) + NAME_TTL_SECONDS
+    for item in items:
+        _names[item["groupId"]] = (item.get("groupName"), expires)
+
+
+def name_key(name, group_id):
+    """Chave de ordenação por nome (GET /groups): nome sem caixa, ou o groupId se não tiver."""
+    return name.casefold() if name else str(group_id)
+
+
+def clear_names():
+    _names.clear()
+
+
+def _batch_get(dynamodb, table_name, keys):
+    # BatchGetItem com nova tentativa (backoff exponencial) para UnprocessedKeys
+    request = {table_name: {
+        "Keys": keys,
+        "ProjectionExpression": "#g, #n",
+        "ExpressionAttributeNames": {"#g": "groupId", "#n": "groupName"},
+    }}
+    items = []
+    for attempt in range(MAX_BATCH_ATTEMPTS):
+        response = dynamodb.batch_get_item(RequestItems=request)
+        items.extend(response.get("Responses", {}).get(table_name, []))
+        request = response.get("UnprocessedKeys") or {}
+        if not request:
+            break
+        time.sleep(0.05 * 2 ** attempt)
+    else:
+        print(f"⚠️ {len(request[table_name]['Keys'])} grupos sem nome após {MAX_BATCH_ATTEMPTS} tentativas")
+    unprocessed = {key["groupId"] for key in request.get(table_name, {}).get("Keys", [])}
+    return items, unprocessed
+
+
+def group_names(dynamodb, table_name, group_ids):
+    """{groupId: groupName} dos grupos pedidos (sem nome ou inexistente fica de fora)."""
+    now = time.monotonic()
+    missing = sorted({g for g in group_ids if not _fresh(g, now)})
+    for i in range(0, len(missing), BATCH_GET_LIMIT):
+        chunk = missing[i:i + BATCH_GET_LIMIT]
+        items, unprocessed = _batch_get(dynamodb, table_name, [{"groupId": g} for g in chunk])
+        # Inexistentes também vão para o cache, para não buscar de novo a cada chamada
+        remember_names([{"groupId": g} for g in chunk if g not in unprocessed], now)
+        remember_names(items, now)
+
+    names = {}
+    for group_id in group_ids:
+        name = _names.get(group_id, (None, 0))[0]
+        if name is not None:
+            names[group_id] = name
+    return names
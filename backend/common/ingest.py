@@ -0,0 +1,271 @@
+import hashlib
+import hmac
+import json
+import os
+import random
+import time
+from datetime import timezone
+
+from botocore.exceptions import ClientError
+
+from common.groups import name_key
+from common.messages import day_shard, parse_timestamp
+
+# ==============================
+# 📨 Ingestão do webhook do WhatsApp (POST /webhook/whatsapp)
+#   webhook/app.py      → valida assinatura e eventos, enfileira no SQS
+#   webhook/consumer.py → grava em crm-mensagens com BatchWriteItem (25 por chamada)
+# Cada mensagem do SQS leva vários itens já no formato da tabela, para que uma
+# rajada vire poucas chamadas ao SQS e ao DynamoDB.
+# ==============================
+
+MESSAGES_TABLE = "crm-mensagens"
+GROUPS_TABLE = "crm-groupId"
+
+EVENT_TYPES = ("message", "status", "group")
+CONTENT_TYPES = ("text", "media", "document")
+GROUP_NAME_ACTIONS = ("create", "update")
+
+BATCH_WRITE_LIMIT = 25          # máximo de itens por BatchWriteItem
+MAX_WRITE_ATTEMPTS = 6
+SQS_BATCH_LIMIT = 10            # máximo de entradas por SendMessageBatch
+SQS_BODY_BYTES = 24 * 1024      # por mensagem SQS: uma falha parcial só reenvia ~60 itens
+SQS_BATCH_BYTES = 240 * 1024    # por SendMessageBatch (limite de 256 KB)
+
+
+class InvalidEvent(ValueError):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+# ==============================
+# 🔐 Assinatura
+# ==============================
+
+def sign(body, secret):
+    return "sha256=" + hmac.new(secret.encode(), body.encode(), hashlib.sha256).hexdigest()
+
+
+def valid_signature(body, signature, secret):
+    """HMAC-SHA256 do corpo cru com o segredo do webhook ("sha256=<hex>" ou só o hex)."""
+    if not signature or not secret:
+        return False
+    expected = sign(body, secret)
+    if not signature.startswith("sha256="):
+        expected = expected[len("sha256="):]
+    return hmac.compare_digest(expected, signature)
+
+
+# ==============================
+# 🧾 Eventos → itens
+# ==============================
+
+def parse_events(body):
+    """Um evento ou uma lista de eventos (rajadas chegam agrupadas)."""
+    try:
+        payload = json.loads(body or "")
+    except ValueError:
+        raise InvalidEvent("INVALID_JSON", "Corpo não é um JSON válido") from None
+    events = payload if isinstance(payload, list) else [payload]
+    if not events or not all(isinstance(event, dict) for event in events):
+        raise InvalidEvent("INVALID_PAYLOAD", "Esperado um evento ou uma lista de eventos")
+    return events
+
+
+def team_members():
+    # ids/telefones de quem atende (mensagens deles são direction = team)
+    return {m.strip() for m in os.environ.get("TEAM_MEMBERS", "").split(",") if m.strip()}
+
+
+def format_timestamp(value):
+    # Mesmo formato dos timestamps gravados: 2025-08-05T12:00:00.000Z (UTC)
+    try:
+        dt = parse_timestamp(value)
+    except (TypeError, ValueError):
+        raise InvalidEvent("INVALID_TIMESTAMP", f"Timestamp inválido: {value!r}") from None
+    if dt.tzinfo is None:
+        raise InvalidEvent("INVALID_TIMESTAMP", f"Timestamp sem fuso: {value!r}")
+    dt = dt.astimezone(timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def message_item(message, members=frozenset()):
+    """Item de crm-mensagens a partir de data.message do webhook."""
+    if not isinstance(message, dict):
+        raise InvalidEvent("INVALID_MESSAGE", "data.message ausente")
+    missing = [name for name in ("id", "groupId", "from", "content", "timestamp") if not message.get(name)]
+    if missing:
+        raise InvalidEvent("INVALID_MESSAGE", f"Campos obrigatórios ausentes: {', '.join(missing)}")
+    sender, content = message["from"], message["content"]
+    if not isinstance(sender, dict) or not isinstance(content, dict):
+        raise InvalidEvent("INVALID_MESSAGE", "from e content devem ser objetos")
+    if content.get("type") not in CONTENT_TYPES:
+        raise InvalidEvent("INVALID_MESSAGE", f"content.type inválido: {content.get('type')!r}")
+
+    direction = message.get("direction")
+    if direction not in ("client", "team"):
+        is_team = sender.get("id") in members or sender.get("phone") in members
+        direction = "team" if is_team else "client"
+
+    timestamp = format_timestamp(message["timestamp"])
+    return {
+        "messageId": str(message["id"]),
+        "groupId": str(message["groupId"]),
+        "timestamp": timestamp,
+        "dayShard": day_shard(timestamp, message["id"]),
+        "direction": direction,
+        "content": json.dumps(content),
+        "from": json.dumps(sender),
+    }
+
+
+def group_item(group):
+    # Só o nome interessa aos endpoints (crm-groupId.groupName)
+    if not isinstance(group, dict) or not group.get("id"):
+        raise InvalidEvent("INVALID_GROUP", "data.group.id ausente")
+    name = (group.get("data") or {}).get("name")
+    if group.get("action") in GROUP_NAME_ACTIONS and name:
+        return {"groupId": str(group["id"]), "groupName": name}
+    return None
+
+
+def to_records(events, members=None):
+    """Registros para a fila: ({"t": tabela, "i": item} aceitos, [{index, code, message}] rejeitados)."""
+    members = team_members() if members is None else members
+    records, rejected = [], []
+    for index, event in enumerate(events):
+        data = event.get("data") or {}
+        try:
+            kind = event.get("type")
+            if kind == "message":
+                records.append({"t": MESSAGES_TABLE, "i": message_item(data.get("message"), members)})
+            elif kind == "group":
+                item = group_item(data.get("group"))
+                if item:
+                    records.append({"t": GROUPS_TABLE, "i": item})
+            elif kind != "status":
+                # status (digitando/online) não é persistido
+                raise InvalidEvent("INVALID_TYPE", f"type deve ser um de {', '.join(EVENT_TYPES)}")
+        except InvalidEvent as exc:
+            rejected.append({"index": index, "code": exc.code, "message": str(exc)})
+    return records, rejected
+
+
+# ==============================
+# 📤 Fila (SQS)
+# ==============================
+
+def pack(records, max_bytes=SQS_BODY_BYTES):
+    """Agrupa registros em corpos JSON de até max_bytes (uma mensagem SQS cada)."""
+    bodies, current, size = [], [], 2
+    for record in records:
+        encoded = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        length = len(encoded.encode()) + 1
+        if current and size + length > max_bytes:
+            bodies.append("[" + ",".join(current) + "]")
+            current, size = [], 2
+        current.append(encoded)
+        size += length
+    if current:
+        bodies.append("[" + ",".join(current) + "]")
+    return bodies
+
+
+def enqueue(sqs, queue_url, records):
+    """Envia os registros com SendMessageBatch; retorna quantas mensagens SQS foram usadas."""
+    bodies = pack(records)
+    # Lotes de até 10 entradas e SQS_BATCH_BYTES no total
+    batch, size, sent = [], 0, 0
+    for body in bodies + [None]:
+        length = len(body.encode()) if body is not None else 0
+        if batch and (body is None or len(batch) == SQS_BATCH_LIMIT or size + length > SQS_BATCH_BYTES):
+            _send_batch(sqs, queue_url, batch)
+            sent += len(batch)
+            batch, size = [], 0
+        if body is not None:
+            batch.append({"Id": str(len(batch)), "MessageBody": body})
+            size += length
+    return sent
+
+
+def _send_batch(sqs, queue_url, entries):
+    for attempt in range(MAX_WRITE_ATTEMPTS):
+        response = sqs.send_message_batch(QueueUrl=queue_url, Entries=entries)
+        failed = {f["Id"] for f in response.get("Failed", [])}
+        entries = [e for e in entries if e["Id"] in failed]
+        if not entries:
+            return
+        _backoff(attempt)
+    raise RuntimeError(f"{len(entries)} mensagens não enfileiradas após {MAX_WRITE_ATTEMPTS} tentativas")
+
+
+# ==============================
+# 🗄️ Gravação (consumidor da fila)
+# ==============================
+
+def _backoff(attempt, base=0.05, cap=2.0):
+    # Exponencial com jitter total (evita rajadas sincronizadas de novas tentativas)
+    time.sleep(random.uniform(0, min(cap, base * 2 ** attempt)))
+
+
+def batch_write(dynamodb, table_name, items, max_attempts=None):
+    """PutRequest em lotes de 25 com nova tentativa para UnprocessedItems.
+
+    Retorna os itens que não foram gravados após max_attempts tentativas
+    (padrão: MAX_WRITE_ATTEMPTS, lido na chamada).
+    """
+    max_attempts = max_attempts or MAX_WRITE_ATTEMPTS
+    failed = []
+    for i in range(0, len(items), BATCH_WRITE_LIMIT):
+        requests = [{"PutRequest": {"Item": item}} for item in items[i:i + BATCH_WRITE_LIMIT]]
+        for attempt in range(max_attempts):
+            response = dynamodb.batch_write_item(RequestItems={table_name: requests})
+            requests = (response.get("UnprocessedItems") or {}).get(table_name, [])
+            if not requests:
+                break
+            if attempt < max_attempts - 1:
+                _backoff(attempt)
+        failed.extend(request["PutRequest"]["Item"] for request in requests)
+    return failed
+
+
+def _set_group_name(groups_table, item):
+    # Update (não Put): o item do grupo também guarda o estado da conversa
+    groups_table.update_item(
+        Key={"groupId": item["groupId"]},
+        UpdateExpression="SET #n = :n, #k = :k",
+        ExpressionAttributeNames={"#n": "groupName", "#k": "nameKey"},
+        ExpressionAttributeValues={":n": item["groupName"], ":k": name_key(item["groupName"], item["groupId"])},
+    )
+
+
+def write_records(dynamodb, batches):
+    """Grava os registros de várias mensagens SQS; retorna os ids das mensagens com falha.
+
+    batches: lista de (id da mensagem SQS, registros). Mensagens repetidas (reentrega do
+    webhook) ficam com a última versão, já que um BatchWriteItem não aceita chave duplicada.
+    """
+    messages, owners, names = {}, {}, {}
+    for message_id, records in batches:
+        for record in records:
+            item = record["i"]
+            if record["t"] == GROUPS_TABLE:
+                names[item["groupId"]] = (message_id, item)
+                continue
+            key = (item["messageId"], item["timestamp"])
+            messages[key] = item
+            owners.setdefault(key, set()).add(message_id)
+
+    failures = set()
+    for item in batch_write(dynamodb, MESSAGES_TABLE, list(messages.values())):
+        failures |= owners[(item["messageId"], item["timestamp"])]
+
+    groups_table = dynamodb.Table(GROUPS_TABLE)
+    for message_id, item in names.values():
+        try:
+            _set_group_name(groups_table, item)
+        except ClientError as exc:
+            print(f"⚠️ Nome do grupo {item['groupId']} não gravado: {exc}")
+            failures.add(message_id)
+    return failures
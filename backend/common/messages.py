@@ -0,0 +1,190 @@
+import queue
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+# ==============================
+# 📚 Acesso às mensagens (crm-mensagens)
+# Lê apenas a janela de tempo pedida via GSIs, em vez de scan na tabela toda.
+#   - dayShard-timestamp-index: partição = "YYYY-MM-DD#<shard>" (dia UTC do
+#     timestamp + shard estável do messageId), range = timestamp; projeção
+#     INCLUDE só com DAY_INDEX_FIELDS
+#   - groupId-timestamp-index:  partição = groupId, range = timestamp (projeção ALL)
+# O dia é dividido em DAY_SHARDS partições para que as escritas do dia corrente
+# não caiam todas numa partição só do índice (~1000 WCU/s por partição).
+# Páginas (dias × shards) são lidas em paralelo e entregues em streaming (iter_*).
+# ==============================
+
+DAY_INDEX = "dayShard-timestamp-index"
+DAY_SHARDS = 8  # escritores e leitores precisam concordar: mudar exige regravar dayShard
+GROUP_INDEX = "groupId-timestamp-index"
+
+# Respostas acima disso são descartadas no cálculo de tempo de resposta,
+# então basta ler esse tanto além do fim da janela para parear mensagens
+RESPONSE_LOOKAHEAD = timedelta(minutes=180)
+
+# Threads para queries por dia / segmentos de parallel scan
+MAX_WORKERS = 8
+
+# Campos lidos por cada tipo de endpoint (ProjectionExpression)
+ACTIVITY_FIELDS = ("timestamp", "groupId", "direction")
+CONVERSATION_FIELDS = ("messageId", "timestamp", "groupId", "direction", "content", "from")
+# Atributos não chave projetados no índice por dia (o que os endpoints leem)
+DAY_INDEX_FIELDS = ("groupId", "direction", "content", "from")
+
+
+def parse_timestamp(ts):
+    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+
+
+def _utc(dt):
+    return dt.astimezone(timezone.utc) if dt.tzinfo is not None else dt
+
+
+def format_bound(dt):
+    # Limite sem sufixo: "2025-08-05T03:00:00" < "2025-08-05T03:00:00.000Z",
+    # então BETWEEN(início, fim) equivale a [início, fim) nos timestamps gravados
+    return _utc(dt).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def day_shard(ts, message_id):
+    # Valor do atributo "dayShard" gravado em cada mensagem
+    return f"{ts[:10]}#{zlib.crc32(str(message_id).encode()) % DAY_SHARDS}"
+
+
+def day_shards(day):
+    """Partições do índice por dia que cobrem o dia UTC (YYYY-MM-DD)."""
+    return [f"{day}#{shard}" for shard in range(DAY_SHARDS)]
+
+
+def day_buckets(start, end):
+    first = _utc(start).date()
+    last = (_utc(end) - timedelta(microseconds=1)).date()
+    days = []
+    while first <= last:
+        days.append(first.isoformat())
+        first += timedelta(days=1)
+    return days
+
+
+def projection(fields):
+    # "timestamp" e "from" são palavras reservadas: sempre via placeholders
+    if not fields:
+        return {}
+    names = {f"#p{i}": field for i, field in enumerate(fields)}
+    return {"ProjectionExpression": ", ".join(names), "ExpressionAttributeNames": names}
+
+
+def iter_pages(operation, **kwargs):
+    response = operation(**kwargs)
+    yield response.get("Items", [])
+    while "LastEvaluatedKey" in response:
+        response = operation(ExclusiveStartKey=response["LastEvaluatedKey"], **kwargs)
+        yield response.get("Items", [])
+
+
+def iter_parallel(streams, max_workers=MAX_WORKERS):
+    """Consome vários iter_pages em threads e entrega os itens conforme as páginas chegam.
+
+    A fila é limitada, então no máximo ~2 páginas por worker ficam em memória.
+    """
+    if len(streams) == 1:
+        for page in streams[0]:
+            yield from page
+        return
+
+    pages = queue.Queue(maxsize=max_workers * 2)
+    stop = threading.Event()
+    done = object()
+
+    def put(value):
+        while not stop.is_set():
+            try:
+                pages.put(value, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def drain(stream):
+        try:
+            for page in stream:
+                if stop.is_set():
+                    return
+                put(page)
+        except Exception as exc:
+            put(exc)
+        finally:
+            put(done)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(streams))) as pool:
+        try:
+            for stream in streams:
+                pool.submit(drain, stream)
+            remaining = len(streams)
+            while remaining:
+                page = pages.get()
+                if page is done:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield from page
+        finally:
+            stop.set()
+
+
+def iter_scan(table, segments=1, fields=None, max_workers=MAX_WORKERS, **kwargs):
+    """Scan paginado em streaming; com segments > 1 usa parallel scan (Segment/TotalSegments)."""
+    kwargs.update(projection(fields))
+    if segments <= 1:
+        return iter_parallel([iter_pages(table.scan, **kwargs)])
+    streams = [
+        iter_pages(table.scan, Segment=segment, TotalSegments=segments, **kwargs)
+        for segment in range(segments)
+    ]
+    return iter_parallel(streams, max_workers)
+
+
+def iter_window(table, start, end, group_id=None, fields=None, max_workers=MAX_WORKERS):
+    """Mensagens com timestamp em [start, end), em streaming e sem ordem garantida."""
+    from boto3.dynamodb.conditions import Key  # boto3 só no primeiro query (cold start)
+
+    lo, hi = format_bound(start), format_bound(end)
+    if fields and "timestamp" not in fields:
+        fields = ("timestamp",) + tuple(fields)
+    extra = projection(fields)
+
+    if group_id:
+        streams = [iter_pages(
+            table.query,
+            IndexName=GROUP_INDEX,
+            KeyConditionExpression=Key("groupId").eq(group_id) & Key("timestamp").between(lo, hi),
+            **extra,
+        )]
+    else:
+        # Um query por shard de cada dia, em paralelo
+        streams = [
+            iter_pages(
+                table.query,
+                IndexName=DAY_INDEX,
+                KeyConditionExpression=Key("dayShard").eq(shard) & Key("timestamp").between(lo, hi),
+                **extra,
+            )
+            for day in day_buckets(start, end)
+            for shard in day_shards(day)
+        ]
+
+    for item in iter_parallel(streams, max_workers):
+        if lo <= item["timestamp"] < hi:
+            yield item
+
+
+def query_window(table, start, end, group_id=None, fields=None):
+    """Mensagens com timestamp em [start, end), ordenadas por timestamp.
+
+    Cada shard chega em ordem (páginas do índice); a ordenação só intercala as sequências.
+    """
+    items = list(iter_window(table, start, end, group_id=group_id, fields=fields))
+    items.sort(key=lambda m: m["timestamp"])
+    return items
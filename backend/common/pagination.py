@@ -0,0 +1,86 @@
+import base64
+import heapq
+import json
+
+# ==============================
+# 📑 Cursores opacos para paginação por chave (keyset)
+# O cursor guarda a chave de ordenação do último item entregue; a próxima
+# página começa logo depois dela, mesmo que itens entrem ou saiam no meio.
+# ==============================
+
+
+def encode_cursor(data):
+    raw = json.dumps(data, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decodifica um cursor de encode_cursor; ValueError se for inválido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, UnicodeError, json.JSONDecodeError, base64.binascii.Error) as exc:
+        raise ValueError("cursor inválido") from exc
+    if not isinstance(data, dict):
+        raise ValueError("cursor inválido")
+    return data
+
+
+def parse_limit(value, default, maximum):
+    """limit da query string (default se ausente); ValueError fora de 1..maximum."""
+    try:
+        limit = int(value) if value not in (None, "") else default
+    except ValueError:
+        raise ValueError("limit precisa ser um número") from None
+    if not 1 <= limit <= maximum:
+        raise ValueError(f"limit precisa estar entre 1 e {maximum}")
+    return limit
+
+
+def _position(cursor, arity):
+    # (chave do último item entregue ou None, número da página)
+    if not cursor:
+        return None, 1
+    state = decode_cursor(cursor)
+    try:
+        key, page = state["k"], int(state["p"]) + 1
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError("cursor inválido") from exc
+    # Chave comparada com a dos itens: mesma aridade, só strings
+    if not isinstance(key, list) or len(key) != arity or not all(isinstance(part, str) for part in key):
+        raise ValueError("cursor inválido")
+    return tuple(key), page
+
+
+def paginate(items, key, limit, cursor=None, arity=2):
+    """Página de items (já ordenados por key, uma tupla de arity strings) a partir do cursor.
+
+    Retorna (página, número da página, próximo cursor ou None); ValueError se
+    limit < 1 ou o cursor for inválido.
+    """
+    if limit < 1:
+        raise ValueError("limit precisa ser maior que zero")
+    after, page = _position(cursor, arity)
+    if after is not None:
+        items = [item for item in items if tuple(key(item)) > after]
+    chunk = items[:limit]
+    next_cursor = None
+    if len(items) > limit:
+        next_cursor = encode_cursor({"k": list(key(chunk[-1])), "p": page})
+    return chunk, page, next_cursor
+
+
+def paginate_top(items, key, limit, cursor=None, arity=2):
+    """Como paginate, mas items em qualquer ordem: só os limit + 1 menores depois
+    do cursor passam por um heap (O(n log limit)), sem ordenar a lista toda."""
+    if limit < 1:
+        raise ValueError("limit precisa ser maior que zero")
+    after, page = _position(cursor, arity)
+    if after is not None:
+        items = (item for item in items if tuple(key(item)) > after)
+    top = heapq.nsmallest(limit + 1, items, key=key)
+    chunk = top[:limit]
+    next_cursor = None
+    if len(top) > limit:
+        next_cursor = encode_cursor({"k": list(key(chunk[-1])), "p": page})
+    return chunk, page, next_cursor
@@ -0,0 +1,43 @@
+# ==============================
+# ⏱️ Pareamento cliente → time (tempo de resposta)
+# Uma passada só sobre as mensagens ordenadas por timestamp, com estado por
+# grupo: cada mensagem é visitada uma vez e nunca há pareamento entre grupos.
+# ==============================
+
+# Respostas com atraso fora de (0, MAX_RESPONSE_MINUTES) são descartadas
+MAX_RESPONSE_MINUTES = 180
+
+# Toda mensagem do cliente pendente é respondida pela próxima do time (activity/*)
+EACH_CLIENT = "each"
+# Só a última mensagem do cliente antes da resposta conta (metricsToday, groupsOverview)
+LAST_CLIENT = "last"
+
+
+def pair_responses(events, mode=EACH_CLIENT, max_minutes=MAX_RESPONSE_MINUTES):
+    """Pareia mensagens do cliente com a próxima resposta do time no mesmo grupo.
+
+    events: iterável de (groupId, epoch em segundos, direction, ref), em ordem de tempo.
+    Retorna lista de (ref da mensagem do cliente, epoch do cliente, minutos até a resposta).
+    """
+    pending = {}
+    samples = []
+
+    for group_id, epoch, direction, ref in events:
+        if direction == "client":
+            waiting = pending.get(group_id)
+            if waiting is None:
+                pending[group_id] = [(ref, epoch)]
+            elif mode == LAST_CLIENT:
+                waiting[0] = (ref, epoch)
+            else:
+                waiting.append((ref, epoch))
+        elif direction == "team":
+            waiting = pending.pop(group_id, None)
+            if not waiting:
+                continue
+            for client_ref, client_epoch in waiting:
+                delta_min = (epoch - client_epoch) / 60
+                if 0 < delta_min < max_minutes:
+                    samples.append((client_ref, client_epoch, delta_min))
+
+    return samples
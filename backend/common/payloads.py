@@ -0,0 +1,418 @@
+import calendar
+from datetime import timedelta
+
+from common.messages import parse_timestamp
+from common.pagination import paginate_top
+
+# ==============================
+# 🧾 Corpo das respostas do dashboard
+# Os endpoints (metricsToday, alerts, groupsOverview, activity/*) e o
+# /dashboard montam o mesmo contrato com estas funções, a partir do que já
+# foi carregado: estado por grupo (common.group_state) ou frame de rollups
+# horários (common.columnar). Leitura das tabelas fica nos handlers.
+# O columnar (numpy) é importado só pelas funções de frame: alerts e
+# groupsOverview não empacotam numpy.
+# ==============================
+
+MIN_WAIT_MINUTES = 10
+# Sem mensagens há mais que isso (e sem cliente aguardando) → idle
+IDLE_MINUTES = 300
+
+
+# ==============================
+# 🚨 Alerts
+# ==============================
+
+def get_priority(waiting_minutes):
+    if waiting_minutes >= 120:
+        return "high"
+    elif waiting_minutes >= 60:
+        return "medium"
+    else:
+        return "low"
+
+
+def alert_candidates(states, now, priority_filter=None):
+    """Grupos com cliente aguardando, como tuplas leves:
+    (timestamp da mensagem do cliente, groupId, espera em minutos, prioridade, state, mensagem).
+    """
+    for state in states:
+        # Última mensagem do cliente: recente sempre entra; antiga só se relevante
+        last_client_msg = state["lastClient"]
+        if not last_client_msg:
+            continue  # nenhuma mensagem do cliente nesse grupo
+        waiting_minutes = int((now - parse_timestamp(last_client_msg["timestamp"])).total_seconds() / 60)
+        if waiting_minutes >= MIN_WAIT_MINUTES:
+            relevant = state["lastRelevantClient"]
+            if not relevant:
+                continue
+            if relevant is not last_client_msg and relevant["timestamp"] != last_client_msg["timestamp"]:
+                waiting_minutes = int((now - parse_timestamp(relevant["timestamp"])).total_seconds() / 60)
+            last_client_msg = relevant
+
+        # Verifica se houve resposta do time depois da última do cliente
+        if state["lastTeam"] and state["lastTeam"] > last_client_msg["timestamp"]:
+            continue  # já foi respondido
+
+        priority = get_priority(waiting_minutes)
+        if priority_filter and priority != priority_filter:
+            continue
+        yield last_client_msg["timestamp"], state["groupId"], waiting_minutes, priority, state, last_client_msg
+
+
+def candidate_key(candidate):
+    # Ordenar por prioridade e tempo: a prioridade só cresce com a espera, então
+    # basta a mensagem do cliente mais antiga primeiro (chave estável para o cursor)
+    return candidate[:2]
+
+
+def build_alert(candidate):
+    timestamp, group_id, waiting_minutes, priority, state, last_client_msg = candidate
+    return {
+        "id": last_client_msg["id"],
+        "groupId": group_id,
+        "groupName": state.get("groupName"),
+        "clientName": last_client_msg["name"],
+        "lastMessage": {
+            "text": last_client_msg["text"],
+            "timestamp": timestamp
+        },
+        "waitingTime": {
+            "value": waiting_minutes,
+            "unit": "minutes"
+        },
+        "priority": priority,
+        "messageCount": state["messageCount"]
+    }
+
+
+def alerts_payload(states, now, limit=10, priority_filter=None, cursor=None, lookup_names=None):
+    """Corpo de /alerts; ValueError se o cursor for inválido.
+
+    Candidatos em tuplas e top-K num heap: só os alertas da página viram dict.
+    lookup_names(groupIds) → {groupId: nome}, chamado só com os grupos da página sem nome.
+    """
+    candidates = list(alert_candidates(states, now, priority_filter))
+    top, page, next_cursor = paginate_top(candidates, candidate_key, limit, cursor)
+    page_alerts = [build_alert(candidate) for candidate in top]
+
+    # Nomes só dos grupos da página, em lote (e com cache entre invocações)
+    sem_nome = [a["groupId"] for a in page_alerts if a["groupName"] is None]
+    if sem_nome and lookup_names is not None:
+        names = lookup_names(sem_nome)
+        for alert in page_alerts:
+            if alert["groupName"] is None:
+                alert["groupName"] = names.get(alert["groupId"], "")
+
+    return {
+        "alerts": page_alerts,
+        "total": len(candidates),
+        "page": page,
+        "hasMore": next_cursor is not None,
+        "nextCursor": next_cursor
+    }
+
+
+# ==============================
+# 👥 Groups overview
+# ==============================
+
+def format_time_diff(past, now):
+    diff = now - past
+    mins = int(diff.total_seconds() / 60)
+    if mins < 60:
+        return f"há {mins}min"
+    else:
+        hours = mins // 60
+        return f"há {hours}h"
+
+
+def groups_payload(states, names, now, today):
+    resultado = []
+    for state in states:
+        group_id = state["groupId"]
+        last_activity = parse_timestamp(state["lastActivity"])
+        ultima_atividade_str = format_time_diff(last_activity, now)
+
+        # Mensagens de hoje
+        total_hoje = state["lastDayMessages"] if state["lastDay"] == today.isoformat() else 0
+
+        # Tempo médio de resposta
+        avg_resp = average_response(state)
+        avg_resp_str = f"{int(avg_resp)} min" if avg_resp else "-"
+
+        resultado.append({
+            "id": group_id,
+            "name": names.get(group_id, group_id),
+            "todayMessages": total_hoje,
+            "avgResponseTime": avg_resp_str,
+            "lastActivity": ultima_atividade_str,
+            "status": group_status(state, now)
+        })
+
+    return {"groups": resultado}
+
+
+def group_status(state, now):
+    last_activity = parse_timestamp(state["lastActivity"])
+    aguardando = False
+
+    # 🔹 Mesma lógica de alert_candidates
+    if state["lastDirection"] == "client":
+        t_last_client = parse_timestamp(state["lastClient"]["timestamp"])
+        diff_minutes = int((now - t_last_client).total_seconds() / 60)
+
+        if diff_minutes >= MIN_WAIT_MINUTES:
+            if state["lastClient"]["relevant"]:
+                aguardando = True
+        else:
+            aguardando = True
+
+    minutos_desde_ultima = (now - last_activity).total_seconds() / 60
+    if aguardando:
+        return "waiting"
+    elif minutos_desde_ultima > IDLE_MINUTES:
+        return "idle"
+    else:
+        return "active"
+
+
+def average_response(state):
+    return round(state["rtSum"] / state["rtCount"], 2) if state["rtCount"] else 0
+
+
+# ==============================
+# 👥 Groups (GET /groups)
+# ==============================
+
+def group_summary(state, names, now, today):
+    group_id = state["groupId"]
+    return {
+        "id": group_id,
+        "name": names.get(group_id, group_id),
+        "messages": {
+            "today": state["lastDayMessages"] if state["lastDay"] == today.isoformat() else 0,
+            "total": state["messageCount"],
+        },
+        "responseTime": {"average": average_response(state), "unit": "minutes"},
+        # Só mensagens alimentam o estado por grupo
+        "lastActivity": {"timestamp": state["lastActivity"], "type": "message"},
+        "status": group_status(state, now),
+    }
+
+
+# ==============================
+# 📊 Métricas de hoje
+# ==============================
+
+# Base de comparação de /metrics/today
+COMPARE_TO = ("yesterday", "lastWeek", "weekAverage")
+
+
+def calcular_variacao(hoje, ontem):
+    if ontem == 0:
+        return {"value": hoje, "type": "increase"}
+    diff = hoje - ontem
+    tipo = "increase" if diff >= 0 else "decrease"
+    return {"value": round(abs(diff), 2) if isinstance(diff, float) else abs(diff), "type": tipo}
+
+
+def dias_de_comparacao(dia, compare_to="yesterday"):
+    """Dias locais comparados com dia: ontem, mesmo dia da semana passada ou os 7 dias anteriores."""
+    if compare_to == "lastWeek":
+        return [dia - timedelta(days=7)]
+    if compare_to == "weekAverage":
+        return [dia - timedelta(days=offset) for offset in range(7, 0, -1)]
+    return [dia - timedelta(days=1)]
+
+
+def metricas_por_dias(frame, dias):
+    """Métricas de cada dia local pedido numa passada só sobre o frame: {dia: métricas}.
+
+    waiting = última mensagem do grupo no dia é do cliente.
+    """
+    import numpy as np
+    from common.columnar import CLIENT_CODE, average_minutes, last_by, local_window, percentiles_by, sum_by
+
+    primeiro = min(dias)
+    total_dias = (max(dias) - primeiro).days + 1
+    frame, local_hour = local_window(frame, primeiro, total_dias)
+    dia_da_linha = local_hour // 24
+
+    por_dia = sum_by(frame, dia_da_linha, total_dias, fields=("messages", "rtLastSumSec", "rtLastCount"))
+    percentis = percentiles_by(frame, dia_da_linha, total_dias, "rtLastSketch")
+    dia_do_grupo, _, ultima_direcao = last_by(frame, dia_da_linha)
+    ativos = np.bincount(dia_do_grupo, minlength=total_dias)
+    aguardando = np.bincount(dia_do_grupo[ultima_direcao == CLIENT_CODE], minlength=total_dias)
+
+    metricas = {}
+    for dia in dias:
+        i = (dia - primeiro).days
+        metricas[dia] = {
+            "totalMessages": int(por_dia["messages"][i]),
+            "averageResponseTime": average_minutes(por_dia["rtLastSumSec"][i], por_dia["rtLastCount"][i]),
+            "responseTimePercentiles": percentis[i],
+            "activeGroups": int(ativos[i]),
+            "waitingClients": int(aguardando[i])
+        }
+    return metricas
+
+
+def _media(metricas):
+    # Um dia: os próprios valores; vários: média de cada métrica (2 casas)
+    if len(metricas) == 1:
+        return metricas[0]
+    return {name: round(sum(m[name] for m in metricas) / len(metricas), 2)
+            for name in ("totalMessages", "averageResponseTime", "activeGroups", "waitingClients")}
+
+
+def metrics_payload(frame, hoje, compare_to="yesterday"):
+    """Corpo de /metrics/today; o frame precisa cobrir hoje e os dias_de_comparacao (dias locais)."""
+    dias = dias_de_comparacao(hoje, compare_to)
+    metricas = metricas_por_dias(frame, [hoje] + dias)
+    metricas_hoje = metricas[hoje]
+    metricas_ontem = _media([metricas[dia] for dia in dias])
+
+    return {
+        "date": hoje.isoformat(),
+        "compareTo": {
+            "type": compare_to,
+            "dates": [dia.isoformat() for dia in dias]
+        },
+        "metrics": {
+            "totalMessages": {
+                "value": metricas_hoje["totalMessages"],
+                "change": calcular_variacao(metricas_hoje["totalMessages"], metricas_ontem["totalMessages"])
+            },
+            "averageResponseTime": {
+                "value": metricas_hoje["averageResponseTime"],
+                "unit": "minutes",
+                "percentiles": metricas_hoje["responseTimePercentiles"],
+                "change": calcular_variacao(metricas_hoje["averageResponseTime"], metricas_ontem["averageResponseTime"])
+            },
+            "activeGroups": {
+                "value": metricas_hoje["activeGroups"],
+                "change": calcular_variacao(metricas_hoje["activeGroups"], metricas_ontem["activeGroups"])
+            },
+            "waitingClients": {
+                "value": metricas_hoje["waitingClients"],
+                "change": calcular_variacao(metricas_hoje["waitingClients"], metricas_ontem["waitingClients"])
+            }
+        }
+    }
+
+
+# ==============================
+# 🕒 Atividade por hora / por dia
+# ==============================
+
+def total_percentiles(frame, name="rtSketch"):
+    """p50/p90/p99 (minutos) de todas as linhas do frame."""
+    import numpy as np
+    from common.columnar import percentiles_by
+
+    return percentiles_by(frame, np.zeros(len(frame["hour"]), dtype=np.int64), 1, name)[0]
+
+
+def hourly_payload(frame, day, date_str=None):
+    from common.columnar import average_minutes, local_window, percentiles_by, sum_by
+
+    # Totais por hora local
+    frame, local_hour = local_window(frame, day, 1)
+    per_hour = sum_by(frame, local_hour, 24)
+    hour_percentiles = percentiles_by(frame, local_hour, 24)
+
+    data = []
+    for h in range(24):
+        data.append({
+            "hour": f"{h:02d}:00",
+            "messages": int(per_hour["messages"][h]),
+            "responseTime": {
+                "average": average_minutes(per_hour["rtSumSec"][h], per_hour["rtCount"][h]),
+                **hour_percentiles[h],
+                "unit": "minutes"
+            }
+        })
+
+    summary = {
+        "totalMessages": int(per_hour["messages"].sum()),
+        "averageResponseTime": average_minutes(per_hour["rtSumSec"].sum(), per_hour["rtCount"].sum()),
+        "responseTimePercentiles": dict(total_percentiles(frame), unit="minutes")
+    }
+
+    return {
+        "date": date_str or day.isoformat(),
+        "data": data,
+        "summary": summary
+    }
+
+
+def day_totals(frame, start_day, num_days):
+    """Totais de cada dia local a partir de start_day (rows, messages, rtSumSec, rtCount, rtSketch)."""
+    from common.columnar import local_window, sketches_by, sum_by
+
+    # Dia local de cada linha, relativo ao start_day
+    frame, local_hour = local_window(frame, start_day, num_days)
+    per_day = sum_by(frame, local_hour // 24, num_days)
+    sketches = sketches_by(frame, local_hour // 24, num_days)
+    return [{
+        "rows": int(per_day["rows"][offset]),
+        "messages": int(per_day["messages"][offset]),
+        "rtSumSec": int(per_day["rtSumSec"][offset]),
+        "rtCount": int(per_day["rtCount"][offset]),
+        "rtSketch": sketches[offset],
+    } for offset in range(num_days)]
+
+
+def weekly_payload(frame, start_day, end_day, granularity="day"):
+    from common.day_summaries import DAY, group_buckets
+
+    num_days = max((end_day - start_day).days + 1, 0)
+    days = [(DAY, None, start_day + timedelta(days=offset), start_day + timedelta(days=offset), totals)
+            for offset, totals in enumerate(day_totals(frame, start_day, num_days))]
+    return weekly_from_buckets(group_buckets(days, granularity), start_day, end_day, granularity)
+
+
+def weekly_from_buckets(buckets, start_day, end_day, granularity="day"):
+    """Corpo de /activity/weekly a partir dos totais por bucket (common.day_summaries.group_buckets).
+
+    granularity day → um item por dia (date, dayOfWeek); week/month → um por semana
+    ISO / mês (week ou month, start e end recortados ao período).
+    """
+    from common import sketch
+    from common.columnar import average_minutes
+
+    data = []
+    merged = {}
+    for key, first, last, totals in buckets:
+        sketch.merge(merged, totals["rtSketch"])
+        if not totals["rows"]:
+            continue
+        if granularity == "day":
+            entry = {"date": first.isoformat(), "dayOfWeek": calendar.day_name[first.weekday()]}
+        else:
+            entry = {granularity: key, "start": first.isoformat(), "end": last.isoformat()}
+        entry["messages"] = totals["messages"]
+        entry["responseTime"] = {
+            "average": average_minutes(totals["rtSumSec"], totals["rtCount"]),
+            **sketch.percentiles(totals["rtSketch"]),
+            "unit": "minutes"
+        }
+        data.append(entry)
+
+    summary = {
+        "totalMessages": sum(bucket[3]["messages"] for bucket in buckets),
+        "averageResponseTime": average_minutes(sum(bucket[3]["rtSumSec"] for bucket in buckets),
+                                               sum(bucket[3]["rtCount"] for bucket in buckets)),
+        "responseTimePercentiles": dict(sketch.percentiles(merged), unit="minutes")
+    }
+
+    return {
+        "period": {
+            "start": start_day.isoformat(),
+            "end": end_day.isoformat(),
+            "granularity": granularity
+        },
+        "data": data,
+        "summary": summary
+    }
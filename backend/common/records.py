@@ -0,0 +1,108 @@
+import gc
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from operator import attrgetter
+
+from common.messages import iter_window, parse_timestamp
+
+# ==============================
+# 🧱 Registro compacto de mensagem
+# As mensagens lidas do DynamoDB viram MessageRecord logo na carga: timestamp
+# convertido uma vez para epoch (segundos, int), groupId internado, direção
+# canônica e content/from decodificados só quando alguém pede.
+# ==============================
+
+# Direções canônicas: um objeto só por valor, comparação por identidade
+CLIENT = sys.intern("client")
+TEAM = sys.intern("team")
+DIRECTIONS = {"client": CLIENT, "team": TEAM}
+
+_fromisoformat = datetime.fromisoformat
+_intern = sys.intern
+
+
+def epoch_seconds(ts):
+    # Python 3.11+ aceita o sufixo "Z" direto; o replace de parse_timestamp fica
+    # só para formatos que o fromisoformat não reconhece
+    try:
+        return int(_fromisoformat(ts).timestamp())
+    except ValueError:
+        return int(parse_timestamp(ts).timestamp())
+
+
+class MessageRecord:
+    __slots__ = ("message_id", "group_id", "timestamp", "epoch", "direction", "_content", "_sender")
+
+    def __init__(self, message_id, group_id, timestamp, epoch, direction, content=None, sender=None):
+        self.message_id = message_id
+        self.group_id = group_id
+        self.timestamp = timestamp
+        self.epoch = epoch
+        self.direction = direction
+        self._content = content
+        self._sender = sender
+
+    @property
+    def content(self):
+        # JSON decodificado na primeira leitura e guardado no lugar da string
+        if isinstance(self._content, str):
+            self._content = json.loads(self._content)
+        return self._content or {}
+
+    @property
+    def sender(self):
+        if isinstance(self._sender, str):
+            self._sender = json.loads(self._sender)
+        return self._sender or {}
+
+    @property
+    def text(self):
+        return self.content.get("text", "")
+
+    def __repr__(self):
+        return f"MessageRecord({self.group_id!r}, {self.timestamp!r}, {self.direction!r})"
+
+
+def to_record(item):
+    ts = item["timestamp"]
+    direction = item.get("direction")
+    return MessageRecord(
+        item.get("messageId"),
+        _intern(item["groupId"]),
+        ts,
+        epoch_seconds(ts),
+        DIRECTIONS.get(direction, direction),
+        item.get("content"),
+        item.get("from"),
+    )
+
+
+_by_timestamp = attrgetter("timestamp")
+
+
+@contextmanager
+def gc_paused():
+    # Cargas grandes criam milhões de objetos sem ciclos: o GC cíclico só
+    # gastaria CPU varrendo-os, então fica desligado durante a carga
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def to_records(items):
+    """Registros das mensagens, ordenados por timestamp."""
+    with gc_paused():
+        records = list(map(to_record, items))
+        records.sort(key=_by_timestamp)
+    return records
+
+
+def load_records(table, start, end, group_id=None, fields=None):
+    """query_window em registros: mensagens em [start, end), ordenadas por timestamp."""
+    return to_records(iter_window(table, start, end, group_id=group_id, fields=fields))
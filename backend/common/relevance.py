@@ -0,0 +1,83 @@
+import functools
+import re
+import unicodedata
+
+# ==============================
+# 🙈 Mensagens de cliente que não exigem resposta ("ok", "obrigado", ...)
+# Compartilhado por alerts, groupsOverview e pelo estado por grupo.
+# Os termos são normalizados uma vez no import; cada texto é normalizado,
+# comparado com todos os termos em uma chamada (extractOne) e contra uma
+# única regex com as alternativas, e o resultado fica memorizado.
+# O rapidfuzz e o classificador do módulo só são carregados na primeira
+# classificação (modo materializado não classifica nada).
+# ==============================
+
+IGNORED_MESSAGES = [
+    "ok", "obrigado", "obrigada", "valeu", "vlw", "tks", "thanks",
+    " obrigado(a)", "obrigadão", "tudo certo", "tudo bem",
+    "tudo tranquilo", "tudo ok", "tudo beleza"
+]
+
+# Similaridade (fuzz.ratio) acima disso → irrelevante
+SIMILARITY_THRESHOLD = 85
+MEMO_SIZE = 8192
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_text(text):
+    text = text.lower().strip()
+    text = "".join(
+        c for c in unicodedata.normalize("NFD", text)
+        if unicodedata.category(c) != "Mn"
+    )
+    text = _PUNCTUATION.sub("", text)  # remove pontuação
+    return text
+
+
+class RelevanceClassifier:
+
+    def __init__(self, terms, threshold=SIMILARITY_THRESHOLD, memo_size=MEMO_SIZE):
+        self.terms = list(dict.fromkeys(normalize_text(term) for term in terms))
+        self.threshold = threshold
+        # Termo presente como palavra isolada; uma regex só para todos os termos
+        self.pattern = re.compile(r"\b(?:" + "|".join(re.escape(t) for t in self.terms) + r")\b")
+        self._classify = functools.lru_cache(maxsize=memo_size)(self._classify_normalized)
+        from rapidfuzz import fuzz, process
+        self._extract_one = process.extractOne
+        self._ratio = fuzz.ratio
+
+    def _classify_normalized(self, norm):
+        # 1️⃣ Similaridade alta com algum termo → irrelevante
+        best = self._extract_one(norm, self.terms, scorer=self._ratio, processor=None,
+                                 score_cutoff=self.threshold)
+        if best is not None and best[1] > self.threshold:
+            return True
+
+        # 2️⃣ Termo presente como palavra isolada → irrelevante
+        return self.pattern.search(norm) is not None
+
+    def is_irrelevant(self, text):
+        if not text:
+            return True
+        return self._classify(normalize_text(text))
+
+    def classify_many(self, texts):
+        """is_irrelevant de vários textos; cada texto distinto é avaliado uma vez."""
+        results = {}
+        for text in texts:
+            if text not in results:
+                results[text] = self.is_irrelevant(text)
+        return [results[text] for text in texts]
+
+    def memo_info(self):
+        return self._classify.cache_info()
+
+
+@functools.lru_cache(maxsize=None)
+def default_classifier():
+    return RelevanceClassifier(IGNORED_MESSAGES)
+
+
+def is_irrelevant_message(text):
+    return default_classifier().is_irrelevant(text)
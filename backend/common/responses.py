@@ -0,0 +1,112 @@
+import base64
+import functools
+import gzip
+import json
+
+from common.conditional import request_header
+
+# ==============================
+# 🗜️ Corpo das respostas: JSON compacto + compressão negociada
+# dumps() sem espaços depois de "," e ":" (mesmo JSON, ~10% menor).
+# compressed_endpoint comprime o corpo das respostas 200 acima de
+# MIN_COMPRESS_BYTES conforme o Accept-Encoding: br (se o módulo brotli
+# estiver no layer) > gzip > sem compressão. O API Gateway recebe o corpo
+# em base64 com isBase64Encoded (BinaryMediaTypes "*/*" na API) e entrega
+# binário ao cliente. 304 e erros passam direto.
+# ==============================
+
+COMPACT = (",", ":")
+
+# Abaixo disso o ganho não paga o custo (cabeçalho do gzip, base64 +33%)
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def dumps(data):
+    return json.dumps(data, separators=COMPACT)
+
+
+@functools.lru_cache(maxsize=None)
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def available_encodings():
+    return ("br", "gzip") if _brotli() is not None else ("gzip",)
+
+
+def accepted_encodings(header):
+    """{codificação: q} do Accept-Encoding (q=0 recusa; "*" vale para as não citadas)."""
+    accepted = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for encoding in available_encodings():  # em ordem de preferência
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return _brotli().compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, accept_encoding, min_bytes=MIN_COMPRESS_BYTES):
+    """Resposta com o corpo comprimido (base64) se o cliente aceitar e valer a pena."""
+    body = response.get("body")
+    if response.get("statusCode") != 200 or not body or response.get("isBase64Encoded"):
+        return response
+    headers = dict(response.get("headers") or {}, Vary="Accept-Encoding")
+    raw = body.encode("utf-8")
+    encoding = choose_encoding(accept_encoding) if len(raw) >= min_bytes else None
+    if encoding is None:
+        return dict(response, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return dict(response, headers=headers, isBase64Encoded=True,
+                body=base64.b64encode(compress(raw, encoding)).decode("ascii"))
+
+
+def compressed_endpoint(handler):
+    """Decorator do lambda_handler: comprime o corpo conforme o Accept-Encoding do pedido."""
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        return compress_response(handler(event, context), request_header(event, "Accept-Encoding"))
+    return wrapper
+
+
+def decode_body(response):
+    """Corpo em texto de uma resposta de compressed_endpoint (testes, benchmarks)."""
+    body = response["body"]
+    if not response.get("isBase64Encoded"):
+        return body
+    data = base64.b64decode(body)
+    encoding = (response.get("headers") or {}).get("Content-Encoding")
+    if encoding == "br":
+        data = _brotli().decompress(data)
+    elif encoding == "gzip":
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
@@ -0,0 +1,602 @@
+import base64
+import os
+from collections import defaultdict
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+from common.messages import iter_pages, iter_parallel
+from common.pairing import EACH_CLIENT, LAST_CLIENT, MAX_RESPONSE_MINUTES, pair_responses
+from common.records import CLIENT, TEAM, epoch_seconds, gc_paused, to_records
+from common import sketch, stream
+
+# ==============================
+# 📈 Rollups por (dia, hora, grupo) na tabela de métricas
+#   Partition Key: date       (YYYY-MM-DD do timestamp, UTC)
+#   Sort Key:      metricType ("hour#<groupId>#<HH>")
+# Mantidos pelo stream de crm-mensagens (rollups/app.py) e lidos pelos
+# endpoints de atividade/métricas em O(horas × grupos).
+# O tempo de resposta é atribuído à hora da mensagem do cliente:
+#   rt*     → toda mensagem pendente do cliente (activity/*)
+#   rtLast* → só a última antes da resposta (metricsToday)
+# Percentis: sketches rtSketch / rtLastSketch ({balde: contagem}, common.sketch),
+# gravados como atributos rtq_<balde> / rtLastq_<balde> somados com ADD.
+# Membros e tipos de mensagem (GET /groups/{groupId}/stats) em itens à parte,
+# mesma chave de tempo:  metricType "members#<groupId>#<HH>"
+#   text/media/documents (ADD) e, por membro (id ou telefone do remetente, em
+#   base64 url-safe: ids têm "." e o nome do atributo não pode virar caminho):
+#   c#<id> mensagens, t#<id> mensagens do time (ADD), l#<id> última mensagem,
+#   n#<id>/a#<id> nome da última mensagem com nome e quando (SET condicional)
+# Reentregas do stream (common.stream): as mensagens aplicadas viram
+# marcadores em crm-stream-applied e os deltas do lote vão num item de lote
+# (outbox, com TTL) lá também; o registro de pendentes do grupo guarda só o
+# token do lote na mesma escrita condicional que avança a versão. Cada linha
+# horária guarda a última versão do grupo aplicada (appliedVersion) e só soma
+# um outbox mais novo: falhar no meio e reaplicar não conta nada duas vezes.
+# ==============================
+
+STREAM_CONSUMER = "rollups"
+
+METRICS_TABLE = "crm-metricas"
+
+HOUR_PREFIX = "hour#"
+MEMBER_PREFIX = "members#"
+# Clientes aguardando resposta por grupo (estado do pareamento incremental)
+PENDING_DATE = "pending"
+
+COUNTERS = ("messages", "clientMessages", "teamMessages", "rtSum", "rtCount", "rtLastSum", "rtLastCount")
+# content.type → contador de tipo (byType de /groups/{groupId}/stats)
+TYPE_KEYS = {"text": "text", "media": "media", "document": "documents"}
+
+
+def rollups_enabled():
+    # Só liga depois do backfill (parâmetro RollupsEnabled no template)
+    return os.environ.get("ROLLUPS_ENABLED", "false").lower() == "true"
+
+
+def hour_key(group_id, hour):
+    return f"{HOUR_PREFIX}{group_id}#{hour}"
+
+
+def member_key(group_id, hour):
+    return f"{MEMBER_PREFIX}{group_id}#{hour}"
+
+
+def member_attr(prefix, member_id):
+    encoded = base64.urlsafe_b64encode(member_id.encode()).decode().rstrip("=")
+    return f"{prefix}#{encoded}"
+
+
+def _member_id(encoded):
+    return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode()
+
+
+def bucket_of(ts):
+    # (date, hour) direto da string do timestamp, sem parse
+    return ts[:10], ts[11:13]
+
+
+_EMPTY_ROW = dict.fromkeys(COUNTERS, 0)
+_EMPTY_ROW.update({"rtMin": None, "rtMax": None, "lastTimestamp": None, "lastDirection": None})
+
+
+def new_row(date, hour, group_id):
+    row = {"date": date, "hour": hour, "groupId": group_id}
+    row.update(_EMPTY_ROW)
+    # Sketches mutáveis: um dict novo por linha
+    row.update({name: {} for name in sketch.SKETCH_FIELDS})
+    return row
+
+
+def _add_sample(row, delta_min, last=False):
+    seconds = round(delta_min * 60)
+    if last:
+        row["rtLastSum"] += delta_min
+        row["rtLastCount"] += 1
+        sketch.add(row["rtLastSketch"], seconds)
+        return
+    row["rtSum"] += delta_min
+    row["rtCount"] += 1
+    sketch.add(row["rtSketch"], seconds)
+    row["rtMin"] = delta_min if row["rtMin"] is None else min(row["rtMin"], delta_min)
+    row["rtMax"] = delta_min if row["rtMax"] is None else max(row["rtMax"], delta_min)
+
+
+def _count(row, record):
+    direction = record.direction
+    row["messages"] += 1
+    if direction is CLIENT:
+        row["clientMessages"] += 1
+    elif direction is TEAM:
+        row["teamMessages"] += 1
+    if row["lastTimestamp"] is None or record.timestamp >= row["lastTimestamp"]:
+        row["lastTimestamp"] = record.timestamp
+        row["lastDirection"] = direction
+
+
+def compute_rollups(records):
+    """Rollups calculados direto das mensagens (backfill, checker e modo sem rollups).
+
+    records: MessageRecord ordenados por timestamp. Retorna {(date, hour, groupId): row}.
+    """
+    with gc_paused():
+        return _compute_rollups(records)
+
+
+def _compute_rollups(records):
+    rows = {}
+    events = []
+    for record in records:
+        date, hour = bucket_of(record.timestamp)
+        key = (date, hour, record.group_id)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = new_row(*key)
+        _count(row, record)
+        events.append((record.group_id, record.epoch, record.direction, row))
+
+    for row, _, delta_min in pair_responses(events, mode=EACH_CLIENT):
+        _add_sample(row, delta_min)
+    for row, _, delta_min in pair_responses(events, mode=LAST_CLIENT):
+        _add_sample(row, delta_min, last=True)
+    # Mesma precisão gravada na tabela: com ou sem rollups a resposta é igual
+    for row in rows.values():
+        for name in ("rtSum", "rtLastSum", "rtMin", "rtMax"):
+            if isinstance(row[name], float):
+                row[name] = round(row[name], 4)
+    return rows
+
+
+def new_member_row(date, hour, group_id):
+    return {"date": date, "hour": hour, "groupId": group_id,
+            "types": dict.fromkeys(TYPE_KEYS.values(), 0), "members": {}}
+
+
+def _new_member():
+    return {"count": 0, "team": 0, "last": None, "name": None, "nameAt": None}
+
+
+def _count_member(row, record):
+    kind = TYPE_KEYS.get(record.content.get("type"))
+    if kind:
+        row["types"][kind] += 1
+    sender = record.sender
+    member_id = sender.get("id") or sender.get("phone")
+    if not member_id:
+        return
+    member = row["members"].get(member_id)
+    if member is None:
+        member = row["members"][member_id] = _new_member()
+    member["count"] += 1
+    if record.direction is TEAM:
+        member["team"] += 1
+    ts = record.timestamp
+    if member["last"] is None or ts > member["last"]:
+        member["last"] = ts
+    name = sender.get("name")
+    if name and (member["nameAt"] is None or ts > member["nameAt"]):
+        member["name"], member["nameAt"] = name, ts
+
+
+def compute_member_rollups(records):
+    """Membros e tipos por (date, hour, groupId) das mensagens com content/from.
+
+    records: MessageRecord ordenados por timestamp. Retorna {(date, hour, groupId): row}.
+    """
+    rows = {}
+    for record in records:
+        key = bucket_of(record.timestamp) + (record.group_id,)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = new_member_row(*key)
+        _count_member(row, record)
+    return rows
+
+
+# ==============================
+# 📥 Leitura
+# ==============================
+
+def _number(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def row_from_item(item):
+    _, group_id, hour = item["metricType"].rsplit("#", 2)
+    row = new_row(item["date"], hour, group_id)
+    for name in COUNTERS + ("rtMin", "rtMax"):
+        if name in item:
+            row[name] = _number(item[name])
+    row["lastTimestamp"] = item.get("lastTimestamp")
+    row["lastDirection"] = item.get("lastDirection")
+    for name in sketch.SKETCH_FIELDS:
+        row[name] = sketch.from_attributes(name, item)
+    return row
+
+
+def member_row_from_item(item):
+    _, group_id, hour = item["metricType"].rsplit("#", 2)
+    row = new_member_row(item["date"], hour, group_id)
+    for kind in TYPE_KEYS.values():
+        row["types"][kind] = int(item.get(kind, 0))
+    members = row["members"]
+    for name, value in item.items():
+        prefix, _, encoded = name.partition("#")
+        if not encoded or prefix not in ("c", "t", "l", "n", "a"):
+            continue
+        member_id = _member_id(encoded)
+        member = members.get(member_id)
+        if member is None:
+            member = members[member_id] = _new_member()
+        if prefix in ("c", "t"):
+            member["count" if prefix == "c" else "team"] = int(value)
+        else:
+            member[{"l": "last", "n": "name", "a": "nameAt"}[prefix]] = value
+    return row
+
+
+def _query_prefix(metrics_table, dates, prefix):
+    from boto3.dynamodb.conditions import Key
+
+    # Um query por dia, em paralelo (ordem das linhas não garantida)
+    streams = [
+        iter_pages(
+            metrics_table.query,
+            KeyConditionExpression=Key("date").eq(date) & Key("metricType").begins_with(prefix),
+        )
+        for date in dates
+    ]
+    return iter_parallel(streams) if streams else []
+
+
+def load_member_rollups(metrics_table, dates, group_id):
+    """Membros e tipos por hora de um grupo nos dias pedidos."""
+    return [member_row_from_item(item) for item in _query_prefix(metrics_table, dates, member_key(group_id, ""))]
+
+
+def load_rollups(metrics_table, dates, group_id=None):
+    """Rollups horários dos dias pedidos (opcionalmente de um grupo só)."""
+    prefix = hour_key(group_id, "") if group_id else HOUR_PREFIX
+    return [row_from_item(item) for item in _query_prefix(metrics_table, dates, prefix)]
+
+
+# ==============================
+# 📤 Escrita
+# ==============================
+
+def _decimal(value):
+    return Decimal(str(round(value, 4))) if isinstance(value, float) else value
+
+
+def item_from_row(row):
+    item = {"date": row["date"], "metricType": hour_key(row["groupId"], row["hour"]),
+            "groupId": row["groupId"], "hour": row["hour"]}
+    for name, value in row.items():
+        if name in sketch.SKETCH_FIELDS:
+            item.update(sketch.to_attributes(name, value))
+            continue
+        if name in item or value is None:
+            continue
+        item[name] = _decimal(value)
+    return item
+
+
+def write_rollups(metrics_table, rows):
+    with metrics_table.batch_writer() as batch:
+        for row in rows:
+            batch.put_item(Item=item_from_row(row))
+
+
+def item_from_member_row(row):
+    item = {"date": row["date"], "metricType": member_key(row["groupId"], row["hour"]),
+            "groupId": row["groupId"], "hour": row["hour"]}
+    item.update((kind, count) for kind, count in row["types"].items() if count)
+    for member_id, member in row["members"].items():
+        item[member_attr("c", member_id)] = member["count"]
+        if member["team"]:
+            item[member_attr("t", member_id)] = member["team"]
+        item[member_attr("l", member_id)] = member["last"]
+        if member["name"]:
+            item[member_attr("n", member_id)] = member["name"]
+            item[member_attr("a", member_id)] = member["nameAt"]
+    return item
+
+
+def write_member_rollups(metrics_table, rows):
+    with metrics_table.batch_writer() as batch:
+        for row in rows:
+            batch.put_item(Item=item_from_member_row(row))
+
+
+def _versioned_update(metrics_table, key, sets, adds, names, values, version):
+    # SET + ADD de uma linha; com version, só se o outbox dessa versão ainda não passou por ela
+    from boto3.dynamodb.conditions import Attr
+
+    kwargs = {}
+    if version is not None:
+        names["#av"], values[":av"] = "appliedVersion", version
+        sets = sets + ["#av = :av"]
+        kwargs["ConditionExpression"] = Attr("appliedVersion").not_exists() | Attr("appliedVersion").lt(version)
+    expression = "SET " + ", ".join(sets)
+    if adds:
+        expression += " ADD " + ", ".join(adds)
+    try:
+        metrics_table.update_item(Key=key, UpdateExpression=expression,
+                                  ExpressionAttributeNames=names, ExpressionAttributeValues=values, **kwargs)
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
+def _apply_member_delta(metrics_table, row, version=None):
+    from boto3.dynamodb.conditions import Attr
+
+    key = {"date": row["date"], "metricType": member_key(row["groupId"], row["hour"])}
+    names = {"#g": "groupId", "#h": "hour"}
+    values = {":g": row["groupId"], ":h": row["hour"]}
+    adds = []
+    counters = list(row["types"].items())
+    for member_id, member in row["members"].items():
+        counters += [(member_attr("c", member_id), member["count"]), (member_attr("t", member_id), member["team"])]
+    for i, (name, count) in enumerate(counters):
+        if count:
+            names[f"#n{i}"], values[f":n{i}"] = name, count
+            adds.append(f"#n{i} :n{i}")
+    _versioned_update(metrics_table, key, ["#g = :g", "#h = :h"], adds, names, values, version)
+
+    # Última mensagem e nome: só se forem mais novos que os gravados (idempotente)
+    for member_id, member in row["members"].items():
+        last, name_at = member_attr("l", member_id), member_attr("a", member_id)
+        _set_if(metrics_table, key, {last: member["last"]},
+                Attr(last).not_exists() | Attr(last).lt(member["last"]))
+        if member["name"]:
+            _set_if(metrics_table, key, {member_attr("n", member_id): member["name"], name_at: member["nameAt"]},
+                    Attr(name_at).not_exists() | Attr(name_at).lt(member["nameAt"]))
+
+
+def _apply_delta(metrics_table, row, version=None):
+    from boto3.dynamodb.conditions import Attr
+
+    key = {"date": row["date"], "metricType": hour_key(row["groupId"], row["hour"])}
+    names = {"#g": "groupId", "#h": "hour"}
+    values = {":g": row["groupId"], ":h": row["hour"]}
+    adds = []
+    for name in COUNTERS:
+        if row[name]:
+            names[f"#{name}"] = name
+            values[f":{name}"] = _decimal(row[name])
+            adds.append(f"#{name} :{name}")
+    for field in sketch.SKETCH_FIELDS:
+        for name, count in sketch.to_attributes(field, row[field]).items():
+            names[f"#{name}"] = name
+            values[f":{name}"] = count
+            adds.append(f"#{name} :{name}")
+    _versioned_update(metrics_table, key, ["#g = :g", "#h = :h"], adds, names, values, version)
+
+    # min/max/última mensagem: atualizações condicionais (só se melhorar o valor atual),
+    # idempotentes, então reaplicadas sem problema
+    conditional = []
+    if row["rtMin"] is not None:
+        conditional.append(("rtMin", row["rtMin"], Attr("rtMin").not_exists() | Attr("rtMin").gt(_decimal(row["rtMin"]))))
+        conditional.append(("rtMax", row["rtMax"], Attr("rtMax").not_exists() | Attr("rtMax").lt(_decimal(row["rtMax"]))))
+    for name, value, condition in conditional:
+        _set_if(metrics_table, key, {name: _decimal(value)}, condition)
+    if row["lastTimestamp"]:
+        _set_if(metrics_table, key,
+                {"lastTimestamp": row["lastTimestamp"], "lastDirection": row["lastDirection"]},
+                Attr("lastTimestamp").not_exists() | Attr("lastTimestamp").lte(row["lastTimestamp"]))
+
+
+def _set_if(table, key, fields, condition):
+    names = {f"#f{i}": name for i, name in enumerate(fields)}
+    values = {f":f{i}": value for i, value in enumerate(fields.values())}
+    try:
+        table.update_item(
+            Key=key,
+            UpdateExpression="SET " + ", ".join(f"#f{i} = :f{i}" for i in range(len(fields))),
+            ConditionExpression=condition,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
+def _load_pending(metrics_table, group_id):
+    return metrics_table.get_item(
+        Key={"date": PENDING_DATE, "metricType": group_id}, ConsistentRead=True
+    ).get("Item") or {}
+
+
+def _save_pending(metrics_table, group_id, clients, version, outbox):
+    from boto3.dynamodb.conditions import Attr
+
+    condition = Attr("version").not_exists() if version is None else Attr("version").eq(version)
+    metrics_table.put_item(
+        Item={"date": PENDING_DATE, "metricType": group_id, "clients": clients,
+              "version": (version or 0) + 1, "outbox": outbox},
+        ConditionExpression=condition,
+    )
+
+
+def _flush_outbox(metrics_table, dynamodb, group_id, version, outbox, now):
+    # Deltas do lote `outbox` gravado com os pendentes na versão `version`: linhas
+    # que já os receberam (appliedVersion >= version) são puladas
+    from boto3.dynamodb.conditions import Attr
+
+    if isinstance(outbox, list):
+        # Registro gravado antes dos itens de lote: deltas no próprio registro
+        batch = {"outbox": outbox, "messageIds": []}
+    else:
+        batch = stream.load_batch(dynamodb, STREAM_CONSUMER, outbox)
+        if batch is None:
+            print(f"⚠️ Lote {outbox} dos rollups do grupo {group_id} expirou antes de ser aplicado")
+            batch = {"outbox": [], "messageIds": []}
+    for item in batch["outbox"]:
+        if item["metricType"].startswith(MEMBER_PREFIX):
+            _apply_member_delta(metrics_table, member_row_from_item(item), version)
+        else:
+            _apply_delta(metrics_table, row_from_item(item), version)
+    stream.write_markers(dynamodb, STREAM_CONSUMER, batch["messageIds"], now)
+    try:
+        metrics_table.update_item(
+            Key={"date": PENDING_DATE, "metricType": group_id},
+            UpdateExpression="REMOVE #o",
+            ConditionExpression=Attr("version").eq(version),
+            ExpressionAttributeNames={"#o": "outbox"},
+        )
+    except ClientError as exc:
+        # Outro shard já gravou uma versão nova (e aplicou este outbox antes)
+        if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
+def _trim_pending(clients, latest_ts):
+    # Clientes há mais de MAX_RESPONSE_MINUTES nunca geram amostra válida
+    cutoff = epoch_seconds(latest_ts) - MAX_RESPONSE_MINUTES * 60
+    return [ts for ts in clients if epoch_seconds(ts) > cutoff]
+
+
+def _pair_group(records, pending_clients):
+    # Pareia as mensagens novas de um grupo com os clientes que já aguardavam
+    events = []
+    for ts in pending_clients:
+        events.append((None, epoch_seconds(ts), CLIENT, ts))
+    for record in records:
+        events.append((None, record.epoch, record.direction, record.timestamp))
+    events.sort(key=lambda e: (e[1], e[3]))
+
+    samples = [(ts, delta, False) for ts, _, delta in pair_responses(events, mode=EACH_CLIENT)]
+    samples += [(ts, delta, True) for ts, _, delta in pair_responses(events, mode=LAST_CLIENT)]
+
+    waiting = []
+    for _, _, direction, ts in events:
+        if direction is TEAM:
+            waiting = []
+        elif direction is CLIENT:
+            waiting.append(ts)
+    return samples, _trim_pending(waiting, events[-1][3]) if waiting else waiting
+
+
+def _group_rows(group_id, records, pending_clients):
+    # Deltas de um grupo: contagens das mensagens novas + amostras do pareamento
+    rows = {}
+    for record in records:
+        key = bucket_of(record.timestamp) + (group_id,)
+        if key not in rows:
+            rows[key] = new_row(*key)
+        _count(rows[key], record)
+    samples, waiting = _pair_group(records, pending_clients)
+    for client_ts, delta_min, last in samples:
+        key = bucket_of(client_ts) + (group_id,)
+        if key not in rows:
+            rows[key] = new_row(*key)
+        _add_sample(rows[key], delta_min, last=last)
+    return rows, waiting
+
+
+def _load_flushed(metrics_table, dynamodb, group_id, now):
+    # Registro de pendentes com o lote anterior (se houver) já aplicado e marcado
+    pending = _load_pending(metrics_table, group_id)
+    if pending.get("outbox"):
+        # Lote anterior gravou os pendentes e falhou antes de aplicar os deltas
+        _flush_outbox(metrics_table, dynamodb, group_id, pending["version"], pending["outbox"], now)
+    return pending
+
+
+def _apply_group(metrics_table, dynamodb, group_id, records, max_attempts, now):
+    pending = _load_flushed(metrics_table, dynamodb, group_id, now)
+    fresh = stream.fresh_records(records, stream.applied_ids(dynamodb, STREAM_CONSUMER, records))
+    if not fresh:
+        return 0
+    members = [item_from_member_row(row) for row in compute_member_rollups(fresh).values()]
+    # Bloqueio otimista no registro de pendentes: outro shard pode ter mexido no grupo
+    for attempt in range(max_attempts):
+        version = pending.get("version")
+        rows, waiting = _group_rows(group_id, fresh, list(pending.get("clients", [])))
+        outbox = [item_from_row(row) for row in rows.values()] + members
+        token = stream.save_batch(dynamodb, STREAM_CONSUMER, group_id, fresh, now, outbox=outbox)
+        try:
+            _save_pending(metrics_table, group_id, waiting, version, token)
+            break
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "ConditionalCheckFailedException" or attempt == max_attempts - 1:
+                raise
+        pending = _load_flushed(metrics_table, dynamodb, group_id, now)
+    _flush_outbox(metrics_table, dynamodb, group_id, (version or 0) + 1, token, now)
+    return len(outbox)
+
+
+def apply_messages(metrics_table, items, dynamodb, max_attempts=5, now=None):
+    """Aplica um lote de mensagens novas nos rollups (stream de crm-mensagens).
+
+    Idempotente por mensagem (marcadores em crm-stream-applied, via dynamodb).
+    Retorna (linhas atualizadas, groupIds que falharam).
+    """
+    by_group = defaultdict(list)
+    for record in to_records(items):
+        by_group[record.group_id].append(record)
+
+    updated, failed = 0, set()
+    for group_id, records in by_group.items():
+        try:
+            updated += _apply_group(metrics_table, dynamodb, group_id, records, max_attempts, now)
+        except (ClientError, RuntimeError) as exc:
+            print(f"⚠️ Rollups do grupo {group_id} não aplicados: {exc}")
+            failed.add(group_id)
+    return updated, failed
+
+
+def pending_from_messages(records):
+    """Estado de pendentes por grupo a partir das mensagens (usado no backfill)."""
+    waiting = defaultdict(list)
+    latest = None
+    for record in records:
+        latest = record.timestamp
+        if record.direction is TEAM:
+            waiting[record.group_id] = []
+        elif record.direction is CLIENT:
+            waiting[record.group_id].append(record.timestamp)
+    return {g: _trim_pending(ts, latest) for g, ts in waiting.items() if ts}
+
+
+def write_pending(metrics_table, pending):
+    # A versão só cresce: linhas fora do backfill guardam appliedVersion antigas
+    for group_id, clients in pending.items():
+        metrics_table.update_item(
+            Key={"date": PENDING_DATE, "metricType": group_id},
+            UpdateExpression="SET #c = :c REMOVE #o ADD #v :one",
+            ExpressionAttributeNames={"#c": "clients", "#o": "outbox", "#v": "version"},
+            ExpressionAttributeValues={":c": clients, ":one": 1},
+        )
+
+
+# ==============================
+# 🔍 Consistência
+# ==============================
+
+def compare_rollups(expected, actual, tolerance=0.01):
+    """Diferenças entre rollups recalculados (expected) e gravados (actual)."""
+    actual = {(r["date"], r["hour"], r["groupId"]): r for r in actual}
+    diffs = []
+    for key, row in expected.items():
+        stored = actual.pop(key, None)
+        if stored is None:
+            diffs.append((key, "ausente", None, None))
+            continue
+        for name in COUNTERS + ("rtMin", "rtMax"):
+            want, got = row[name], stored[name]
+            if want is None or got is None:
+                if want != got:
+                    diffs.append((key, name, want, got))
+            elif abs(want - got) > tolerance:
+                diffs.append((key, name, want, got))
+        for name in sketch.SKETCH_FIELDS:
+            if row[name] != stored[name]:
+                diffs.append((key, name, row[name], stored[name]))
+    for key in actual:
+        diffs.append((key, "sobrando", None, None))
+    return diffs
@@ -0,0 +1,81 @@
+import bisect
+import math
+
+from common.pairing import MAX_RESPONSE_MINUTES
+
+# ==============================
+# 📐 Sketch de quantis do tempo de resposta (estilo DDSketch)
+# Cada amostra (segundos inteiros, 0 < s < MAX_RESPONSE_MINUTES) cai num
+# balde logarítmico: o balde i cobre (γ^(i-1), γ^i] segundos, γ = (1+α)/(1-α).
+# O sketch é só {balde: contagem}. Juntar horas, dias ou grupos é somar as
+# contagens, sem guardar amostras, e o quantil estimado (2γ^i/(γ+1)) fica a
+# no máximo α (1%) do valor exato da amostra daquele posto.
+# Nos rollups cada balde é um atributo numérico (rtq_<i>, rtLastq_<i>), para
+# o stream somar com ADD como os demais contadores.
+# ==============================
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+
+# Limite superior (segundos) de cada balde; o último cobre MAX_RESPONSE_MINUTES
+UPPER_BOUNDS = tuple(GAMMA ** i for i in range(math.ceil(math.log(MAX_RESPONSE_MINUTES * 60, GAMMA)) + 1))
+BUCKETS = len(UPPER_BOUNDS)
+
+QUANTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+
+# Campo do rollup → prefixo dos atributos na tabela
+SKETCH_FIELDS = {"rtSketch": "rtq_", "rtLastSketch": "rtLastq_"}
+
+
+def bucket(seconds):
+    return min(bisect.bisect_left(UPPER_BOUNDS, seconds), BUCKETS - 1)
+
+
+def bucket_value(index):
+    """Estimativa (segundos) de uma amostra do balde: erro relativo <= RELATIVE_ACCURACY."""
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+def add(sketch, seconds, count=1):
+    index = bucket(seconds)
+    sketch[index] = sketch.get(index, 0) + count
+    return sketch
+
+
+def merge(sketch, other):
+    for index, count in other.items():
+        sketch[index] = sketch.get(index, 0) + count
+    return sketch
+
+
+def quantile(sketch, q):
+    """Quantil q (segundos) do sketch; None se vazio. Posto = floor(q * (n - 1))."""
+    total = sum(sketch.values())
+    if not total:
+        return None
+    rank = math.floor(q * (total - 1))
+    seen = 0
+    for index in sorted(sketch):
+        seen += sketch[index]
+        if seen > rank:
+            return bucket_value(index)
+    return bucket_value(max(sketch))
+
+
+def percentiles(sketch):
+    """{p50, p90, p99} em minutos (0 sem amostras), como os campos dos endpoints."""
+    result = {}
+    for label, q in QUANTILES:
+        value = quantile(sketch, q)
+        result[label] = round(value / 60, 2) if value is not None else 0
+    return result
+
+
+def to_attributes(field, sketch):
+    prefix = SKETCH_FIELDS[field]
+    return {f"{prefix}{index}": count for index, count in sketch.items() if count}
+
+
+def from_attributes(field, item):
+    prefix = SKETCH_FIELDS[field]
+    return {int(name[len(prefix):]): int(value) for name, value in item.items() if name.startswith(prefix)}
@@ -0,0 +1,114 @@
+import time
+import uuid
+
+# ==============================
+# 🔁 Lotes do stream de crm-mensagens (rollups/app.py, groupState/app.py)
+# O Lambda reentrega o lote (inteiro, a partir do registro que falhou ou
+# dividido ao meio com BisectBatchOnFunctionError), inclusive mensagens já
+# aplicadas. Cada mensagem aplicada por um consumidor vira um marcador pequeno
+# em crm-stream-applied (id = "<consumidor>#<messageId>", TTL em expiresAt),
+# que vive só pelo tempo de retenção do stream: o estado agregado não cresce
+# com o volume do grupo.
+# O estado e os marcadores não são gravados juntos, então cada escrita do
+# estado aponta (token) para um item de lote ("<consumidor>#batch#<token>",
+# com os messageIds) gravado antes dela. Quem lê o estado com o ponteiro
+# grava os marcadores desse lote antes de qualquer coisa (finish) e só então
+# consulta os marcadores das mensagens novas: mensagem já aplicada é ignorada.
+# Grupos que falham voltam como batchItemFailures (SequenceNumber), sem
+# derrubar o lote inteiro.
+# ==============================
+
+APPLIED_TABLE = "crm-stream-applied"
+STREAM_RETENTION_SECONDS = 24 * 3600
+BATCH_GET_LIMIT = 100  # máximo de chaves por BatchGetItem
+MAX_BATCH_ATTEMPTS = 5
+
+
+def _deserialize(image):
+    from boto3.dynamodb.types import TypeDeserializer
+
+    deserializer = TypeDeserializer()
+    return {k: deserializer.deserialize(v) for k, v in image.items()}
+
+
+def new_messages(event):
+    """[(SequenceNumber, item)] das mensagens inseridas no lote."""
+    return [
+        (record["dynamodb"].get("SequenceNumber"), _deserialize(record["dynamodb"]["NewImage"]))
+        for record in event.get("Records", [])
+        if record.get("eventName") == "INSERT" and "NewImage" in record.get("dynamodb", {})
+    ]
+
+
+def _expires(now):
+    return int(now if now is not None else time.time()) + STREAM_RETENTION_SECONDS
+
+
+def _marker_id(consumer, message_id):
+    return f"{consumer}#{message_id}"
+
+
+def applied_ids(dynamodb, consumer, records):
+    """messageIds dos registros (MessageRecord) que o consumidor já aplicou.
+
+    RuntimeError se alguma chave ficar sem resposta: na dúvida o grupo falha
+    (e volta no lote), em vez de contar de novo.
+    """
+    ids = sorted({record.message_id for record in records if record.message_id is not None})
+    found = set()
+    for i in range(0, len(ids), BATCH_GET_LIMIT):
+        request = {APPLIED_TABLE: {
+            "Keys": [{"id": _marker_id(consumer, message_id)} for message_id in ids[i:i + BATCH_GET_LIMIT]],
+            "ConsistentRead": True,
+        }}
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            response = dynamodb.batch_get_item(RequestItems=request)
+            found.update(item["id"] for item in response.get("Responses", {}).get(APPLIED_TABLE, []))
+            request = response.get("UnprocessedKeys") or {}
+            if not request:
+                break
+            time.sleep(0.05 * 2 ** attempt)
+        else:
+            raise RuntimeError(f"{len(request[APPLIED_TABLE]['Keys'])} marcadores sem resposta "
+                               f"após {MAX_BATCH_ATTEMPTS} tentativas")
+    prefix = len(consumer) + 1
+    return {marker[prefix:] for marker in found}
+
+
+def fresh_records(records, applied):
+    """Registros ainda não aplicados (sem messageId não dá para marcar: sempre entram)."""
+    return [record for record in records if record.message_id is None or record.message_id not in applied]
+
+
+def save_batch(dynamodb, consumer, group_id, records, now=None, **fields):
+    """Grava o lote (messageIds e fields) que a próxima escrita do estado vai aplicar; retorna o token."""
+    token = uuid.uuid4().hex
+    item = {"id": f"{consumer}#batch#{token}", "groupId": group_id, "expiresAt": _expires(now),
+            "messageIds": [record.message_id for record in records if record.message_id is not None]}
+    item.update(fields)
+    dynamodb.Table(APPLIED_TABLE).put_item(Item=item)
+    return token
+
+
+def load_batch(dynamodb, consumer, token):
+    """Lote gravado por save_batch, ou None se já expirou."""
+    return dynamodb.Table(APPLIED_TABLE).get_item(
+        Key={"id": f"{consumer}#batch#{token}"}, ConsistentRead=True
+    ).get("Item")
+
+
+def write_markers(dynamodb, consumer, message_ids, now=None):
+    """Marca as mensagens como aplicadas (PutItem idempotente, em lotes de 25)."""
+    expires = _expires(now)
+    with dynamodb.Table(APPLIED_TABLE).batch_writer(overwrite_by_pkeys=["id"]) as batch:
+        for message_id in message_ids:
+            batch.put_item(Item={"id": _marker_id(consumer, message_id), "expiresAt": expires})
+
+
+def batch_failures(messages, failed_groups):
+    """Resposta do handler: os registros dos grupos que falharam (ReportBatchItemFailures)."""
+    return {"batchItemFailures": [
+        {"itemIdentifier": sequence}
+        for sequence, item in messages
+        if item.get("groupId") in failed_groups
+    ]}
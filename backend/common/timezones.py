@@ -0,0 +1,111 @@
+import os
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+# ==============================
+# 🕒 Fuso horário dos endpoints (dias/horas locais)
+# As mensagens e os rollups continuam em UTC; a conversão para o fuso da
+# implantação (variável TIMEZONE, nome IANA) usa uma tabela de offsets
+# calculada uma vez por instância: bucket local = epoch + offset, sem
+# aritmética de datetime por mensagem.
+# ==============================
+
+DEFAULT_TIMEZONE = "America/Sao_Paulo"
+
+# Intervalo coberto pela tabela; fora dele vale o offset da borda
+FIRST_YEAR = 2010
+LAST_YEAR = 2040
+
+DAY = 86400
+EPOCH_DAY = date(1970, 1, 1)
+
+
+def timezone_name():
+    return os.environ.get("TIMEZONE") or DEFAULT_TIMEZONE
+
+
+def _offset_at(zone, epoch):
+    return int(datetime.fromtimestamp(epoch, timezone.utc).astimezone(zone).utcoffset().total_seconds())
+
+
+@lru_cache(maxsize=None)
+def offset_table(name):
+    """(starts, offsets): offsets[i] (segundos) vale de starts[i] (epoch UTC) até starts[i + 1]."""
+    zone = ZoneInfo(name)
+    first = int(datetime(FIRST_YEAR, 1, 1, tzinfo=timezone.utc).timestamp())
+    last = int(datetime(LAST_YEAR, 1, 1, tzinfo=timezone.utc).timestamp())
+
+    starts, offsets = [float("-inf")], [_offset_at(zone, first)]
+    # Amostra semanal; cada mudança é localizada ao segundo por bisseção
+    for lo in range(first, last, 7 * DAY):
+        hi = lo + 7 * DAY
+        after = _offset_at(zone, hi)
+        if after == offsets[-1]:
+            continue
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if _offset_at(zone, mid) == offsets[-1]:
+                lo = mid
+            else:
+                hi = mid
+        starts.append(hi)
+        offsets.append(after)
+    return starts, offsets
+
+
+def utc_offset(epoch, name=None):
+    """Offset (segundos) do fuso no instante epoch (UTC)."""
+    starts, offsets = offset_table(name or timezone_name())
+    return offsets[bisect_right(starts, epoch) - 1]
+
+
+def local_day(epoch, name=None):
+    """Dia local do instante, em dias desde 1970-01-01."""
+    return (epoch + utc_offset(epoch, name)) // DAY
+
+
+@lru_cache(maxsize=4096)
+def day_label(day):
+    return (EPOCH_DAY + timedelta(days=day)).isoformat()
+
+
+def local_date_str(epoch, name=None):
+    """YYYY-MM-DD local do instante (memoizado por dia: barato por mensagem)."""
+    return day_label(local_day(epoch, name))
+
+
+def day_number(day):
+    """Dias desde 1970-01-01 (day: número, date ou YYYY-MM-DD)."""
+    if isinstance(day, int):
+        return day
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return (day - EPOCH_DAY).days
+
+
+def day_start(day, name=None):
+    """Epoch UTC da meia-noite local de day."""
+    number = day_number(day)
+    midnight = number * DAY
+    # Offset do instante procurado: aproxima pelo offset na meia-noite "UTC" e corrige
+    epoch = midnight - utc_offset(midnight - utc_offset(midnight, name), name)
+    if local_day(epoch, name) < number:
+        # Meia-noite inexistente (horário de verão começando às 00:00): o dia começa na mudança
+        starts, _ = offset_table(name or timezone_name())
+        epoch = starts[bisect_right(starts, epoch)]
+    return epoch
+
+
+def day_range(first_day, last_day, name=None):
+    """[meia-noite local de first_day, meia-noite local do dia seguinte a last_day) em UTC."""
+    start = day_start(first_day, name)
+    end = day_start(day_number(last_day) + 1, name)
+    return datetime.fromtimestamp(start, timezone.utc), datetime.fromtimestamp(end, timezone.utc)
+
+
+def today(name=None, now=None):
+    """Data local de agora (now: datetime com fuso, para testes/replay)."""
+    now = now or datetime.now(timezone.utc)
+    return EPOCH_DAY + timedelta(days=local_day(int(now.timestamp()), name))
@@ -0,0 +1,213 @@
+import json
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from operator import attrgetter
+
+from common.aws import lazy_resource
+from common.messages import day_buckets, ACTIVITY_FIELDS, CONVERSATION_FIELDS, RESPONSE_LOOKAHEAD
+from common.records import load_records
+from common.rollups import load_rollups, rollups_enabled, METRICS_TABLE
+from common.group_state import build_states, group_state_enabled, load_states
+from common.groups import group_names, remember_names
+from common.columnar import frame_from_rows, rollup_frame
+from common.pagination import parse_limit
+from common.payloads import alerts_payload, groups_payload, hourly_payload, metrics_payload, weekly_payload
+from common.timezones import day_range, today as local_today
+from common.cache import cached_endpoint
+from common.responses import compressed_endpoint, dumps
+from common.conditional import conditional_endpoint
+
+dynamodb = lazy_resource('dynamodb')
+messages_table = dynamodb.Table('crm-mensagens')
+groups_table = dynamodb.Table('crm-groupId')
+metrics_table = dynamodb.Table(METRICS_TABLE)
+
+CORS_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "OPTIONS,GET,POST,PUT,DELETE,PATCH",
+    "Access-Control-Allow-Headers": "*"
+}
+
+# ==============================
+# 🧭 GET /dashboard — as cinco seções do Dashboard em uma chamada
+# Cada seção tem o contrato do endpoint equivalente (common.payloads):
+#   metrics → /metrics/today      alerts → /alerts      groups → /groups/overview
+#   hourly  → /activity/hourly    weekly → /activity/weekly (últimos 7 dias)
+# Os dados são lidos uma vez só: estado por grupo (alerts + groups) e frame de
+# rollups (metrics + hourly + weekly) saem da tabela de grupos / de métricas
+# ou, sem elas, de crm-mensagens: janelas das seções que se sobrepõem viram
+# uma leitura só, janelas separadas (ex.: date= longe de hoje) são lidas cada
+# uma, nunca o intervalo entre elas. O estado de cada seção é dobrado do
+# trecho final dos registros (já ordenados) que corresponde à janela dela.
+# ==============================
+
+SECTIONS = ("metrics", "alerts", "groups", "hourly", "weekly")
+STATE_SECTIONS = {"alerts", "groups"}
+FRAME_SECTIONS = {"metrics", "hourly", "weekly"}
+
+# Janela de histórico das seções por estado quando ele vem das mensagens
+# (mesmas de alerts/app.py e groupsOverview/app.py)
+LOOKBACK_DAYS = {"alerts": 7, "groups": 30}
+WEEK_DAYS = 7
+# Maior período do weekly (o mesmo de activity/weekly.py)
+WEEKLY_MAX_DAYS = 731
+# Página do alerts (mesmos limites de alerts/app.py)
+ALERTS_DEFAULT_LIMIT = 10
+ALERTS_MAX_LIMIT = 1000
+
+
+def parse_include(value):
+    """Seções pedidas em include=a,b (todas se vazio); ValueError se houver desconhecida."""
+    if not value or not value.strip():
+        return set(SECTIONS)
+    include = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = include - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"Seções inválidas em include: {', '.join(sorted(unknown))} "
+                         f"(válidas: {', '.join(SECTIONS)})")
+    return include
+
+
+def frame_ranges(include, hoje, day, start_day, end_day):
+    # Intervalos de dias locais que o frame precisa cobrir, um por seção
+    ranges = []
+    if "metrics" in include:
+        ranges.append((hoje - timedelta(days=1), hoje))
+    if "hourly" in include:
+        ranges.append((day, day))
+    if "weekly" in include:
+        ranges.append((start_day, end_day))
+    return ranges
+
+
+def merge_windows(windows):
+    """Janelas (início, fim, campos) unidas só quando se sobrepõem, em ordem."""
+    merged = []
+    for start, end, fields in sorted(windows, key=lambda w: w[0]):
+        if merged and start <= merged[-1][1]:
+            last = merged[-1]
+            merged[-1] = (last[0], max(last[1], end), merge_fields(last[2], fields))
+        else:
+            merged.append((start, end, tuple(fields)))
+    return merged
+
+
+def parse_query(query):
+    """(seções, hoje, dia do hourly, início e fim do weekly); ValueError se inválidos."""
+    include = parse_include(query.get("include"))
+    hoje = local_today()
+    day = datetime.fromisoformat(query["date"]).date() if query.get("date") else hoje
+    end_day = datetime.fromisoformat(query["endDate"]).date() if query.get("endDate") else hoje
+    start_day = (datetime.fromisoformat(query["startDate"]).date() if query.get("startDate")
+                 else end_day - timedelta(days=WEEK_DAYS - 1))
+    if end_day < start_day or (end_day - start_day).days + 1 > WEEKLY_MAX_DAYS:
+        raise ValueError(f"Período do weekly precisa ter de 1 a {WEEKLY_MAX_DAYS} dias")
+    return include, hoje, day, start_day, end_day
+
+
+def version_scope(query):
+    include, hoje, day, start_day, end_day = parse_query(query)
+    now = datetime.now(timezone.utc)
+    windows = []
+    if include & STATE_SECTIONS:
+        lookback = max(LOOKBACK_DAYS[name] for name in include & STATE_SECTIONS)
+        windows.append((now - timedelta(days=lookback), now + timedelta(days=1)))
+    for first, last in frame_ranges(include, hoje, day, start_day, end_day):
+        start, end = day_range(first, last)
+        windows.append((start, end + RESPONSE_LOOKAHEAD))
+    # alerts/groups mudam com o relógio (minuto); os padrões de data com o dia
+    minute = now.strftime("%Y-%m-%dT%H:%M") if include & STATE_SECTIONS else None
+    return (min(w[0] for w in windows), max(w[1] for w in windows),
+            [hoje.isoformat(), day.isoformat(), start_day.isoformat(), end_day.isoformat(), minute])
+
+
+def merge_fields(*groups):
+    return tuple(dict.fromkeys(field for fields in groups for field in fields))
+
+
+def bad_request(message):
+    return {
+        "statusCode": 400,
+        "headers": CORS_HEADERS,
+        "body": json.dumps({"error": message})
+    }
+
+
+QUERY_PARAMS = ("include", "date", "startDate", "endDate", "limit", "priority", "cursor")
+
+
+@compressed_endpoint
+@cached_endpoint("dashboard", QUERY_PARAMS)
+@conditional_endpoint("dashboard", QUERY_PARAMS, version_scope, lambda: metrics_table, CORS_HEADERS)
+def lambda_handler(event, context):
+    query = event.get("queryStringParameters") or {}
+    try:
+        include, hoje, day, start_day, end_day = parse_query(query)
+        limit = parse_limit(query.get("limit"), ALERTS_DEFAULT_LIMIT, ALERTS_MAX_LIMIT)
+    except ValueError as exc:
+        return bad_request(str(exc))
+
+    now = datetime.now(timezone.utc)
+    states = {}  # seção → estado por grupo
+    frame = names = None
+    windows = []  # (início, fim, campos) lidos de crm-mensagens
+
+    if include & STATE_SECTIONS:
+        if group_state_enabled():
+            shared = load_states(groups_table)
+            remember_names(shared)
+            names = {s["groupId"]: s["groupName"] for s in shared if "groupName" in s}
+            states = {name: shared for name in include & STATE_SECTIONS}
+        else:
+            lookback = max(LOOKBACK_DAYS[name] for name in include & STATE_SECTIONS)
+            windows.append((now - timedelta(days=lookback), now + timedelta(days=1), CONVERSATION_FIELDS))
+
+    if include & FRAME_SECTIONS:
+        ranges = [day_range(first, last) for first, last in frame_ranges(include, hoje, day, start_day, end_day)]
+        if rollups_enabled():
+            dates = sorted({date for start, end in ranges for date in day_buckets(start, end)})
+            frame = frame_from_rows(load_rollups(metrics_table, dates))
+        else:
+            windows += [(start, end + RESPONSE_LOOKAHEAD, ACTIVITY_FIELDS) for start, end in ranges]
+
+    # Uma leitura por grupo de janelas sobrepostas; estado e frame saem dos mesmos
+    # registros. Cada janela do frame termina com a folga de resposta: um par entre
+    # janelas separadas passaria de MAX_RESPONSE_MINUTES ou cairia na folga, fora das seções.
+    if windows:
+        records = []
+        for start, end, fields in merge_windows(windows):
+            records += load_records(messages_table, start, end, fields=fields)
+        print(f"📥 Total de mensagens recebidas: {len(records)}")
+        for name in include & STATE_SECTIONS - set(states):
+            cutoff = (now - timedelta(days=LOOKBACK_DAYS[name])).timestamp()
+            first = bisect_left(records, cutoff, key=attrgetter("epoch"))
+            states[name] = list(build_states(records[first:]).values())
+        if frame is None and include & FRAME_SECTIONS:
+            frame = rollup_frame(records)
+        del records
+
+    result = {}
+    if "groups" in include:
+        if names is None:
+            names = group_names(dynamodb, groups_table.name, [s["groupId"] for s in states["groups"]])
+        result["groups"] = groups_payload(states["groups"], names, now, hoje)
+    if "alerts" in include:
+        try:
+            result["alerts"] = alerts_payload(
+                states["alerts"], now, limit, query.get("priority"), query.get("cursor"),
+                lookup_names=lambda ids: group_names(dynamodb, groups_table.name, ids))
+        except ValueError as exc:
+            return bad_request(str(exc))
+    if "metrics" in include:
+        result["metrics"] = metrics_payload(frame, hoje)
+    if "hourly" in include:
+        result["hourly"] = hourly_payload(frame, day, query.get("date"))
+    if "weekly" in include:
+        result["weekly"] = weekly_payload(frame, start_day, end_day)
+
+    return {
+        "statusCode": 200,
+        "headers": CORS_HEADERS,
+        "body": dumps({name: result[name] for name in SECTIONS if name in result})
+    }
@@ -0,0 +1,24 @@
+from common.aws import lazy_resource
+from common.group_state import apply_group_messages
+from common.stream import batch_failures, new_messages
+
+dynamodb = lazy_resource('dynamodb')
+groups_table = dynamodb.Table('crm-groupId')
+
+# ==============================
+# 🔁 Stream de crm-mensagens → estado da conversa por grupo
+# Cada lote do stream é dobrado em memória e gravado com um update por grupo
+# tocado (alerts e groupsOverview leem só crm-groupId). Mensagens reentregues
+# são ignoradas pelos marcadores de crm-stream-applied (common/stream.py);
+# grupos que falham voltam em batchItemFailures.
+# ==============================
+
+def lambda_handler(event, context):
+    registros = new_messages(event)
+    if not registros:
+        return batch_failures([], set())
+
+    mensagens = [item for _, item in registros]
+    atualizados, falhas = apply_group_messages(groups_table, mensagens, dynamodb)
+    print(f"👥 {len(mensagens)} mensagens → {atualizados} grupos atualizados, {len(falhas)} com falha")
+    return batch_failures(registros, falhas)
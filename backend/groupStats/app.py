@@ -0,0 +1,96 @@
+import json
+from datetime import datetime
+
+from common.aws import lazy_resource
+from common.messages import day_buckets, ACTIVITY_FIELDS, RESPONSE_LOOKAHEAD
+from common.records import load_records
+from common.rollups import compute_member_rollups, load_member_rollups, load_rollups, rollups_enabled, METRICS_TABLE
+from common.columnar import frame_from_rows, rollup_frame
+from common.group_stats import group_stats_payload, period_days
+from common.timezones import day_range, today as local_today
+from common.cache import cached_endpoint
+from common.responses import compressed_endpoint, dumps
+from common.conditional import conditional_endpoint
+
+dynamodb = lazy_resource('dynamodb')
+messages_table = dynamodb.Table('crm-mensagens')
+groups_table = dynamodb.Table('crm-groupId')
+metrics_table = dynamodb.Table(METRICS_TABLE)
+
+CORS_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "OPTIONS,GET,POST,PUT,DELETE,PATCH",
+    "Access-Control-Allow-Headers": "*"
+}
+
+# ==============================
+# 📋 GET /groups/{groupId}/stats — detalhe de um grupo no período
+# Tudo por grupo, nunca scan: item de crm-groupId (GetItem) e, com rollups,
+# as linhas do grupo em crm-metricas (um query por dia UTC com begins_with
+# "hour#<groupId>#" e outro com "members#<groupId>#"), sem ler mensagens.
+# Sem rollups, um query das mensagens do grupo no período (+ folga para o
+# tempo de resposta) pelo groupId-timestamp-index gera frame e membros.
+# ==============================
+
+PARAMS = ("groupId", "period", "startDate", "endDate")
+STATS_FIELDS = ACTIVITY_FIELDS + ("content", "from")
+
+def version_scope(query):
+    first, last = period_days(query, local_today())
+    start, end = day_range(first, last)
+    # Períodos relativos mudam com o dia; messages.today também
+    return start, end + RESPONSE_LOOKAHEAD, local_today().isoformat()
+
+def hour_epoch(row):
+    return int(datetime.fromisoformat(f"{row['date']}T{row['hour']}:00:00+00:00").timestamp())
+
+def load_frame(group_id, first_day, last_day, with_members=True):
+    """(frame do grupo nos dias locais, linhas de membros das horas do período ou [])."""
+    start, end = day_range(first_day, last_day)
+    if rollups_enabled():
+        dates = day_buckets(start, end)
+        frame = frame_from_rows(load_rollups(metrics_table, dates, group_id=group_id))
+        member_rows = load_member_rollups(metrics_table, dates, group_id) if with_members else []
+    else:
+        records = load_records(messages_table, start, end + RESPONSE_LOOKAHEAD, group_id=group_id,
+                               fields=STATS_FIELDS)
+        frame = rollup_frame(records)
+        member_rows = compute_member_rollups(records).values() if with_members else []
+    start_epoch, end_epoch = int(start.timestamp()), int(end.timestamp())
+    return frame, [row for row in member_rows if start_epoch <= hour_epoch(row) < end_epoch]
+
+def respond(status, body):
+    return {
+        "statusCode": status,
+        "headers": CORS_HEADERS,
+        "body": dumps(body) if status == 200 else json.dumps(body)
+    }
+
+@compressed_endpoint
+@cached_endpoint("groupStats", PARAMS)
+@conditional_endpoint("groupStats", PARAMS, version_scope, lambda: metrics_table, CORS_HEADERS)
+def lambda_handler(event, context):
+    query = event.get("queryStringParameters") or {}
+    group_id = (event.get("pathParameters") or {}).get("groupId")
+    if not group_id:
+        return respond(400, {"error": "groupId é obrigatório"})
+
+    today = local_today()
+    try:
+        first_day, last_day = period_days(query, today)
+    except ValueError as exc:
+        return respond(400, {"error": str(exc)})
+
+    group = groups_table.get_item(Key={"groupId": group_id}).get("Item")
+
+    frame, member_rows = load_frame(group_id, first_day, last_day)
+    today_frame = frame if first_day <= today <= last_day else load_frame(group_id, today, today, with_members=False)[0]
+
+    if group is None and not member_rows and not len(frame["hour"]):
+        return respond(404, {"error": f"Grupo não encontrado: {group_id}"})
+
+    active_since = int(day_range(last_day, last_day)[0].timestamp())
+    result = group_stats_payload(group or {"groupId": group_id}, frame, member_rows, first_day, last_day,
+                                 today, active_since, today_frame)
+    return respond(200, result)
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+import json
+
+from common.aws import lazy_resource
+from common.messages import CONVERSATION_FIELDS
+from common.records import load_records
+from common.rollups import METRICS_TABLE
+from common.group_state import build_states, group_state_enabled
+from common.group_index import DEFAULT_SORT, SORTS, STATUSES, count_groups, list_groups, query_groups
+from common.groups import group_names, remember_names
+from common.payloads import group_summary
+from common.cache import cached_endpoint
+from common.responses import compressed_endpoint, dumps
+from common.conditional import conditional_endpoint
+from common.timezones import today as local_today
+
+dynamodb = lazy_resource('dynamodb')
+messages_table = dynamodb.Table('crm-mensagens')
+groups_table = dynamodb.Table('crm-groupId')
+metrics_table = dynamodb.Table(METRICS_TABLE)
+
+CORS_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "OPTIONS,GET,POST,PUT,DELETE,PATCH",
+    "Access-Control-Allow-Headers": "*"
+}
+
+# ==============================
+# 👥 GET /groups — lista paginada de grupos (status, sortBy, cursor)
+# Com o estado por grupo: uma consulta por faixa no índice do sortBy
+# (common.group_index), lendo só a página. Sem ele: estado reconstruído da
+# janela recente de mensagens, filtrado e ordenado em memória, com o mesmo
+# contrato e os mesmos cursores.
+# ==============================
+
+PARAMS = ("status", "limit", "page", "sortBy", "cursor", "withTotal")
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# Sem o estado por grupo, janela de histórico considerada (a mesma de /groups/overview)
+LOOKBACK_DAYS = 30
+
+def parse_query(query):
+    """(status, sortBy, limit, page, withTotal); ValueError se inválidos."""
+    status = query.get("status") or None
+    if status is not None and status not in STATUSES:
+        raise ValueError(f"status inválido: {status} (válidos: {', '.join(STATUSES)})")
+    sort_by = query.get("sortBy") or DEFAULT_SORT
+    if sort_by not in SORTS:
+        raise ValueError(f"sortBy inválido: {sort_by} (válidos: {', '.join(SORTS)})")
+    try:
+        limit = int(query.get("limit") or DEFAULT_LIMIT)
+        page = int(query.get("page") or 1)
+    except ValueError:
+        raise ValueError("limit e page precisam ser números") from None
+    if not 1 <= limit <= MAX_LIMIT or page < 1:
+        raise ValueError(f"limit precisa estar entre 1 e {MAX_LIMIT} e page ser >= 1")
+    with_total = (query.get("withTotal") or "").lower() == "true"
+    return status, sort_by, limit, page, with_total
+
+def version_scope(query):
+    # status muda com o relógio: o minuto entra na versão
+    now = datetime.now(timezone.utc)
+    return now - timedelta(days=LOOKBACK_DAYS), now + timedelta(days=1), now.strftime("%Y-%m-%dT%H:%M")
+
+def bad_request(message):
+    return {
+        "statusCode": 400,
+        "headers": CORS_HEADERS,
+        "body": json.dumps({"error": message})
+    }
+
+@compressed_endpoint
+@cached_endpoint("groups", PARAMS)
+@conditional_endpoint("groups", PARAMS, version_scope, lambda: metrics_table, CORS_HEADERS)
+def lambda_handler(event, context):
+    query = event.get("queryStringParameters") or {}
+    now = datetime.now(timezone.utc)
+    today = local_today(now=now)
+
+    try:
+        status, sort_by, limit, page, with_total = parse_query(query)
+        if group_state_enabled():
+            # Só a página sai do índice; o total (opcional) lê as partições inteiras
+            states, page, next_cursor = query_groups(groups_table, now, status, sort_by, limit, page,
+                                                     query.get("cursor"))
+            total = count_groups(groups_table, now, status) if with_total else None
+            remember_names(states)
+            names = {s["groupId"]: s["groupName"] for s in states if "groupName" in s}
+        else:
+            records = load_records(messages_table, now - timedelta(days=LOOKBACK_DAYS), now + timedelta(days=1),
+                                   fields=CONVERSATION_FIELDS)
+            all_states = list(build_states(records).values())
+            all_names = group_names(dynamodb, groups_table.name, [s["groupId"] for s in all_states])
+            states, page, next_cursor, total = list_groups(all_states, all_names, now, status, sort_by,
+                                                           limit, page, query.get("cursor"))
+            names = {s["groupId"]: all_names[s["groupId"]] for s in states if s["groupId"] in all_names}
+            total = total if with_total else None
+    except ValueError as exc:
+        return bad_request(str(exc))
+
+    return {
+        "statusCode": 200,
+        "headers": CORS_HEADERS,
+        "body": dumps({
+            "groups": [group_summary(state, names, now, today) for state in states],
+            "pagination": {
+                "total": total,
+                "page": page,
+                "limit": limit,
+                "hasMore": next_cursor is not None,
+                "nextCursor": next_cursor
+            }
+        })
+    }
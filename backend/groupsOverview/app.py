@@ -1,15 +1,21 @@
-import boto3
-import json
 from datetime import datetime, timedelta, timezone
-from collections import defaultdict
-import statistics
-from rapidfuzz import fuzz
-import unicodedata
-import re
 
-dynamodb = boto3.resource('dynamodb')
+from common.aws import lazy_resource
+from common.messages import CONVERSATION_FIELDS
+from common.records import load_records
+from common.rollups import METRICS_TABLE
+from common.group_state import build_states, group_state_enabled, load_states
+from common.groups import group_names, remember_names
+from common.payloads import groups_payload
+from common.cache import cached_endpoint
+from common.responses import compressed_endpoint, dumps
+from common.conditional import conditional_endpoint
+from common.timezones import today as local_today
+
+dynamodb = lazy_resource('dynamodb')
 messages_table = dynamodb.Table('crm-mensagens')
 groups_table = dynamodb.Table('crm-groupId')
+metrics_table = dynamodb.Table(METRICS_TABLE)
 
 CORS_HEADERS = {
     "Content-Type": "application/json",
@@ -18,136 +24,37 @@ CORS_HEADERS = {
     "Access-Control-Allow-Headers": "*"
 }
 
-# 🔹 Mesma configuração do alerts/app.py
-IGNORED_MESSAGES = [
-    "ok", "obrigado", "obrigada", "valeu", "vlw", "tks", "thanks",
-    " obrigado(a)", "obrigadão", "tudo certo", "tudo bem",
-    "tudo tranquilo", "tudo ok", "tudo beleza"
-]
+# Sem o estado por grupo, janela de histórico considerada no resumo
+# (grupos sem mensagens nela ficam de fora)
+LOOKBACK_DAYS = 30
 
-MIN_WAIT_MINUTES = 10
-
-def normalize_text(text):
-    text = text.lower().strip()
-    text = "".join(
-        c for c in unicodedata.normalize("NFD", text)
-        if unicodedata.category(c) != "Mn"
-    )
-    text = re.sub(r"[^\w\s]", "", text)  # remove pontuação
-    return text
-
-def is_irrelevant_message(text):
-    if not text:
-        return True
-
-    norm = normalize_text(text)
-
-    for term in IGNORED_MESSAGES:
-        norm_term = normalize_text(term)
-
-        # 1️⃣ Similaridade alta → irrelevante
-        if fuzz.ratio(norm, norm_term) > 85:
-            return True
-
-        # 2️⃣ Termo presente como palavra isolada → irrelevante
-        if re.search(rf"\b{re.escape(norm_term)}\b", norm):
-            return True
-
-    return False
-
-def parse_timestamp(ts):
-    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
-
-def format_time_diff(past, now):
-    diff = now - past
-    mins = int(diff.total_seconds() / 60)
-    if mins < 60:
-        return f"há {mins}min"
-    else:
-        hours = mins // 60
-        return f"há {hours}h"
+def version_scope(query):
+    # "há Xmin" e o status mudam com o relógio: o minuto entra na versão
+    now = datetime.now(timezone.utc)
+    return now - timedelta(days=LOOKBACK_DAYS), now + timedelta(days=1), now.strftime("%Y-%m-%dT%H:%M")
 
+@compressed_endpoint
+@cached_endpoint("groupsOverview")
+@conditional_endpoint("groupsOverview", (), version_scope, lambda: metrics_table, CORS_HEADERS)
 def lambda_handler(event, context):
-    now = datetime.now(timezone.utc) - timedelta(hours=3)
-    today = now.date()
-
-    # Paginação completa
-    items = []
-    response = messages_table.scan()
-    items.extend(response.get("Items", []))
-    while "LastEvaluatedKey" in response:
-        response = messages_table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
-        items.extend(response.get("Items", []))
-
-    # Agrupamento
-    grupos = defaultdict(list)
-    for msg in items:
-        grupos[msg["groupId"]].append(msg)
-
-    # Dados de grupos
-    group_names = {}
-    gscan = groups_table.scan()
-    for g in gscan.get("Items", []):
-        group_names[g["groupId"]] = g.get("groupName", g["groupId"])
+    now = datetime.now(timezone.utc)
+    today = local_today(now=now)
+
+    # Estado por grupo: da tabela de grupos ou reconstruído da janela recente
+    if group_state_enabled():
+        states = load_states(groups_table)
+        remember_names(states)
+        names = {s["groupId"]: s["groupName"] for s in states if "groupName" in s}
+    else:
+        records = load_records(messages_table, now - timedelta(days=LOOKBACK_DAYS), now + timedelta(days=1),
+                               fields=CONVERSATION_FIELDS)
+        states = list(build_states(records).values())
+        # Só os grupos com mensagens na janela, em lote (e com cache entre invocações)
+        names = group_names(dynamodb, groups_table.name, [s["groupId"] for s in states])
 
     # Resumo por grupo
-    resultado = []
-    for group_id, mensagens in grupos.items():
-        mensagens.sort(key=lambda m: m["timestamp"])
-        timestamps = [parse_timestamp(m["timestamp"]) for m in mensagens]
-        last_activity = max(timestamps)
-        ultima_atividade_str = format_time_diff(last_activity, now)
-
-        # Mensagens de hoje
-        today_msgs = [m for m in mensagens if parse_timestamp(m["timestamp"]).date() == today]
-        total_hoje = len(today_msgs)
-
-        # Tempo médio de resposta
-        tempos = []
-        aguardando = False
-        for i in range(len(mensagens) - 1):
-            if mensagens[i]["direction"] == "client" and mensagens[i+1]["direction"] == "team":
-                t1 = parse_timestamp(mensagens[i]["timestamp"])
-                t2 = parse_timestamp(mensagens[i+1]["timestamp"])
-                delta = (t2 - t1).total_seconds() / 60
-                if 0 < delta < 180:
-                    tempos.append(delta)
-
-        # 🔹 Ajuste para usar a mesma lógica do alerts/app.py
-        if mensagens[-1]["direction"] == "client":
-            t_last_client = parse_timestamp(mensagens[-1]["timestamp"])
-            diff_minutes = int((now - t_last_client).total_seconds() / 60)
-            text = json.loads(mensagens[-1]["content"]).get("text", "")
-
-            if diff_minutes >= MIN_WAIT_MINUTES:
-                if not is_irrelevant_message(text):
-                    aguardando = True
-            else:
-                aguardando = True
-
-        avg_resp = round(statistics.mean(tempos), 2) if tempos else 0
-        avg_resp_str = f"{int(avg_resp)} min" if avg_resp else "-"
-
-        # Status
-        minutos_desde_ultima = (now - last_activity).total_seconds() / 60
-        if aguardando:
-            status = "waiting"
-        elif minutos_desde_ultima > 300:
-            status = "idle"
-        else:
-            status = "active"
-
-        resultado.append({
-            "id": group_id,
-            "name": group_names.get(group_id, group_id),
-            "todayMessages": total_hoje,
-            "avgResponseTime": avg_resp_str,
-            "lastActivity": ultima_atividade_str,
-            "status": status
-        })
-
     return {
         "statusCode": 200,
         "headers": CORS_HEADERS,
-        "body": json.dumps({ "groups": resultado })
+        "body": dumps(groups_payload(states, names, now, today))
     }
@@ -0,0 +1,133 @@
+import contextlib
+import importlib
+import os
+from datetime import datetime, timedelta, timezone
+
+from common.group_state import build_states, write_states
+from common.records import to_records
+from common.rollups import compute_member_rollups, compute_rollups, write_member_rollups, write_rollups
+from local import synthetic
+
+# ==============================
+# 🧪 Handlers contra as tabelas locais
+# Carrega um dataset sintético (crm-mensagens, crm-groupId e, no modo
+# materializado, crm-metricas + estado por grupo) e roda cada lambda_handler
+# com as tabelas trocadas e o relógio fixo no fim dos dados.
+# Usado pelos testes dos handlers e por benchmarks/handlers.py.
+# ==============================
+
+END = datetime(2025, 8, 6, 15, tzinfo=timezone.utc)
+
+RAW = "raw"                    # lê crm-mensagens (modo atual sem flags)
+MATERIALIZED = "materialized"  # ROLLUPS_ENABLED + GROUP_STATE_ENABLED
+
+# nome → (módulo, queryStringParameters(dia local de END))
+HANDLERS = {
+    "alerts": ("alerts.app", lambda day: {"limit": "50"}),
+    "metricsToday": ("metricsToday.app", lambda day: None),
+    "groupsOverview": ("groupsOverview.app", lambda day: None),
+    "groups": ("groupsList.app", lambda day: {"limit": "20"}),
+    "hourly": ("activity.hourly", lambda day: {"date": day.isoformat()}),
+    "weekly": ("activity.weekly", lambda day: {"startDate": (day - timedelta(days=6)).isoformat(),
+                                               "endDate": day.isoformat()}),
+    "dashboard": ("dashboard.app", lambda day: None),
+    "groupStats": ("groupStats.app", lambda day: {"period": "week"}),
+}
+
+# pathParameters dos endpoints com parâmetro no caminho
+PATH_PARAMETERS = {
+    "groupStats": {"groupId": "0001@g.us"},
+}
+
+
+def frozen_datetime(now):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now if tz is None else now.astimezone(tz)
+    return FrozenDatetime
+
+
+def build_dataset(messages, groups=50, days=30, client_ratio=0.6, zipf=0.0, text_length=None,
+                  materialized=True, end=END, seed=42, latency_ms=0):
+    """Tabelas locais com o dataset; materialized também grava rollups e estado por grupo."""
+    items = list(synthetic.generate_messages(messages, groups=groups, days=days, end=end,
+                                             client_ratio=client_ratio, seed=seed, zipf=zipf,
+                                             text_length=text_length))
+    tables = {
+        "messages": synthetic.load(synthetic.messages_table(latency_ms), items),
+        "groups": synthetic.load(synthetic.groups_table(latency_ms), synthetic.generate_groups(groups)),
+        "metrics": synthetic.metrics_table(latency_ms),
+    }
+    if materialized:
+        records = to_records(items)
+        write_rollups(tables["metrics"], compute_rollups(records).values())
+        write_member_rollups(tables["metrics"], compute_member_rollups(records).values())
+        write_states(tables["groups"], build_states(records))
+        del records
+    for table in tables.values():
+        table.reset_stats()
+    return tables
+
+
+def load_handler(name):
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-2")
+    return importlib.import_module(HANDLERS[name][0])
+
+
+def _set(patches, target, name, value):
+    if hasattr(target, name):
+        patches.append((target, name, getattr(target, name)))
+        setattr(target, name, value)
+
+
+@contextlib.contextmanager
+def installed(module, tables, mode=RAW, now=END, env=None):
+    """Troca tabelas, relógio e flags do handler enquanto o bloco roda (env sobrescreve flags)."""
+    from common import timezones
+    from local.table import LocalResource
+
+    patches = []
+    clock = frozen_datetime(now)
+    for name in ("messages_table", "table"):
+        _set(patches, module, name, tables["messages"])
+    _set(patches, module, "groups_table", tables["groups"])
+    _set(patches, module, "metrics_table", tables["metrics"])
+    _set(patches, module, "dynamodb", LocalResource(*tables.values()))
+    _set(patches, module, "datetime", clock)
+    _set(patches, timezones, "datetime", clock)
+
+    flags = {"ROLLUPS_ENABLED": str(mode == MATERIALIZED).lower(),
+             "GROUP_STATE_ENABLED": str(mode == MATERIALIZED).lower(),
+             "RESULT_CACHE_ENABLED": "false",
+             "CONDITIONAL_REQUESTS_ENABLED": "false",
+             "DAY_SUMMARIES_ENABLED": "false"}
+    flags.update(env or {})
+    saved = {name: os.environ.get(name) for name in flags}
+    os.environ.update(flags)
+    try:
+        yield module
+    finally:
+        for target, name, value in reversed(patches):
+            setattr(target, name, value)
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def invoke(module, name, now=END):
+    from common.timezones import today
+    event = {"queryStringParameters": HANDLERS[name][1](today(now=now)),
+             "pathParameters": PATH_PARAMETERS.get(name)}
+    return module.lambda_handler(event, None)
+
+
+def read_units(tables):
+    return sum(table.consumed_read_units for table in tables.values())
+
+
+def reset_stats(tables):
+    for table in tables.values():
+        table.reset_stats()
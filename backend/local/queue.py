@@ -0,0 +1,68 @@
+import collections
+import itertools
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+# ==============================
+# 🧪 Fila SQS local (stand-in)
+# send_message_batch() como o client do boto3 (com os limites de 10 entradas e
+# 256 KB) e entrega no formato do evento SQS → Lambda, com reentrega das
+# mensagens reportadas em batchItemFailures.
+# ==============================
+
+MAX_ENTRIES = 10
+MAX_BATCH_BYTES = 256 * 1024
+
+
+def _client_error(code, message):
+    return ClientError({"Error": {"Code": code, "Message": message}}, "SendMessageBatch")
+
+
+class LocalQueue:
+
+    def __init__(self, url="local://crm-ingest", latency_ms=0):
+        self.url = url
+        self.latency_ms = latency_ms
+        self._messages = collections.deque()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.sent = 0
+        self.redelivered = 0
+
+    def send_message_batch(self, QueueUrl, Entries):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if len(Entries) > MAX_ENTRIES:
+            raise _client_error("AWS.SimpleQueueService.TooManyEntriesInBatchRequest", "Too many entries")
+        if sum(len(e["MessageBody"].encode()) for e in Entries) > MAX_BATCH_BYTES:
+            raise _client_error("AWS.SimpleQueueService.BatchRequestTooLong", "Batch too long")
+        with self._lock:
+            self.request_count += 1
+            successful = []
+            for entry in Entries:
+                message_id = f"m-{next(self._ids)}"
+                self._messages.append({"messageId": message_id, "body": entry["MessageBody"]})
+                successful.append({"Id": entry["Id"], "MessageId": message_id})
+            self.sent += len(Entries)
+        return {"Successful": successful, "Failed": []}
+
+    def receive(self, batch_size=10):
+        """Evento da Lambda consumidora com até batch_size mensagens (None se vazia)."""
+        with self._lock:
+            records = [self._messages.popleft() for _ in range(min(batch_size, len(self._messages)))]
+        return {"Records": records} if records else None
+
+    def settle(self, event, result):
+        # Mensagens em batchItemFailures voltam para a fila (fim da visibilidade)
+        failed = {f["itemIdentifier"] for f in result.get("batchItemFailures", [])}
+        with self._lock:
+            for record in event["Records"]:
+                if record["messageId"] in failed:
+                    self._messages.append(record)
+                    self.redelivered += 1
+
+    def __len__(self):
+        return len(self._messages)
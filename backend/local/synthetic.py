@@ -0,0 +1,191 @@
+import itertools
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+from common.group_index import INDEX_FIELDS, SORTS
+from common.groups import name_key
+from common.messages import DAY_INDEX, DAY_INDEX_FIELDS, GROUP_INDEX, day_shard
+from local.table import LocalTable
+
+# ==============================
+# 🎲 Dados sintéticos no formato de crm-mensagens / crm-groupId
+# Determinísticos (seed fixa) para que os benchmarks sejam comparáveis.
+# ==============================
+
+CLIENT_TEXTS = [
+    "Bom dia, conseguem verificar meu pedido?",
+    "Oi, alguém pode me ajudar com a fatura?",
+    "O sistema está fora do ar aqui",
+    "Preciso da segunda via do boleto",
+    "ok",
+    "obrigado!",
+    "Quando chega a entrega?",
+]
+
+TEAM_TEXTS = [
+    "Bom dia! Já estamos verificando.",
+    "Oi, pode me passar o número do pedido?",
+    "Segue a segunda via em anexo.",
+    "Resolvido, qualquer coisa é só chamar.",
+]
+
+# Corpus com cara de WhatsApp real (benchmarks de relevância)
+WHATSAPP_OPENINGS = ["", "Oi", "Olá", "Bom dia", "Boa tarde", "Boa noite", "Opa", "E aí", "Oii", "Pessoal"]
+WHATSAPP_BODIES = [
+    "conseguem verificar meu pedido {n}?",
+    "o boleto de {mes} ainda não chegou",
+    "a nota fiscal {n} veio com o valor errado",
+    "o sistema está fora do ar aqui desde cedo",
+    "preciso alterar o endereço de entrega pra rua {rua}, {n}",
+    "vocês atendem no sábado?",
+    "quando chega a entrega? já faz {d} dias",
+    "mandei o comprovante agora há pouco",
+    "não consigo acessar o app, dá erro de senha",
+    "qual o prazo pra troca?",
+    "segue o print do erro 👇",
+    "áudio de {d} segundos",
+]
+WHATSAPP_SHORT = [
+    "ok", "Ok!", "ok 👍", "obrigado!", "Obrigada 🙏", "valeu", "vlw!!", "tks", "thanks",
+    "obrigado(a)", "Obrigadão!!", "tudo certo", "Tudo bem, obrigado", "tudo tranquilo",
+    "tudo ok por aqui", "tudo beleza", "blz", "👍", "show", "perfeito", "combinado", "beleza, valeu",
+    "ok, obrigado pelo retorno", "sim", "não", "?", "kkkk", "certo", "Bom dia!", "", "   ",
+]
+WHATSAPP_MONTHS = ["janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho", "agosto"]
+
+
+def whatsapp_texts(total, short_ratio=0.4, seed=7):
+    """Textos de clientes com acentos, emojis, pontuação e muitas repetições."""
+    rng = random.Random(seed)
+    for _ in range(total):
+        if rng.random() < short_ratio:
+            yield rng.choice(WHATSAPP_SHORT)
+            continue
+        body = rng.choice(WHATSAPP_BODIES).format(
+            n=rng.randrange(100, 99999), mes=rng.choice(WHATSAPP_MONTHS),
+            rua=rng.choice(["das Flores", "Augusta", "XV de Novembro"]), d=rng.randrange(2, 60))
+        opening = rng.choice(WHATSAPP_OPENINGS)
+        yield f"{opening}, {body}" if opening else body[0].upper() + body[1:]
+
+
+def messages_table(latency_ms=0):
+    return LocalTable(
+        "crm-mensagens", "messageId", "timestamp",
+        indexes={DAY_INDEX: ("dayShard", "timestamp"), GROUP_INDEX: ("groupId", "timestamp")},
+        projections={DAY_INDEX: DAY_INDEX_FIELDS},
+        latency_ms=latency_ms,
+    )
+
+
+def groups_table(latency_ms=0):
+    return LocalTable(
+        "crm-groupId", "groupId",
+        indexes={index: ("status", attribute) for index, attribute, _ in SORTS.values()},
+        projections={index: INDEX_FIELDS for index, _, _ in SORTS.values()},
+        latency_ms=latency_ms,
+    )
+
+
+def metrics_table(latency_ms=0):
+    return LocalTable("crm-metricas", "date", "metricType", latency_ms=latency_ms)
+
+
+def applied_table(latency_ms=0):
+    return LocalTable("crm-stream-applied", "id", latency_ms=latency_ms)
+
+
+def format_ts(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def make_message(message_id, group_id, ts, direction, text, sender="Cliente"):
+    timestamp = format_ts(ts)
+    return {
+        "messageId": message_id,
+        "groupId": group_id,
+        "timestamp": timestamp,
+        "dayShard": day_shard(timestamp, message_id),
+        "direction": direction,
+        "content": json.dumps({"type": "text", "text": text}),
+        "from": json.dumps({"id": f"{sender}-{group_id}", "name": sender, "phone": "5511999999999"}),
+    }
+
+
+def zipf_weights(groups, skew):
+    # Peso do grupo de posição k: 1 / k^skew (skew = 0 → todos iguais)
+    return [1 / (rank ** skew) for rank in range(1, groups + 1)]
+
+
+def sized_text(rng, length):
+    """Texto com cara de WhatsApp com ~length caracteres (entre metade e 1,5x)."""
+    target = rng.randint(max(1, length // 2), max(1, length * 3 // 2))
+    parts = []
+    size = 0
+    while size < target:
+        part = rng.choice(WHATSAPP_BODIES).format(
+            n=rng.randrange(100, 99999), mes=rng.choice(WHATSAPP_MONTHS),
+            rua=rng.choice(["das Flores", "Augusta", "XV de Novembro"]), d=rng.randrange(2, 60))
+        parts.append(part)
+        size += len(part) + 2
+    text = ". ".join(parts)[:target]
+    return text[0].upper() + text[1:]
+
+
+def generate_messages(total, groups=50, days=30, end=None, client_ratio=0.6, seed=42,
+                      zipf=0.0, text_length=None):
+    """Mensagens de crm-mensagens em ordem de timestamp.
+
+    zipf: assimetria do tamanho dos grupos (0 = uniforme, ~1.1 = poucos grupos concentram o volume).
+    text_length: tamanho médio do texto (None = frases curtas fixas).
+    """
+    rng = random.Random(seed)
+    end = end or datetime.now(timezone.utc).replace(microsecond=0)
+    start = end - timedelta(days=days)
+    span = (end - start).total_seconds()
+    cum_weights = list(itertools.accumulate(zipf_weights(groups, zipf))) if zipf else None
+
+    offsets = sorted(rng.random() * span for _ in range(total))
+    for i, offset in enumerate(offsets):
+        if cum_weights:
+            group = rng.choices(range(groups), cum_weights=cum_weights)[0]
+        else:
+            group = rng.randrange(groups)
+        group_id = f"{group:04d}@g.us"
+        if rng.random() < client_ratio:
+            direction, text, sender = "client", rng.choice(CLIENT_TEXTS), "Cliente"
+        else:
+            direction, text, sender = "team", rng.choice(TEAM_TEXTS), "Suporte"
+        if text_length:
+            text = sized_text(rng, text_length)
+        yield make_message(f"msg-{i:08d}", group_id, start + timedelta(seconds=offset),
+                           direction, text, sender)
+
+
+def webhook_events(total, groups=50, days=1, end=None, client_ratio=0.6, seed=42):
+    """Eventos do POST /webhook/whatsapp (type = message) com as mensagens de generate_messages."""
+    for item in generate_messages(total, groups=groups, days=days, end=end, client_ratio=client_ratio, seed=seed):
+        yield {
+            "type": "message",
+            "timestamp": item["timestamp"],
+            "data": {"message": {
+                "id": item["messageId"],
+                "groupId": item["groupId"],
+                "from": json.loads(item["from"]),
+                "content": json.loads(item["content"]),
+                "timestamp": item["timestamp"],
+                "direction": item["direction"],
+            }},
+        }
+
+
+def generate_groups(groups=50):
+    for g in range(groups):
+        group_id, name = f"{g:04d}@g.us", f"Cliente {g:04d}"
+        yield {"groupId": group_id, "groupName": name, "nameKey": name_key(name, group_id)}
+
+
+def load(table, items):
+    table.load(items)
+    table.reset_stats()
+    return table
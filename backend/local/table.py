@@ -0,0 +1,617 @@
+import bisect
+import copy
+import math
+import re
+import threading
+import time
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+# ==============================
+# 🧪 Tabela DynamoDB local (stand-in)
+# Implementa o subconjunto da API de boto3.resource("dynamodb").Table usado
+# pelas lambdas, contabilizando read units e requisições como o DynamoDB faz,
+# para rodar benchmarks e testes sem AWS.
+# ==============================
+
+PAGE_SIZE_BYTES = 1024 * 1024  # limite de 1 MB por página de scan/query
+RCU_BYTES = 4096               # 1 RCU = 4 KB (leitura eventualmente consistente = 0.5)
+
+
+def _value_size(value):
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, bool) or value is None:
+        return 1
+    if isinstance(value, (int, float, Decimal)):
+        return len(str(value)) // 2 + 1
+    if isinstance(value, dict):
+        return 3 + sum(len(k) + _value_size(v) + 1 for k, v in value.items())
+    if isinstance(value, (list, set, tuple)):
+        return 3 + sum(_value_size(v) + 1 for v in value)
+    return len(str(value))
+
+
+def item_size(item):
+    return sum(len(k) + _value_size(v) for k, v in item.items())
+
+
+def read_units(size_bytes, consistent=False):
+    units = math.ceil(size_bytes / RCU_BYTES) if size_bytes else 1
+    return units if consistent else units / 2
+
+
+def _client_error(code, operation, message=""):
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+# ==============================
+# 🔎 Avaliação de condições (boto3.dynamodb.conditions)
+# ==============================
+
+def _attr_value(item, name):
+    value = item
+    for part in name.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None, False
+        value = value[part]
+    return value, True
+
+
+def evaluate(condition, item):
+    expr = condition.get_expression()
+    op = expr["operator"]
+    values = expr["values"]
+
+    if op == "AND":
+        return all(evaluate(v, item) for v in values)
+    if op == "OR":
+        return any(evaluate(v, item) for v in values)
+    if op == "NOT":
+        return not evaluate(values[0], item)
+
+    current, exists = _attr_value(item, values[0].name)
+    if op == "attribute_exists":
+        return exists
+    if op == "attribute_not_exists":
+        return not exists
+    if not exists:
+        return op == "<>"
+
+    try:
+        if op == "=":
+            return current == values[1]
+        if op == "<>":
+            return current != values[1]
+        if op == "<":
+            return current < values[1]
+        if op == "<=":
+            return current <= values[1]
+        if op == ">":
+            return current > values[1]
+        if op == ">=":
+            return current >= values[1]
+        if op == "BETWEEN":
+            return values[1] <= current <= values[2]
+        if op == "begins_with":
+            return isinstance(current, str) and current.startswith(values[1])
+        if op == "contains":
+            return values[1] in current
+        if op == "IN":
+            return current in values[1]
+    except TypeError:
+        return False
+    raise NotImplementedError(f"Operador não suportado no stand-in: {op}")
+
+
+def _split_key_condition(condition, hash_key):
+    # Separa "hash = :v AND <condição do range>" em (valor do hash, condição do range)
+    expr = condition.get_expression()
+    if expr["operator"] == "=" and expr["values"][0].name == hash_key:
+        return expr["values"][1], None
+    if expr["operator"] == "AND":
+        left, right = expr["values"]
+        for first, second in ((left, right), (right, left)):
+            first_expr = first.get_expression()
+            if first_expr["operator"] == "=" and first_expr["values"][0].name == hash_key:
+                return first_expr["values"][1], second
+    raise ValueError(f"KeyConditionExpression precisa de igualdade em {hash_key}")
+
+
+def _range_bounds(condition):
+    # Limite inferior usado para posicionar a busca binária dentro da partição
+    if condition is None:
+        return None
+    expr = condition.get_expression()
+    op, values = expr["operator"], expr["values"]
+    if op in ("=", ">=", ">", "BETWEEN", "begins_with"):
+        return values[1]
+    return None
+
+
+def _range_past_end(condition, value):
+    # True quando já passamos do fim do intervalo do range (partição ordenada)
+    if condition is None:
+        return False
+    expr = condition.get_expression()
+    op, values = expr["operator"], expr["values"]
+    try:
+        if op == "=":
+            return value > values[1]
+        if op == "BETWEEN":
+            return value > values[2]
+        if op in ("<", "<="):
+            return value > values[1]
+        if op == "begins_with":
+            return not value.startswith(values[1]) and value > values[1]
+    except TypeError:
+        return False
+    return False
+
+
+# ==============================
+# ✍️ Projeções e update expressions
+# ==============================
+
+def _resolve_name(token, names):
+    return ".".join(names.get(part, part) for part in token.strip().split("."))
+
+
+def projection_paths(projection, names=None):
+    if not projection:
+        return None
+    names = names or {}
+    return [_resolve_name(token, names) for token in projection.split(",")]
+
+
+def project(item, paths):
+    if paths is None:
+        return dict(item)
+    result = {}
+    for path in paths:
+        if path in item:
+            result[path] = item[path]
+            continue
+        value, exists = _attr_value(item, path)
+        if not exists:
+            continue
+        target = result
+        parts = path.split(".")
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return result
+
+
+_CLAUSE_RE = re.compile(r"\b(SET|ADD|REMOVE)\b", re.IGNORECASE)
+
+
+def _split_top_level(text):
+    parts, depth, current = [], 0, []
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    if "".join(current).strip():
+        parts.append("".join(current))
+    return parts
+
+
+def _operand(token, item, names, values):
+    token = token.strip()
+    if token.startswith(":"):
+        return values[token]
+    match = re.fullmatch(r"if_not_exists\((.+),(.+)\)", token)
+    if match:
+        current, exists = _attr_value(item, _resolve_name(match.group(1), names))
+        return current if exists else _operand(match.group(2), item, names, values)
+    return _attr_value(item, _resolve_name(token, names))[0]
+
+
+def _set_path(item, path, value):
+    parts = path.split(".")
+    target = item
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = value
+
+
+def _remove_path(item, path):
+    parts = path.split(".")
+    target = item
+    for part in parts[:-1]:
+        target = target.get(part, {})
+    target.pop(parts[-1], None)
+
+
+def apply_update(item, expression, names=None, values=None):
+    names = names or {}
+    values = values or {}
+    tokens = _CLAUSE_RE.split(expression)
+    for clause, body in zip(tokens[1::2], tokens[2::2]):
+        clause = clause.upper()
+        for action in _split_top_level(body):
+            action = action.strip()
+            if not action:
+                continue
+            if clause == "SET":
+                target, expr = action.split("=", 1)
+                path = _resolve_name(target, names)
+                terms = re.split(r"\s([+-])\s", expr.strip())
+                result = _operand(terms[0], item, names, values)
+                for sign, term in zip(terms[1::2], terms[2::2]):
+                    operand = _operand(term, item, names, values)
+                    result = result + operand if sign == "+" else result - operand
+                _set_path(item, path, result)
+            elif clause == "ADD":
+                target, value = action.split(None, 1)
+                path = _resolve_name(target, names)
+                current, exists = _attr_value(item, path)
+                increment = values[value.strip()]
+                if isinstance(increment, set):
+                    _set_path(item, path, (current if exists else set()) | increment)
+                else:
+                    _set_path(item, path, (current if exists else 0) + increment)
+            elif clause == "REMOVE":
+                _remove_path(item, _resolve_name(action, names))
+    return item
+
+
+# ==============================
+# 🗄️ Tabela
+# ==============================
+
+class LocalTable:
+
+    def __init__(self, name, hash_key, range_key=None, indexes=None, projections=None, latency_ms=0):
+        self.name = name
+        self.table_name = name
+        self.key_names = (hash_key,) if range_key is None else (hash_key, range_key)
+        # IndexName -> (hash, range); None representa a própria tabela
+        self.indexes = {None: (hash_key, range_key)}
+        self.indexes.update(indexes or {})
+        # IndexName -> atributos não chave projetados (INCLUDE); índice ausente = ALL
+        self.projections = projections or {}
+        self.latency_ms = latency_ms
+
+        self._items = {}
+        self._sizes = {}
+        self._order = []
+        self._pos = {}
+        self._partitions = {index: {} for index in self.indexes}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    # ---------- estatísticas ----------
+
+    def reset_stats(self):
+        self.consumed_read_units = 0.0
+        self.consumed_write_units = 0.0
+        self.request_count = 0
+        self.items_read = 0
+
+    def _charge(self, read_bytes=0, items=0, write_bytes=None, consistent=False):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        with self._lock:
+            self.request_count += 1
+            self.items_read += items
+            if write_bytes is not None:
+                units = max(1, math.ceil(write_bytes / 1024))
+                self.consumed_write_units += units
+                return units
+            units = read_units(read_bytes, consistent)
+            self.consumed_read_units += units
+            return units
+
+    def _capacity(self, kwargs, units):
+        if kwargs.get("ReturnConsumedCapacity") in ("TOTAL", "INDEXES"):
+            return {"ConsumedCapacity": {"TableName": self.name, "CapacityUnits": units}}
+        return {}
+
+    # ---------- chaves e índices ----------
+
+    def _key(self, item):
+        try:
+            return tuple(item[k] for k in self.key_names)
+        except KeyError as exc:
+            raise _client_error("ValidationException", "PutItem",
+                                f"Chave ausente: {exc.args[0]}") from None
+
+    def _index_entry(self, index, item, key):
+        hash_key, range_key = self.indexes[index]
+        if hash_key not in item or (range_key and range_key not in item):
+            return None
+        sort_value = item[range_key] if range_key else ""
+        return item[hash_key], (sort_value, key)
+
+    def _index_add(self, item, key):
+        for index in self.indexes:
+            entry = self._index_entry(index, item, key)
+            if entry:
+                bisect.insort(self._partitions[index].setdefault(entry[0], []), entry[1])
+
+    def _index_remove(self, item, key):
+        for index in self.indexes:
+            entry = self._index_entry(index, item, key)
+            if not entry:
+                continue
+            partition = self._partitions[index].get(entry[0], [])
+            pos = bisect.bisect_left(partition, entry[1])
+            if pos < len(partition) and partition[pos] == entry[1]:
+                partition.pop(pos)
+
+    def _last_key(self, item, index=None):
+        names = list(self.key_names)
+        if index is not None:
+            names += [n for n in self.indexes[index] if n and n not in names]
+        return {n: item[n] for n in names}
+
+    # ---------- escrita ----------
+
+    def _store(self, item):
+        key = self._key(item)
+        with self._lock:
+            previous = self._items.get(key)
+            if previous is not None:
+                self._index_remove(previous, key)
+            else:
+                self._pos[key] = len(self._order)
+                self._order.append(key)
+            self._items[key] = item
+            self._sizes[key] = item_size(item)
+            self._index_add(item, key)
+        return previous
+
+    def _check(self, kwargs, current, operation):
+        condition = kwargs.get("ConditionExpression")
+        if condition is not None and not evaluate(condition, current or {}):
+            raise _client_error("ConditionalCheckFailedException", operation,
+                                "The conditional request failed")
+
+    def put_item(self, Item, **kwargs):
+        item = copy.deepcopy(Item)
+        self._check(kwargs, self._items.get(self._key(item)), "PutItem")
+        self._store(item)
+        units = self._charge(write_bytes=item_size(item))
+        return self._capacity(kwargs, units)
+
+    def update_item(self, Key, UpdateExpression, **kwargs):
+        key = self._key(Key)
+        current = self._items.get(key)
+        self._check(kwargs, current, "UpdateItem")
+        item = copy.deepcopy(current) if current is not None else copy.deepcopy(Key)
+        apply_update(item, UpdateExpression,
+                     kwargs.get("ExpressionAttributeNames"),
+                     kwargs.get("ExpressionAttributeValues"))
+        self._store(item)
+        units = self._charge(write_bytes=item_size(item))
+        response = self._capacity(kwargs, units)
+        if kwargs.get("ReturnValues") in ("ALL_NEW", "UPDATED_NEW"):
+            response["Attributes"] = copy.deepcopy(item)
+        return response
+
+    def delete_item(self, Key, **kwargs):
+        key = self._key(Key)
+        with self._lock:
+            current = self._items.pop(key, None)
+            if current is not None:
+                self._index_remove(current, key)
+                self._sizes.pop(key, None)
+                self._order[self._pos.pop(key)] = None
+        units = self._charge(write_bytes=item_size(current) if current else 0)
+        return self._capacity(kwargs, units)
+
+    def get_item(self, Key, **kwargs):
+        key = self._key(Key)
+        item = self._items.get(key)
+        consistent = bool(kwargs.get("ConsistentRead"))
+        units = self._charge(read_bytes=self._sizes.get(key, 0), items=1 if item else 0,
+                             consistent=consistent)
+        response = self._capacity(kwargs, units)
+        if item is not None:
+            response["Item"] = project(item, projection_paths(
+                kwargs.get("ProjectionExpression"), kwargs.get("ExpressionAttributeNames")))
+        return response
+
+    def load(self, items):
+        # Carga inicial rápida (sem cópia nem cobrança de write units)
+        for item in items:
+            self._store(item)
+        return self
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return _BatchWriter(self)
+
+    # ---------- leitura ----------
+
+    def _page(self, candidates, kwargs, index=None):
+        limit = kwargs.get("Limit")
+        filter_expr = kwargs.get("FilterExpression")
+        paths = projection_paths(kwargs.get("ProjectionExpression"),
+                                 kwargs.get("ExpressionAttributeNames"))
+        count_only = kwargs.get("Select") == "COUNT"
+
+        included = self.projections.get(index)
+        if included is not None:
+            included = set(included) | set(self.key_names) | {name for name in self.indexes[index] if name}
+
+        items, count, scanned, read_bytes = [], 0, 0, 0
+        last = None
+        for key in candidates:
+            item = self._items.get(key)
+            if item is None:
+                continue
+            scanned += 1
+            if included is None:
+                read_bytes += self._sizes[key]
+            else:
+                item = {name: value for name, value in item.items() if name in included}
+                read_bytes += item_size(item)
+            last = item
+            if filter_expr is None or evaluate(filter_expr, item):
+                count += 1
+                if not count_only:
+                    items.append(project(item, paths))
+            if (limit and scanned >= limit) or read_bytes >= PAGE_SIZE_BYTES:
+                break
+        else:
+            last = None
+
+        units = self._charge(read_bytes=read_bytes, items=scanned,
+                             consistent=bool(kwargs.get("ConsistentRead")))
+        response = {"Count": count, "ScannedCount": scanned}
+        if not count_only:
+            response["Items"] = items
+        if last is not None:
+            response["LastEvaluatedKey"] = self._last_key(last, index)
+        response.update(self._capacity(kwargs, units))
+        return response
+
+    def scan(self, **kwargs):
+        total = len(self._order)
+        segments = kwargs.get("TotalSegments") or 1
+        segment = kwargs.get("Segment") or 0
+        begin = total * segment // segments
+        end = total * (segment + 1) // segments
+
+        start_key = kwargs.get("ExclusiveStartKey")
+        if start_key:
+            begin = self._pos[self._key(start_key)] + 1
+
+        candidates = (k for k in self._order[begin:end] if k is not None)
+        return self._page(candidates, kwargs)
+
+    def query(self, KeyConditionExpression, **kwargs):
+        index = kwargs.get("IndexName")
+        if index not in self.indexes:
+            raise _client_error("ValidationException", "Query", f"Índice inexistente: {index}")
+        hash_key, range_key = self.indexes[index]
+        hash_value, range_cond = _split_key_condition(KeyConditionExpression, hash_key)
+        partition = self._partitions[index].get(hash_value, [])
+        forward = kwargs.get("ScanIndexForward", True)
+
+        start_key = kwargs.get("ExclusiveStartKey")
+        if start_key:
+            entry = ((start_key[range_key] if range_key else ""), self._key(start_key))
+            pos = bisect.bisect_right(partition, entry) if forward else bisect.bisect_left(partition, entry)
+        else:
+            lower = _range_bounds(range_cond)
+            pos = 0 if lower is None or not forward else bisect.bisect_left(partition, (lower,))
+            if not forward:
+                pos = len(partition)
+
+        def candidates():
+            if forward:
+                for sort_value, key in partition[pos:]:
+                    if _range_past_end(range_cond, sort_value):
+                        return
+                    if range_cond is None or evaluate(range_cond, self._items[key]):
+                        yield key
+            else:
+                for sort_value, key in reversed(partition[:pos]):
+                    if range_cond is None or evaluate(range_cond, self._items[key]):
+                        yield key
+
+        return self._page(candidates(), kwargs, index)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class _BatchWriter:
+
+    def __init__(self, table):
+        self.table = table
+
+    def put_item(self, Item):
+        self.table.put_item(Item=Item)
+
+    def delete_item(self, Key):
+        self.table.delete_item(Key=Key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class LocalResource:
+    """Subconjunto de boto3.resource("dynamodb"): Table(), batch_get_item() e batch_write_item().
+
+    max_batch_keys simula o DynamoDB devolvendo UnprocessedKeys/UnprocessedItems
+    (limite de tamanho/throughput): cada chamada só processa essa quantidade de chaves.
+    latency_ms é cobrado uma vez por chamada em lote.
+    """
+
+    BATCH_GET_LIMIT = 100
+    BATCH_WRITE_LIMIT = 25
+
+    def __init__(self, *tables, max_batch_keys=None, latency_ms=0):
+        self.tables = {table.name: table for table in tables}
+        self.max_batch_keys = max_batch_keys
+        self.latency_ms = latency_ms
+        self.request_count = 0
+
+    def Table(self, name):
+        return self.tables[name]
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        self.request_count += 1
+        total = sum(len(request["Keys"]) for request in RequestItems.values())
+        if total > self.BATCH_GET_LIMIT:
+            raise _client_error("ValidationException", "BatchGetItem",
+                                "Too many items requested for the BatchGetItem call")
+        budget = self.max_batch_keys if self.max_batch_keys is not None else total
+        responses, unprocessed = {}, {}
+        for name, request in RequestItems.items():
+            table = self.tables[name]
+            found = responses.setdefault(name, [])
+            extra = {k: request[k] for k in ("ProjectionExpression", "ExpressionAttributeNames") if k in request}
+            for i, key in enumerate(request["Keys"]):
+                if budget <= 0:
+                    unprocessed[name] = dict(request, Keys=request["Keys"][i:])
+                    break
+                budget -= 1
+                item = table.get_item(Key=key, **extra).get("Item")
+                if item is not None:
+                    found.append(item)
+        return {"Responses": responses, "UnprocessedKeys": unprocessed}
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        self.request_count += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        total = sum(len(requests) for requests in RequestItems.values())
+        if total > self.BATCH_WRITE_LIMIT:
+            raise _client_error("ValidationException", "BatchWriteItem",
+                                "Too many items requested for the BatchWriteItem call")
+        for name, requests in RequestItems.items():
+            keys = [self.tables[name]._key(r.get("PutRequest", {}).get("Item") or r["DeleteRequest"]["Key"])
+                    for r in requests]
+            if len(set(keys)) != len(keys):
+                raise _client_error("ValidationException", "BatchWriteItem",
+                                    "Provided list of item keys contains duplicates")
+
+        budget = self.max_batch_keys if self.max_batch_keys is not None else total
+        unprocessed = {}
+        for name, requests in RequestItems.items():
+            table = self.tables[name]
+            for i, request in enumerate(requests):
+                if budget <= 0:
+                    unprocessed[name] = requests[i:]
+                    break
+                budget -= 1
+                if "PutRequest" in request:
+                    table.put_item(Item=request["PutRequest"]["Item"])
+                else:
+                    table.delete_item(Key=request["DeleteRequest"]["Key"])
+        return {"UnprocessedItems": unprocessed}
@@ -1,13 +1,22 @@
 ## metricsToday/app.py
 
-import boto3
-from datetime import datetime, timedelta, timezone
-from collections import defaultdict
-import statistics
 import json
-
-dynamodb = boto3.resource('dynamodb')
+from datetime import date
+
+from common.aws import lazy_resource
+from common.messages import day_buckets, ACTIVITY_FIELDS, RESPONSE_LOOKAHEAD
+from common.records import load_records
+from common.rollups import load_rollups, rollups_enabled, METRICS_TABLE
+from common.columnar import frame_from_rows, rollup_frame
+from common.payloads import COMPARE_TO, dias_de_comparacao, metrics_payload
+from common.timezones import day_range, today
+from common.cache import cached_endpoint
+from common.responses import compressed_endpoint, dumps
+from common.conditional import conditional_endpoint
+
+dynamodb = lazy_resource('dynamodb')
 table = dynamodb.Table('crm-mensagens')  # Altere aqui
+metrics_table = dynamodb.Table(METRICS_TABLE)
 
 # ==============================
 # 📦 Headers de CORS reutilizáveis
@@ -19,84 +28,61 @@ CORS_HEADERS = {
     "Access-Control-Allow-Headers": "*"
 }
 
-def calcular_variacao(hoje, ontem):
-    if ontem == 0:
-        return {"value": hoje, "type": "increase"}
-    diff = hoje - ontem
-    tipo = "increase" if diff >= 0 else "decrease"
-    return {"value": abs(diff), "type": tipo}
-
-def extrair_metricas_por_dia(mensagens, data_referencia):
-    total = 0
-    grupos = set()
-    por_grupo = defaultdict(list)
-
-    for msg in mensagens:
-        try:
-            ts = datetime.fromisoformat(msg['timestamp'].replace("Z", "+00:00"))
-            if ts.date() == data_referencia:
-                total += 1
-                grupo = msg.get('groupId')
-                direcao = msg.get('direction')
-                grupos.add(grupo)
-                por_grupo[grupo].append((ts, direcao))
-        except:
-            continue
-
-    tempos_resposta = []
-    aguardando = 0
-
-    for msgs in por_grupo.values():
-        msgs.sort()
-        for i in range(len(msgs) - 1):
-            if msgs[i][1] == 'client' and msgs[i+1][1] == 'team':
-                delta = (msgs[i+1][0] - msgs[i][0]).total_seconds() / 60
-                if 0 < delta < 180:
-                    tempos_resposta.append(delta)
-        if msgs and msgs[-1][1] == 'client':
-            aguardando += 1
-
-    media_resposta = round(statistics.mean(tempos_resposta), 2) if tempos_resposta else 0
-
-    return {
-        "totalMessages": total,
-        "averageResponseTime": media_resposta,
-        "activeGroups": len(grupos),
-        "waitingClients": aguardando
-    }
-
+PARAMS = ("date", "compareTo")
+
+def parse_query(query):
+    """(dia, compareTo) pedidos; ValueError se inválidos."""
+    try:
+        dia = date.fromisoformat(query["date"]) if query.get("date") else today()
+    except ValueError:
+        raise ValueError("date precisa estar no formato YYYY-MM-DD") from None
+    compare_to = query.get("compareTo") or COMPARE_TO[0]
+    if compare_to not in COMPARE_TO:
+        raise ValueError(f"compareTo inválido: {compare_to} (válidos: {', '.join(COMPARE_TO)})")
+    return dia, compare_to
+
+def sequencias(dias):
+    """Dias locais em sequências de dias consecutivos: [(primeiro, último)]."""
+    runs = []
+    for dia in sorted(dias):
+        if runs and (dia - runs[-1][1]).days == 1:
+            runs[-1][1] = dia
+        else:
+            runs.append([dia, dia])
+    return runs
+
+def version_scope(query):
+    dia, compare_to = parse_query(query)
+    dias = [dia] + dias_de_comparacao(dia, compare_to)
+    inicio, fim = day_range(min(dias), max(dias))
+    return inicio, fim + RESPONSE_LOOKAHEAD, today().isoformat()
+
+@compressed_endpoint
+@cached_endpoint("metricsToday", PARAMS)
+@conditional_endpoint("metricsToday", PARAMS, version_scope, lambda: metrics_table, CORS_HEADERS)
 def lambda_handler(event, context):
-    hoje = datetime.now(timezone.utc).date()
-    ontem = hoje - timedelta(days=1)
-
-    response = table.scan()
-    mensagens = response.get("Items", [])
-
-    metricas_hoje = extrair_metricas_por_dia(mensagens, hoje)
-    metricas_ontem = extrair_metricas_por_dia(mensagens, ontem)
-
-    response_body = {
-        "date": hoje.isoformat(),
-        "metrics": {
-            "totalMessages": {
-                "value": metricas_hoje["totalMessages"],
-                "change": calcular_variacao(metricas_hoje["totalMessages"], metricas_ontem["totalMessages"])
-            },
-            "averageResponseTime": {
-                "value": metricas_hoje["averageResponseTime"],
-                "unit": "minutes",
-                "change": calcular_variacao(metricas_hoje["averageResponseTime"], metricas_ontem["averageResponseTime"])
-            },
-            "activeGroups": {
-                "value": metricas_hoje["activeGroups"],
-                "change": calcular_variacao(metricas_hoje["activeGroups"], metricas_ontem["activeGroups"])
-            },
-            "waitingClients": {
-                "value": metricas_hoje["waitingClients"],
-                "change": calcular_variacao(metricas_hoje["waitingClients"], metricas_ontem["waitingClients"])
-            }
-        }
-    }
+    query = event.get("queryStringParameters") or {}
+    try:
+        hoje, compare_to = parse_query(query)
+    except ValueError as exc:
+        return {"statusCode": 400, "headers": CORS_HEADERS, "body": json.dumps({"error": str(exc)})}
+
+    # Só os dias usados (ex.: hoje e o mesmo dia da semana passada), sem os do meio
+    dias = [hoje] + dias_de_comparacao(hoje, compare_to)
+    janelas = [day_range(primeiro, ultimo) for primeiro, ultimo in sequencias(dias)]
+
+    # Rollups (UTC) que cobrem os dias no fuso local: da tabela de métricas ou calculados das mensagens
+    if rollups_enabled():
+        dias_utc = sorted({dia for inicio, fim in janelas for dia in day_buckets(inicio, fim)})
+        rollups = frame_from_rows(load_rollups(metrics_table, dias_utc))
+    else:
+        # + folga para as respostas depois da meia-noite de dias passados
+        mensagens = []
+        for inicio, fim in janelas:
+            mensagens.extend(load_records(table, inicio, fim + RESPONSE_LOOKAHEAD, fields=ACTIVITY_FIELDS))
+        rollups = rollup_frame(mensagens)
+
+    response_body = metrics_payload(rollups, hoje, compare_to)
 
     print(response_body)
 
@@ -108,5 +94,5 @@ def lambda_handler(event, context):
         "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
         "Access-Control-Allow-Headers": "*"
     },
-        "body": json.dumps(response_body)
+        "body": dumps(response_body)
     }
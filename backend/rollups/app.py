@@ -0,0 +1,31 @@
+from common.aws import lazy_resource
+from common.rollups import apply_messages, METRICS_TABLE
+from common.conditional import bump_watermarks
+from common.day_summaries import bump_late_days
+from common.stream import batch_failures, new_messages
+
+dynamodb = lazy_resource('dynamodb')
+metrics_table = dynamodb.Table(METRICS_TABLE)
+
+# ==============================
+# 🔁 Stream de crm-mensagens → rollups horários
+# Cada lote do stream é agregado em memória e aplicado com um update por
+# (dia, hora, grupo) tocado, mais a marca d'água de cada dia (ETag dos
+# endpoints, common/conditional.py) e o contador de atrasadas dos dias já
+# fechados (resumos de /activity/weekly, common/day_summaries.py).
+# Reentregas não contam duas vezes nos rollups (marcadores em crm-stream-applied,
+# common/stream.py); marca d'água e atrasadas a mais só fazem o ETag/resumo
+# ser recalculado.
+# ==============================
+
+def lambda_handler(event, context):
+    registros = new_messages(event)
+    if not registros:
+        return batch_failures([], set())
+
+    mensagens = [item for _, item in registros]
+    atualizados, falhas = apply_messages(metrics_table, mensagens, dynamodb)
+    bump_watermarks(metrics_table, mensagens)
+    bump_late_days(metrics_table, mensagens)
+    print(f"📈 {len(mensagens)} mensagens → {atualizados} rollups atualizados, {len(falhas)} grupos com falha")
+    return batch_failures(registros, falhas)
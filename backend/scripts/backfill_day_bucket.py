@@ -0,0 +1,49 @@
+import argparse
+import sys
+from pathlib import Path
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.messages import day_shard, iter_scan  # noqa: E402
+
+# ==============================
+# 🛠️ Preenche o atributo "dayShard" das mensagens antigas
+# Necessário para que apareçam no dayShard-timestamp-index. Remove o "day"
+# do índice anterior (day-timestamp-index, que pode ser apagado depois).
+# Uso: python scripts/backfill_day_bucket.py [--table crm-mensagens] [--dry-run]
+# ==============================
+
+
+def backfill(table, dry_run=False, segments=8):
+    updated = 0
+    items = iter_scan(table, segments=segments, fields=("messageId", "timestamp"),
+                      FilterExpression=Attr("dayShard").not_exists())
+    for item in items:
+        if not dry_run:
+            table.update_item(
+                Key={"messageId": item["messageId"], "timestamp": item["timestamp"]},
+                UpdateExpression="SET #s = :s REMOVE #d",
+                ExpressionAttributeNames={"#s": "dayShard", "#d": "day"},
+                ExpressionAttributeValues={":s": day_shard(item["timestamp"], item["messageId"])},
+            )
+        updated += 1
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preenche o atributo dayShard em crm-mensagens")
+    parser.add_argument("--table", default="crm-mensagens")
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    table = boto3.resource("dynamodb").Table(args.table)
+    total = backfill(table, dry_run=args.dry_run, segments=args.segments)
+    print(f"✅ {total} mensagens {'a atualizar' if args.dry_run else 'atualizadas'}")
+
+
+if __name__ == "__main__":
+    main()
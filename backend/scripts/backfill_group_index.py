@@ -0,0 +1,56 @@
+import argparse
+import sys
+from pathlib import Path
+
+import boto3
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.group_state import state_from_item, stored_status  # noqa: E402
+from common.groups import name_key  # noqa: E402
+from common.messages import iter_scan  # noqa: E402
+
+# ==============================
+# 🛠️ Preenche status e nameKey dos grupos antigos em crm-groupId
+# Necessário para que apareçam nos índices de GET /groups
+# (status-lastActivity-index, status-messageCount-index, status-nameKey-index).
+# Grupos sem estado da conversa (sem mensagens) só recebem nameKey.
+# Uso: python scripts/backfill_group_index.py [--table crm-groupId] [--dry-run]
+# ==============================
+
+
+def backfill(table, dry_run=False, segments=4):
+    updated = 0
+    for item in iter_scan(table, segments=segments):
+        names = {"#k": "nameKey"}
+        values = {":k": name_key(item.get("groupName"), item["groupId"])}
+        sets = ["#k = :k"]
+        if item.get("lastActivity"):
+            names["#s"] = "status"
+            values[":s"] = stored_status(state_from_item(item))
+            sets.append("#s = :s")
+        if not dry_run:
+            table.update_item(
+                Key={"groupId": item["groupId"]},
+                UpdateExpression="SET " + ", ".join(sets),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+            )
+        updated += 1
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preenche status e nameKey em crm-groupId")
+    parser.add_argument("--table", default="crm-groupId")
+    parser.add_argument("--segments", type=int, default=4)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    table = boto3.resource("dynamodb").Table(args.table)
+    total = backfill(table, dry_run=args.dry_run, segments=args.segments)
+    print(f"✅ {total} grupos {'a atualizar' if args.dry_run else 'atualizados'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import boto3
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.messages import ACTIVITY_FIELDS, CONVERSATION_FIELDS, RESPONSE_LOOKAHEAD  # noqa: E402
+from common.records import load_records  # noqa: E402
+from common.rollups import (  # noqa: E402
+    METRICS_TABLE, compute_member_rollups, compute_rollups, pending_from_messages, write_member_rollups,
+    write_pending, write_rollups,
+)
+
+# ==============================
+# 🛠️ Reconstrói os rollups horários (e membros/tipos por hora) a partir de crm-mensagens
+# Uso: python scripts/backfill_rollups.py --start 2025-07-01 [--end 2025-08-05] [--pending]
+# Sobrescreve os dias informados; rode antes de ligar ROLLUPS_ENABLED.
+# ==============================
+
+
+def backfill_day(messages_table, metrics_table, day):
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    # content/from para os membros e tipos de /groups/{groupId}/stats
+    records = load_records(messages_table, start, start + timedelta(days=1) + RESPONSE_LOOKAHEAD,
+                           fields=CONVERSATION_FIELDS)
+    rows = [row for row in compute_rollups(records).values() if row["date"] == day.isoformat()]
+    write_rollups(metrics_table, rows)
+    write_member_rollups(metrics_table, [row for row in compute_member_rollups(records).values()
+                                         if row["date"] == day.isoformat()])
+    return rows
+
+
+def backfill(messages_table, metrics_table, start, end, pending=False):
+    total = 0
+    day = start
+    while day <= end:
+        rows = backfill_day(messages_table, metrics_table, day)
+        total += len(rows)
+        print(f"📅 {day.isoformat()}: {len(rows)} rollups")
+        day += timedelta(days=1)
+
+    if pending:
+        # Clientes aguardando agora, para o stream continuar o pareamento
+        now = datetime.now(timezone.utc)
+        records = load_records(messages_table, now - RESPONSE_LOOKAHEAD, now + timedelta(minutes=1),
+                               fields=ACTIVITY_FIELDS)
+        write_pending(metrics_table, pending_from_messages(records))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill dos rollups horários")
+    parser.add_argument("--start", required=True, type=date.fromisoformat)
+    parser.add_argument("--end", type=date.fromisoformat, default=datetime.now(timezone.utc).date())
+    parser.add_argument("--messages-table", default="crm-mensagens")
+    parser.add_argument("--metrics-table", default=METRICS_TABLE)
+    parser.add_argument("--pending", action="store_true", help="regrava também os clientes pendentes")
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource("dynamodb")
+    total = backfill(dynamodb.Table(args.messages_table), dynamodb.Table(args.metrics_table),
+                     args.start, args.end, pending=args.pending)
+    print(f"✅ {total} rollups gravados")
+
+
+if __name__ == "__main__":
+    main()
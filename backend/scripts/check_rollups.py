@@ -0,0 +1,45 @@
+import argparse
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import boto3
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.messages import ACTIVITY_FIELDS, RESPONSE_LOOKAHEAD  # noqa: E402
+from common.records import load_records  # noqa: E402
+from common.rollups import METRICS_TABLE, compare_rollups, compute_rollups, load_rollups  # noqa: E402
+
+# ==============================
+# 🔍 Compara os rollups gravados com um recálculo a partir das mensagens
+# Uso: python scripts/check_rollups.py --date 2025-08-05
+# Sai com código 1 se houver divergência.
+# ==============================
+
+
+def check_day(messages_table, metrics_table, day):
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    records = load_records(messages_table, start, start + timedelta(days=1) + RESPONSE_LOOKAHEAD,
+                           fields=ACTIVITY_FIELDS)
+    expected = {k: row for k, row in compute_rollups(records).items() if row["date"] == day.isoformat()}
+    return compare_rollups(expected, load_rollups(metrics_table, [day.isoformat()]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checagem de consistência dos rollups")
+    parser.add_argument("--date", required=True, type=date.fromisoformat)
+    parser.add_argument("--messages-table", default="crm-mensagens")
+    parser.add_argument("--metrics-table", default=METRICS_TABLE)
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource("dynamodb")
+    diffs = check_day(dynamodb.Table(args.messages_table), dynamodb.Table(args.metrics_table), args.date)
+    for key, field, expected, stored in diffs:
+        print(f"❌ {key} {field}: esperado={expected} gravado={stored}")
+    print(f"{'✅' if not diffs else '⚠️'} {len(diffs)} divergências em {args.date.isoformat()}")
+    sys.exit(1 if diffs else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import boto3
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.messages import CONVERSATION_FIELDS  # noqa: E402
+from common.records import load_records  # noqa: E402
+from common.group_state import build_states, diff_states, load_states, write_states  # noqa: E402
+
+# ==============================
+# 🛠️ Reconstrói o estado da conversa por grupo a partir de crm-mensagens
+# Uso: python scripts/replay_group_state.py --days 90 [--check]
+# Sem --check sobrescreve o estado dos grupos; rode antes de ligar GROUP_STATE_ENABLED.
+# Com --check só compara e sai com código 1 se houver divergência.
+# ==============================
+
+
+def replay(messages_table, days, now=None):
+    now = now or datetime.now(timezone.utc)
+    records = load_records(messages_table, now - timedelta(days=days), now + timedelta(minutes=1),
+                           fields=CONVERSATION_FIELDS)
+    return build_states(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay do estado por grupo")
+    parser.add_argument("--days", type=int, default=90, help="histórico considerado no replay")
+    parser.add_argument("--messages-table", default="crm-mensagens")
+    parser.add_argument("--groups-table", default="crm-groupId")
+    parser.add_argument("--check", action="store_true", help="só compara com o estado gravado")
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource("dynamodb")
+    groups_table = dynamodb.Table(args.groups_table)
+    states = replay(dynamodb.Table(args.messages_table), args.days)
+
+    if not args.check:
+        write_states(groups_table, states)
+        print(f"✅ {len(states)} grupos gravados")
+        return
+
+    diffs = diff_states(states, load_states(groups_table))
+    for group_id, field, expected, stored in diffs:
+        print(f"❌ {group_id} {field}: esperado={expected} gravado={stored}")
+    print(f"{'✅' if not diffs else '⚠️'} {len(diffs)} divergências em {len(states)} grupos")
+    sys.exit(1 if diffs else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# As lambdas importam "common" como pacote de topo (layer em /opt/python)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-2")
+
+
+@pytest.fixture(autouse=True)
+def clear_group_names():
+    # O cache de nomes é do módulo (sobrevive entre invocações), não entre testes
+    from common.groups import clear_names
+    clear_names()
+    yield
+    clear_names()
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache(monkeypatch):
+    # Os testes comparam modos do mesmo endpoint; o cache de respostas só em test_cache.py
+    from common.cache import clear_cache
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "false")
+    # ETag/304 (marca d'água em crm-metricas) só em test_conditional.py
+    monkeypatch.setenv("CONDITIONAL_REQUESTS_ENABLED", "false")
+    clear_cache()
+    yield
+    clear_cache()
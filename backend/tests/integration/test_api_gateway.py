@@ -5,7 +5,7 @@ import pytest
 import requests
 
 """
-Make sure env variable AWS_SAM_STACK_NAME exists with the name of the stack we are going to test. 
+Make sure env variable AWS_SAM_STACK_NAME exists with the name of the stack we are going to test.
 """
 
 
@@ -17,7 +17,7 @@ class TestApiGateway:
         stack_name = os.environ.get("AWS_SAM_STACK_NAME")
 
         if stack_name is None:
-            raise ValueError('Please set the AWS_SAM_STACK_NAME environment variable to the name of your stack')
+            pytest.skip("AWS_SAM_STACK_NAME não definido (nome da stack implantada)")
 
         client = boto3.client("cloudformation")
 
@@ -30,16 +30,22 @@ class TestApiGateway:
 
         stacks = response["Stacks"]
         stack_outputs = stacks[0]["Outputs"]
-        api_outputs = [output for output in stack_outputs if output["OutputKey"] == "HelloWorldApi"]
+        api_outputs = [output for output in stack_outputs if output["OutputKey"] == "CrmApiUrl"]
 
         if not api_outputs:
-            raise KeyError(f"HelloWorldAPI not found in stack {stack_name}")
+            raise KeyError(f"CrmApiUrl not found in stack {stack_name}")
 
         return api_outputs[0]["OutputValue"]  # Extract url from stack outputs
 
-    def test_api_gateway(self, api_gateway_url):
+    @pytest.mark.parametrize("path, key", [
+        ("/metrics/today", "metrics"),
+        ("/alerts?limit=5", "alerts"),
+        ("/groups/overview", "groups"),
+        ("/activity/hourly", "data"),
+    ])
+    def test_api_gateway(self, api_gateway_url, path, key):
         """ Call the API Gateway endpoint and check the response """
-        response = requests.get(api_gateway_url)
+        response = requests.get(api_gateway_url + path)
 
         assert response.status_code == 200
-        assert response.json() == {"message": "hello world"}
+        assert key in response.json()
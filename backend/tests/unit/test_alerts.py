@@ -0,0 +1,111 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from alerts import app as alerts
+from common.pagination import encode_cursor
+from local import harness, synthetic
+from local.table import LocalResource
+
+END = datetime(2025, 8, 6, tzinfo=timezone.utc)
+
+
+def call(query):
+    response = alerts.lambda_handler({"queryStringParameters": query}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def setup_tables(monkeypatch):
+    items = synthetic.generate_messages(4000, groups=40, days=3, end=END, client_ratio=0.7)
+    monkeypatch.setattr(alerts, "messages_table", synthetic.load(synthetic.messages_table(), items))
+    groups = synthetic.load(synthetic.groups_table(), synthetic.generate_groups(40))
+    monkeypatch.setattr(alerts, "groups_table", groups)
+    monkeypatch.setattr(alerts, "dynamodb", LocalResource(groups))
+    monkeypatch.setattr(alerts, "datetime", harness.frozen_datetime(END))
+    monkeypatch.setenv("GROUP_STATE_ENABLED", "false")
+
+
+def test_cursor_walks_every_alert_once(monkeypatch):
+    setup_tables(monkeypatch)
+    _, full = call({"limit": "1000"})
+    assert full["total"] > 5 and full["hasMore"] is False
+
+    seen, pages, cursor = [], [], None
+    while True:
+        query = {"limit": "3"}
+        if cursor:
+            query["cursor"] = cursor
+        status, body = call(query)
+        assert status == 200
+        seen.extend(a["id"] for a in body["alerts"])
+        pages.append(body["page"])
+        cursor = body["nextCursor"]
+        assert body["hasMore"] is (cursor is not None)
+        if not cursor:
+            break
+
+    assert seen == [a["id"] for a in full["alerts"]]
+    assert pages == list(range(1, len(pages) + 1))
+
+
+@pytest.mark.parametrize("query", [
+    {"cursor": "nao-e-um-cursor"},
+    {"cursor": encode_cursor({"k": [1, 2], "p": 1})},
+    {"cursor": encode_cursor({"k": ["2025-08-05T10:00:00.000Z"], "p": 1})},
+    {"limit": "0"}, {"limit": "-1"}, {"limit": "dez"}, {"limit": "1001"},
+])
+def test_invalid_query_is_400(monkeypatch, query):
+    setup_tables(monkeypatch)
+    status, body = call(query)
+    assert status == 400
+    assert "error" in body
+
+
+def test_group_names_batched_and_cached(monkeypatch):
+    setup_tables(monkeypatch)
+    resource = LocalResource(alerts.groups_table, max_batch_keys=7)
+    monkeypatch.setattr(alerts, "dynamodb", resource)
+
+    _, body = call({"limit": "1000"})
+    assert all(a["groupName"] == f"Cliente {a['groupId'][:4]}" for a in body["alerts"])
+    # BatchGetItem devolvendo 7 chaves por vez: as demais voltam em UnprocessedKeys
+    assert resource.request_count == -(-len(body["alerts"]) // 7)
+
+    _, again = call({"limit": "1000"})
+    assert again == body
+    assert resource.request_count == -(-len(body["alerts"]) // 7)
+
+
+def test_top_k_matches_full_sort(monkeypatch):
+    from common import pagination, payloads
+
+    states = [{"groupId": f"{i:04d}@g.us", "lastTeam": None, "messageCount": 1, "groupName": "x",
+               "lastClient": {"id": str(i), "name": "c", "text": "oi", "timestamp": f"2025-08-05T{i % 24:02d}:00:00.000Z"}}
+              for i in range(60)]
+    for state in states:
+        state["lastRelevantClient"] = state["lastClient"]
+    candidates = list(payloads.alert_candidates(states, END))
+    ordered = sorted(candidates, key=payloads.candidate_key)
+
+    cursor = None
+    for page in range(1, 8):
+        top, number, cursor = pagination.paginate_top(candidates, payloads.candidate_key, 10, cursor)
+        assert top == ordered[(page - 1) * 10:page * 10] and number == page
+        assert (cursor is None) is (page * 10 >= len(ordered))
+        if cursor is None:
+            break
+
+    built = []
+    monkeypatch.setattr(payloads, "build_alert", lambda c: built.append(c) or {"groupId": c[1], "groupName": "x"})
+    body = payloads.alerts_payload(states, END, limit=10)
+    assert len(built) == 10 and body["total"] == len(candidates) and body["hasMore"]
+
+
+def test_waiting_time_is_measured_from_utc_now(monkeypatch):
+    setup_tables(monkeypatch)
+    _, body = call({"limit": "1000"})
+    assert body["alerts"]
+    for alert in body["alerts"]:
+        sent = datetime.fromisoformat(alert["lastMessage"]["timestamp"].replace("Z", "+00:00"))
+        assert alert["waitingTime"]["value"] == int((END - sent).total_seconds() / 60)
@@ -0,0 +1,84 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from activity import hourly
+from common import cache
+from local import synthetic
+from local.table import LocalTable
+
+END = datetime(2025, 8, 6, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "true")
+    monkeypatch.setenv("ROLLUPS_ENABLED", "false")
+    items = synthetic.generate_messages(2000, groups=10, days=2, end=END)
+    msgs = synthetic.load(synthetic.messages_table(), items)
+    monkeypatch.setattr(hourly, "messages_table", msgs)
+    return msgs
+
+
+def call(day):
+    return hourly.lambda_handler({"queryStringParameters": {"date": day}}, None)
+
+
+def test_memory_tier_serves_warm_invocations(tables):
+    first = call("2025-08-05")
+    tables.reset_stats()
+    second = call("2025-08-05")
+
+    assert first["headers"]["X-Cache"] == "MISS"
+    assert second["headers"]["X-Cache"] == "HIT-MEMORY"
+    assert json.loads(second["body"]) == json.loads(first["body"])
+    assert tables.request_count == 0
+    assert cache.stats == {"memoryHits": 1, "sharedHits": 0, "misses": 1}
+
+    assert call("2025-08-04")["headers"]["X-Cache"] == "MISS"
+
+
+def test_shared_tier_across_instances(tables):
+    shared = LocalTable("crm-cache", "cacheKey")
+    cache.set_shared_table(shared)
+    first = call("2025-08-05")
+
+    # Outra instância: memória vazia, mesma tabela compartilhada
+    cache._memory.clear()
+    tables.reset_stats()
+    second = call("2025-08-05")
+    assert second["headers"]["X-Cache"] == "HIT-SHARED"
+    assert second["body"] == first["body"]
+    assert tables.request_count == 0
+    assert call("2025-08-05")["headers"]["X-Cache"] == "HIT-MEMORY"
+
+
+def test_entries_expire(tables, monkeypatch):
+    clock = [1_000_000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: clock[0])
+    call("2025-08-05")
+    clock[0] += cache.TTL_SECONDS["hourly"] - 1
+    assert call("2025-08-05")["headers"]["X-Cache"] == "HIT-MEMORY"
+    clock[0] += 2
+    assert call("2025-08-05")["headers"]["X-Cache"] == "MISS"
+
+
+def test_key_normalization_and_errors():
+    key = cache.cache_key("alerts", {"limit": "010", "priority": " HIGH ", "other": "x"},
+                          ("limit", "priority", "cursor"))
+    assert key == cache.cache_key("alerts", {"priority": "high", "limit": "10", "cursor": ""},
+                                  ("limit", "priority", "cursor"))
+
+    calls = []
+
+    @cache.cached_endpoint("weekly", ("startDate",))
+    def handler(event, context):
+        calls.append(event)
+        return {"statusCode": 400, "headers": {}, "body": "{}"}
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("RESULT_CACHE_ENABLED", "true")
+        handler({"queryStringParameters": None}, None)
+        handler({"queryStringParameters": None}, None)
+    assert len(calls) == 2
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[2]
+
+# Orçamento do import de cada handler (ms, cumulativo do python -X importtime).
+# boto3 (~250 ms) e boto3.resource (~150 ms) ficam para o primeiro uso; numpy
+# (~120 ms) segue no import de activity, metricsToday e dashboard, que sempre o usam.
+BUDGET_MS = {
+    "alerts.app": 150,
+    "groupsOverview.app": 150,
+    "groupsList.app": 150,
+    "webhook.app": 150,
+    "webhook.consumer": 150,
+    "metricsToday.app": 350,
+    "dashboard.app": 350,
+    "groupStats.app": 350,
+    "activity.hourly": 350,
+    "activity.weekly": 350,
+}
+
+LAZY_MODULES = ("boto3", "botocore.session", "rapidfuzz")
+
+
+def import_times(module):
+    # Interpretador novo a cada medida: o que importa é o cold start
+    env = dict(os.environ, AWS_DEFAULT_REGION="us-east-2", PYTHONPATH=str(BACKEND))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BACKEND, env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+@pytest.mark.parametrize("module", sorted(BUDGET_MS))
+def test_handler_import_time(module):
+    # Melhor de 3 (a primeira também compila os .pyc)
+    runs = [import_times(module) for _ in range(3)]
+    best = min(run[module] for run in runs)
+
+    assert not [name for name in LAZY_MODULES if name in runs[-1]]
+    assert best <= BUDGET_MS[module], f"{module}: {best:.0f} ms (orçamento {BUDGET_MS[module]} ms)"
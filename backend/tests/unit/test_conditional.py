@@ -0,0 +1,80 @@
+import json
+from datetime import timedelta
+
+import pytest
+
+from common import conditional
+from common.messages import iter_scan
+from common.timezones import today
+from local import harness, synthetic
+
+
+@pytest.fixture
+def tables():
+    tables = harness.build_dataset(1500, groups=8, days=3, client_ratio=0.7)
+    # Marca d'água como se o stream tivesse visto todas as mensagens
+    conditional.bump_watermarks(tables["metrics"], iter_scan(tables["messages"]))
+    return tables
+
+
+def call(name, tables, etag=None, now=harness.END, env=()):
+    module = harness.load_handler(name)
+    event = {"queryStringParameters": harness.HANDLERS[name][1](today(now=now)),
+             "headers": {"if-none-match": etag} if etag else {}}
+    harness.reset_stats(tables)
+    env = dict(env, CONDITIONAL_REQUESTS_ENABLED="true")
+    with harness.installed(module, tables, harness.RAW, now=now, env=env):
+        response = module.lambda_handler(event, None)
+    return response, tables["messages"].consumed_read_units
+
+
+def test_watermarks_count_messages_per_day():
+    table = synthetic.metrics_table()
+    items = [{"timestamp": ts} for ts in ("2025-08-05T23:59:00.000Z", "2025-08-06T00:01:00.000Z",
+                                          "2025-08-06T10:00:00.000Z")]
+    conditional.bump_watermarks(table, items)
+    conditional.bump_watermarks(table, items[2:])
+
+    start = harness.END - timedelta(days=2)
+    assert conditional.load_watermarks(table, start, harness.END) == [
+        ("2025-08-05", 1, "2025-08-05T23:59:00.000Z"),
+        ("2025-08-06", 3, "2025-08-06T10:00:00.000Z"),
+    ]
+
+
+@pytest.mark.parametrize("name", ["hourly", "weekly", "metricsToday", "dashboard"])
+def test_unchanged_poll_is_304_without_reading_messages(tables, name):
+    first, _ = call(name, tables)
+    etag = first["headers"]["ETag"]
+
+    second, units = call(name, tables, etag=etag)
+    assert second["statusCode"] == 304
+    assert second["body"] == "" and second["headers"]["ETag"] == etag
+    assert units == 0
+
+    # Mensagem nova na janela → nova versão, resposta completa
+    conditional.bump_watermarks(tables["metrics"], [{"timestamp": "2025-08-06T14:00:00.000Z"}])
+    third, units = call(name, tables, etag=etag)
+    assert third["statusCode"] == 200
+    assert third["headers"]["ETag"] != etag
+    assert units > 0
+
+
+def test_clock_dependent_endpoints_change_every_minute(tables):
+    first, _ = call("alerts", tables)
+    etag = first["headers"]["ETag"]
+
+    assert call("alerts", tables, etag=etag, now=harness.END + timedelta(seconds=30))[0]["statusCode"] == 304
+    later, _ = call("alerts", tables, etag=etag, now=harness.END + timedelta(minutes=1))
+    assert later["statusCode"] == 200
+    assert json.loads(later["body"])["alerts"] != json.loads(first["body"])["alerts"]
+
+
+def test_cached_response_answers_304(tables):
+    env = {"RESULT_CACHE_ENABLED": "true"}
+    first, _ = call("hourly", tables, env=env)
+    cached, units = call("hourly", tables, etag=first["headers"]["ETag"], env=env)
+
+    assert cached["statusCode"] == 304
+    assert cached["headers"]["X-Cache"] == "HIT-MEMORY"
+    assert units == 0
@@ -0,0 +1,87 @@
+import json
+from datetime import timedelta
+
+import pytest
+
+from common.timezones import today
+from local import harness
+
+SECTIONS = {
+    "metrics": ("metricsToday", lambda day: None),
+    "alerts": ("alerts", lambda day: None),
+    "groups": ("groupsOverview", lambda day: None),
+    "hourly": ("hourly", lambda day: {"date": day.isoformat()}),
+    "weekly": ("weekly", lambda day: {"startDate": (day - timedelta(days=6)).isoformat(),
+                                      "endDate": day.isoformat()}),
+}
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return harness.build_dataset(3000, groups=15, days=10, zipf=1.1, client_ratio=0.7)
+
+
+def call(name, tables, mode, query=None):
+    module = harness.load_handler(name)
+    harness.reset_stats(tables)
+    with harness.installed(module, tables, mode):
+        response = module.lambda_handler({"queryStringParameters": query}, None)
+    return response, harness.read_units(tables)
+
+
+@pytest.mark.parametrize("mode", [harness.RAW, harness.MATERIALIZED])
+def test_sections_match_endpoints(tables, mode):
+    response, units = call("dashboard", tables, mode)
+    data = json.loads(response["body"])
+    day = today(now=harness.END)
+
+    assert response["statusCode"] == 200
+    assert list(data) == list(SECTIONS)
+    endpoint_units = []
+    for section, (name, query) in SECTIONS.items():
+        expected, read = call(name, tables, mode, query(day))
+        endpoint_units.append(read)
+        assert data[section] == json.loads(expected["body"]), section
+    # Uma leitura para as cinco seções, não uma por seção
+    assert units < sum(endpoint_units)
+
+
+def test_include_skips_sections(tables):
+    response, units = call("dashboard", tables, harness.RAW, {"include": "hourly, weekly"})
+    _, full_units = call("dashboard", tables, harness.RAW)
+
+    assert list(json.loads(response["body"])) == ["hourly", "weekly"]
+    assert units < full_units
+
+    response, _ = call("dashboard", tables, harness.RAW, {"include": "metrics,chart"})
+    assert response["statusCode"] == 400
+    assert "chart" in json.loads(response["body"])["error"]
+
+
+@pytest.mark.parametrize("query", [{"include": "alerts", "limit": "0"}, {"limit": "-1"}])
+def test_invalid_limit_is_400(tables, query):
+    response, _ = call("dashboard", tables, harness.RAW, query)
+    assert response["statusCode"] == 400
+    assert "limit" in json.loads(response["body"])["error"]
+
+
+def test_distant_date_reads_only_the_section_windows(tables):
+    day = today(now=harness.END) - timedelta(days=8)
+    query = {"include": "metrics,hourly", "date": day.isoformat()}
+    response, _ = call("dashboard", tables, harness.RAW, query)
+    data = json.loads(response["body"])
+    read = tables["messages"].items_read
+
+    hourly, _ = call("hourly", tables, harness.RAW, {"date": day.isoformat()})
+    hourly_read = tables["messages"].items_read
+    metrics, _ = call("metricsToday", tables, harness.RAW)
+    metrics_read = tables["messages"].items_read
+
+    assert data == {"metrics": json.loads(metrics["body"]), "hourly": json.loads(hourly["body"])}
+    # Os dias entre date= e ontem não são lidos
+    assert read == hourly_read + metrics_read
+
+
+def test_weekly_range_is_capped(tables):
+    response, _ = call("dashboard", tables, harness.RAW, {"include": "weekly", "startDate": "2020-01-01"})
+    assert response["statusCode"] == 400
@@ -0,0 +1,156 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from botocore.exceptions import ClientError
+
+from common import day_summaries
+from common.messages import DAY_SHARDS, RESPONSE_LOOKAHEAD, day_buckets, day_shard, iter_scan
+from common.timezones import day_range, today
+from local import harness
+
+TODAY = today(now=harness.END)
+QUERY = {"startDate": (TODAY - timedelta(days=29)).isoformat(), "endDate": TODAY.isoformat()}
+
+
+@pytest.fixture
+def tables():
+    return harness.build_dataset(4000, groups=20, days=30, client_ratio=0.7)
+
+
+def call(tables, mode=harness.RAW, summaries=True, **query):
+    module = harness.load_handler("weekly")
+    harness.reset_stats(tables)
+    env = {"DAY_SUMMARIES_ENABLED": str(summaries).lower()}
+    with harness.installed(module, tables, mode, env=env):
+        response = module.lambda_handler({"queryStringParameters": dict(QUERY, **query)}, None)
+    return json.loads(response["body"])
+
+
+@pytest.mark.parametrize("mode", [harness.RAW, harness.MATERIALIZED])
+@pytest.mark.parametrize("query", [{}, {"groupId": "0003@g.us"}])
+def test_summaries_serve_same_payload(tables, mode, query):
+    expected = call(tables, mode, summaries=False, **query)
+
+    assert call(tables, mode, **query) == expected  # calcula e grava os dias fechados
+    assert call(tables, mode, **query) == expected  # lê os resumos
+
+
+def test_failed_summary_write_keeps_the_read(tables, monkeypatch):
+    expected = call(tables, summaries=False)
+
+    def denied(*args, **kwargs):
+        raise ClientError({"Error": {"Code": "AccessDeniedException"}}, "BatchWriteItem")
+
+    monkeypatch.setattr(tables["metrics"], "batch_writer", denied)
+    assert call(tables) == expected
+
+
+def test_unknown_group_and_long_ranges_write_nothing(tables):
+    before = len(tables["metrics"])
+    call(tables, groupId="nao-existe@g.us")
+    assert len(tables["metrics"]) == before
+
+    module = harness.load_handler("weekly")
+    with harness.installed(module, tables, harness.RAW):
+        response = module.lambda_handler({"queryStringParameters": {"startDate": "1990-01-01",
+                                                                    "endDate": TODAY.isoformat()}}, None)
+    assert response["statusCode"] == 400
+    assert len(tables["metrics"]) == before
+
+
+def test_only_open_days_are_computed(tables):
+    start, end = day_range(TODAY, TODAY)
+    lo, hi = (dt.strftime("%Y-%m-%dT%H:%M:%S") for dt in (start, end + RESPONSE_LOOKAHEAD))
+    today_messages = sum(1 for item in iter_scan(tables["messages"]) if lo <= item["timestamp"] < hi)
+    call(tables)
+    call(tables)
+
+    # Resumos + atrasadas: dois queries em crm-metricas; mensagens só de hoje
+    # (um query por shard de cada dia UTC da janela de hoje)
+    assert tables["metrics"].request_count == 2
+    assert tables["messages"].request_count == DAY_SHARDS * len(day_buckets(start, end + RESPONSE_LOOKAHEAD))
+    assert tables["messages"].items_read <= today_messages
+
+
+@pytest.mark.parametrize("granularity", ["week", "month"])
+def test_coarse_buckets_serve_same_payload(tables, granularity):
+    query = {"startDate": "2025-07-01", "granularity": granularity}
+    expected = call(tables, summaries=False, **query)
+
+    assert call(tables, **query) == expected
+    assert call(tables, **query) == expected
+    assert sum(entry["messages"] for entry in expected["data"]) == expected["summary"]["totalMessages"]
+    assert {entry[granularity] for entry in expected["data"]} >= {"2025-07" if granularity == "month" else "2025-W28"}
+
+
+def test_long_ranges_cost_the_same(tables):
+    costs = []
+    for start in ("2025-05-01", "2024-08-01"):
+        call(tables, startDate=start, granularity="month")
+        call(tables, startDate=start, granularity="month")
+        costs.append((tables["metrics"].request_count, tables["messages"].request_count))
+
+    # atrasadas + meses + dias da borda; mensagens só de hoje
+    assert costs[0] == costs[1]
+    assert costs[0][0] <= 4
+
+
+def test_plan_uses_coarsest_closed_buckets():
+    now = datetime(2025, 8, 6, 15, tzinfo=timezone.utc)
+    plan = day_summaries.plan_range(date(2025, 1, 3), date(2025, 8, 6), now, "month")
+
+    assert [(level, key) for level, key, _, _ in plan if level != "day"] == [
+        ("week", "2025-W02"), ("week", "2025-W03"), ("week", "2025-W04"),
+        ("month", "2025-02"), ("month", "2025-03"), ("month", "2025-04"), ("month", "2025-05"),
+        ("month", "2025-06"), ("month", "2025-07"),
+    ]
+    # Cobre o intervalo sem buracos nem sobreposição
+    assert plan[0][2] == date(2025, 1, 3) and plan[-1][3] == date(2025, 8, 6)
+    assert all(b[2] - a[3] == timedelta(days=1) for a, b in zip(plan, plan[1:]))
+    # Semana que atravessa o mês não entra; a semana aberta (hoje) fica em dias
+    assert day_summaries.plan_range(date(2025, 7, 28), date(2025, 8, 6), now, "week")[0][0] == "week"
+    assert all(level == "day" for level, *_ in day_summaries.plan_range(date(2025, 8, 4), date(2025, 8, 6),
+                                                                         now, "week"))
+
+
+@pytest.mark.parametrize("granularity", ["day", "month"])
+def test_late_arrival_invalidates_the_day(tables, granularity):
+    day = TODAY - timedelta(days=10)
+    label = day.isoformat() if granularity == "day" else day.strftime("%Y-%m")
+
+    def messages_on(data):
+        return next((entry["messages"] for entry in data["data"] if entry.get("date", entry.get("month")) == label), 0)
+
+    call(tables, granularity=granularity)
+    before = call(tables, granularity=granularity)
+
+    # Conversa de um dia já fechado que só chega agora
+    start, _ = day_range(day, day)
+    late = []
+    for i, direction in enumerate(("client", "team")):
+        ts = (start + timedelta(hours=12, minutes=10 * i)).astimezone(timezone.utc)
+        timestamp = ts.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        late.append({"messageId": f"late-{i}", "groupId": "0003@g.us", "timestamp": timestamp,
+                     "dayShard": day_shard(timestamp, f"late-{i}"), "direction": direction,
+                     "content": '{"type": "text", "text": "ok"}', "from": '{"id": "x"}'})
+    for item in late:
+        tables["messages"].put_item(Item=item)
+
+    # Sem o stream o resumo gravado continua valendo
+    assert messages_on(call(tables, granularity=granularity)) == messages_on(before)
+
+    assert day_summaries.bump_late_days(tables["metrics"], late, now=harness.END) == 1
+    after = call(tables, granularity=granularity)
+    assert messages_on(after) == messages_on(before) + 2
+    assert after == call(tables, summaries=False, granularity=granularity)
+
+
+def test_late_days_only_counts_closed_windows():
+    now = datetime(2025, 8, 6, 15, tzinfo=timezone.utc)  # 12:00 em São Paulo
+    items = [
+        {"timestamp": "2025-08-04T15:00:00.000Z"},  # 04/08 local
+        {"timestamp": "2025-08-05T04:00:00.000Z"},  # 05/08 01:00 local: ainda na janela de 04/08
+        {"timestamp": "2025-08-06T14:00:00.000Z"},  # hoje: dia aberto
+    ]
+    assert day_summaries.late_days(items, now, "America/Sao_Paulo") == {"2025-08-04": 2, "2025-08-05": 1}
@@ -0,0 +1,138 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from alerts import app as alerts
+from common import timezones
+from common.group_state import apply_group_messages, build_states, diff_states, load_states, write_states
+from groupState import app as group_state_app
+from groupsOverview import app as overview
+from common.records import to_records
+from local import harness, synthetic
+from local.table import LocalResource
+
+END = datetime(2025, 8, 6, tzinfo=timezone.utc)
+
+
+def messages():
+    return list(synthetic.generate_messages(3000, groups=15, days=3, end=END, client_ratio=0.7))
+
+
+def test_incremental_updates_match_replay():
+    items = messages()
+    groups = synthetic.load(synthetic.groups_table(), synthetic.generate_groups(15))
+    resource = LocalResource(groups, synthetic.applied_table())
+    for i in range(0, len(items), 97):
+        apply_group_messages(groups, items[i:i + 97], resource)
+
+    assert diff_states(build_states(to_records(items)), load_states(groups)) == []
+
+
+def test_redelivered_batches_fold_once(monkeypatch):
+    items = messages()
+    groups = synthetic.load(synthetic.groups_table(), synthetic.generate_groups(15))
+    applied = synthetic.applied_table()
+    resource = LocalResource(groups, applied)
+    serializer = TypeSerializer()
+    monkeypatch.setattr(group_state_app, "groups_table", groups)
+    monkeypatch.setattr(group_state_app, "dynamodb", resource)
+    update_item, calls = groups.update_item, [0]
+
+    def update(**kwargs):
+        # Throttling no terceiro grupo do lote: os dois primeiros já foram gravados
+        calls[0] += 1
+        if calls[0] == 3:
+            raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "UpdateItem")
+        return update_item(**kwargs)
+
+    for i in range(0, len(items), 97):
+        batch = items[i:i + 97]
+        event = {"Records": [
+            {"eventName": "INSERT", "dynamodb": {"SequenceNumber": str(i + j),
+                                                 "NewImage": {k: serializer.serialize(v) for k, v in item.items()}}}
+            for j, item in enumerate(batch)
+        ]}
+        calls[0] = 0
+        monkeypatch.setattr(groups, "update_item", update)
+        failures = group_state_app.lambda_handler(event, None)["batchItemFailures"]
+        failed = {batch[int(f["itemIdentifier"]) - i]["groupId"] for f in failures}
+        assert len(failed) == 1
+        assert len(failures) == sum(1 for item in batch if item["groupId"] in failed)
+        # O Lambda reentrega o lote inteiro e depois as metades
+        monkeypatch.setattr(groups, "update_item", update_item)
+        assert group_state_app.lambda_handler(event, None) == {"batchItemFailures": []}
+        apply_group_messages(groups, batch[:48], resource)
+        apply_group_messages(groups, batch[48:], resource)
+
+    assert diff_states(build_states(to_records(items)), load_states(groups)) == []
+    # Os ids ficam em marcadores (um por mensagem), não no item do grupo
+    markers = [item["id"] for item in applied.scan()["Items"] if "#batch#" not in item["id"]]
+    assert sorted(markers) == sorted(f"groupState#{item['messageId']}" for item in items)
+    assert not any("applying" in item or "applied" in item for item in groups.scan()["Items"])
+
+
+def test_legacy_applied_map_is_dropped():
+    items = messages()[:200]
+    groups = synthetic.load(synthetic.groups_table(), synthetic.generate_groups(15))
+    group_id = items[0]["groupId"]
+    groups.update_item(Key={"groupId": group_id}, UpdateExpression="SET #a = :a",
+                       ExpressionAttributeNames={"#a": "applied"},
+                       ExpressionAttributeValues={":a": {f"m{i}": 1 for i in range(5000)}})
+
+    apply_group_messages(groups, items, LocalResource(groups, synthetic.applied_table()))
+    assert "applied" not in groups.get_item(Key={"groupId": group_id})["Item"]
+
+
+@pytest.mark.parametrize("handler, event", [
+    (alerts, {"limit": "50"}),
+    (overview, None),
+])
+def test_endpoints_serve_same_payload_from_state(monkeypatch, handler, event):
+    items = messages()
+    msgs = synthetic.load(synthetic.messages_table(), items)
+    groups = synthetic.load(synthetic.groups_table(), synthetic.generate_groups(15))
+    write_states(groups, build_states(to_records(items)))
+    monkeypatch.setattr(handler, "messages_table", msgs)
+    monkeypatch.setattr(handler, "groups_table", groups)
+    monkeypatch.setattr(handler, "dynamodb", LocalResource(groups))
+    monkeypatch.setattr(handler, "datetime", harness.frozen_datetime(END))
+    monkeypatch.setattr(timezones, "datetime", harness.frozen_datetime(END))
+    event = {"queryStringParameters": event}
+
+    monkeypatch.setenv("GROUP_STATE_ENABLED", "false")
+    raw = json.loads(handler.lambda_handler(event, None)["body"])
+    monkeypatch.setenv("GROUP_STATE_ENABLED", "true")
+    msgs.reset_stats()
+    served = json.loads(handler.lambda_handler(event, None)["body"])
+
+    # A ordem dos grupos segue a leitura (scan da tabela x ordem das mensagens)
+    key = "alerts" if "alerts" in raw else "groups"
+    served[key].sort(key=json.dumps)
+    raw[key].sort(key=json.dumps)
+    assert served == raw
+    assert msgs.request_count == 0
+
+
+def test_failure_after_the_state_write_counts_once(monkeypatch):
+    items = messages()[:300]
+    groups = synthetic.load(synthetic.groups_table(), synthetic.generate_groups(15))
+    applied = synthetic.applied_table()
+    resource = LocalResource(groups, applied)
+    put_item = applied.put_item
+
+    def throttled(Item, **kwargs):
+        # Estado e lote gravados; os marcadores não
+        if "#batch#" not in Item["id"]:
+            raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "PutItem")
+        return put_item(Item=Item, **kwargs)
+
+    monkeypatch.setattr(applied, "put_item", throttled)
+    _, failed = apply_group_messages(groups, items, resource)
+    assert failed == {item["groupId"] for item in items}
+    monkeypatch.undo()
+
+    assert apply_group_messages(groups, items, resource) == (0, set())
+    assert diff_states(build_states(to_records(items)), load_states(groups)) == []
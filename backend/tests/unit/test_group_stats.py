@@ -0,0 +1,104 @@
+import json
+from datetime import timedelta
+
+import pytest
+
+from common.messages import iter_scan
+from common.timezones import day_range, today
+from local import harness
+
+GROUP = "0003@g.us"
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return harness.build_dataset(4000, groups=20, days=40, client_ratio=0.7)
+
+
+def call(tables, mode=harness.MATERIALIZED, group_id=GROUP, env=None, **query):
+    module = harness.load_handler("groupStats")
+    harness.reset_stats(tables)
+    event = {"queryStringParameters": query or None, "pathParameters": {"groupId": group_id}}
+    with harness.installed(module, tables, mode, env=env):
+        response = module.lambda_handler(event, None)
+    return response, json.loads(response["body"])
+
+
+def without_extremes(data):
+    # best/worst: rtMin/rtMax gravados com 4 casas podem mudar o último dígito
+    metrics = dict(data["metrics"], responseTime=None)
+    return dict(data, metrics=metrics)
+
+
+@pytest.mark.parametrize("query", [{"period": "today"}, {"period": "week"}, {"period": "month"},
+                                   {"startDate": "2025-07-01", "endDate": "2025-07-10"}])
+def test_rollups_and_messages_agree(tables, query):
+    _, raw = call(tables, harness.RAW, **query)
+    _, materialized = call(tables, harness.MATERIALIZED, **query)
+
+    assert without_extremes(raw) == without_extremes(materialized)
+    for name in ("best", "worst", "average"):
+        assert raw["metrics"]["responseTime"][name] == pytest.approx(materialized["metrics"]["responseTime"][name],
+                                                                     abs=0.01)
+
+
+def test_counts_match_the_group_messages(tables):
+    _, data = call(tables, period="month")
+    first = today(now=harness.END) - timedelta(days=29)
+    start, end = day_range(first, today(now=harness.END))
+    lo, hi = start.strftime("%Y-%m-%dT%H:%M:%S"), end.strftime("%Y-%m-%dT%H:%M:%S")
+    expected = [item for item in iter_scan(tables["messages"])
+                if item["groupId"] == GROUP and lo <= item["timestamp"] < hi]
+
+    messages = data["metrics"]["messages"]
+    assert messages["total"] == len(expected) == messages["byType"]["text"]
+    assert sum(day["messages"] for day in data["activity"]["daily"]) == len(expected)
+    assert sum(hour["messages"] for hour in data["activity"]["hourly"]) == len(expected)
+    assert sum(member["messageCount"] for member in data["members"]) == len(expected)
+    assert len(data["activity"]["daily"]) == 30 and data["period"]["end"] == today(now=harness.END).isoformat()
+
+
+@pytest.mark.parametrize("mode", [harness.RAW, harness.MATERIALIZED])
+def test_reads_only_the_group(tables, mode):
+    call(tables, mode, period="month")
+    group_messages = sum(1 for item in iter_scan(tables["messages"]) if item["groupId"] == GROUP)
+    harness.reset_stats(tables)
+    call(tables, mode, period="month")
+
+    # Sem rollups, um query no groupId-timestamp-index, nunca scan; com rollups, nenhum
+    assert tables["messages"].request_count == (1 if mode == harness.RAW else 0)
+    assert tables["messages"].items_read <= group_messages
+
+
+@pytest.mark.parametrize("period", ["month", "custom"])
+def test_long_periods_are_served_from_rollups(tables, period):
+    query = {"period": "month"} if period == "month" else {"startDate": "2024-08-07", "endDate": "2025-08-06"}
+    _, data = call(tables, **query)
+    _, raw = call(tables, harness.RAW, **query)
+    call(tables, **query)
+
+    assert data["members"] and data["metrics"]["members"] == raw["metrics"]["members"]
+    assert data["metrics"]["messages"]["byType"] == raw["metrics"]["messages"]["byType"]
+    # Tudo de crm-metricas: nenhum query em crm-mensagens
+    assert tables["messages"].request_count == 0
+
+
+def test_cache_key_includes_group(tables):
+    env = {"RESULT_CACHE_ENABLED": "true"}
+    _, first = call(tables, env=env, period="week")
+    _, other = call(tables, env=env, group_id="0004@g.us", period="week")
+
+    assert first["group"]["id"] == GROUP and other["group"]["id"] == "0004@g.us"
+
+
+@pytest.mark.parametrize("query", [{"period": "year"}, {"period": "custom", "startDate": "2025-08-01"},
+                                   {"startDate": "2025-08-05", "endDate": "2025-08-01"},
+                                   {"startDate": "ontem", "endDate": "hoje"}])
+def test_invalid_period_is_400(tables, query):
+    response, data = call(tables, **query)
+    assert response["statusCode"] == 400 and "error" in data
+
+
+def test_unknown_group_is_404(tables):
+    response, _ = call(tables, group_id="nao-existe@g.us")
+    assert response["statusCode"] == 404
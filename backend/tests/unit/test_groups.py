@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from common.pagination import encode_cursor
+from local import harness
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return harness.build_dataset(3000, groups=150, days=3, client_ratio=0.7)
+
+
+def call(tables, mode=harness.MATERIALIZED, **query):
+    module = harness.load_handler("groups")
+    harness.reset_stats(tables)
+    with harness.installed(module, tables, mode):
+        response = module.lambda_handler({"queryStringParameters": query}, None)
+    return response, json.loads(response["body"])
+
+
+def all_pages(tables, mode, **query):
+    groups, cursor = [], None
+    while True:
+        _, data = call(tables, mode, **query, **({"cursor": cursor} if cursor else {}))
+        groups += data["groups"]
+        cursor = data["pagination"]["nextCursor"]
+        if cursor is None:
+            return groups
+
+
+def overview_statuses(tables):
+    module = harness.load_handler("groupsOverview")
+    with harness.installed(module, tables, harness.MATERIALIZED):
+        data = json.loads(module.lambda_handler({"queryStringParameters": None}, None)["body"])
+    return {group["id"]: group["status"] for group in data["groups"]}
+
+
+@pytest.mark.parametrize("sort_by", ["lastActivity", "messageCount", "name"])
+def test_index_pages_match_in_memory_listing(tables, sort_by):
+    expected = overview_statuses(tables)
+    for status in ("waiting", "active", "idle"):
+        indexed = all_pages(tables, harness.MATERIALIZED, status=status, sortBy=sort_by, limit="7")
+        in_memory = all_pages(tables, harness.RAW, status=status, sortBy=sort_by, limit="7")
+
+        # responseTime pode diferir no último dígito (rtSum gravado com 4 casas)
+        assert [dict(g, responseTime=None) for g in indexed] == [dict(g, responseTime=None) for g in in_memory]
+        assert {g["id"] for g in indexed} == {g for g, s in expected.items() if s == status}
+
+    everything = all_pages(tables, harness.MATERIALIZED, sortBy=sort_by, limit="25")
+    keys = {"lastActivity": lambda g: g["lastActivity"]["timestamp"],
+            "messageCount": lambda g: g["messages"]["total"],
+            "name": lambda g: g["name"].casefold()}[sort_by]
+    values = [keys(g) for g in everything]
+    assert len(everything) == len(expected)
+    assert values == sorted(values, reverse=sort_by != "name")
+
+
+def test_first_page_reads_only_the_page(tables):
+    _, data = call(tables, status="waiting", limit="10")
+    groups = tables["groups"]
+
+    assert len(data["groups"]) == 10 and data["pagination"]["hasMore"] is True
+    # Uma query na partição waiting + uma na faixa de mensagens irrelevantes recentes
+    assert groups.request_count == 2
+    assert groups.items_read <= 2 * 11
+    assert tables["messages"].consumed_read_units == 0
+
+
+def test_page_number_without_cursor(tables):
+    _, first = call(tables, status="active", limit="5")
+    _, by_cursor = call(tables, status="active", limit="5", cursor=first["pagination"]["nextCursor"])
+    _, by_page = call(tables, status="active", limit="5", page="2")
+
+    assert by_page["groups"] == by_cursor["groups"]
+    assert by_page["pagination"]["page"] == by_cursor["pagination"]["page"] == 2
+
+
+def test_total_only_when_asked(tables):
+    _, data = call(tables, status="idle")
+    _, counted = call(tables, status="idle", withTotal="true")
+
+    assert data["pagination"]["total"] is None
+    assert counted["pagination"]["total"] == list(overview_statuses(tables).values()).count("idle")
+
+
+@pytest.mark.parametrize("query", [{"status": "busy"}, {"sortBy": "size"}, {"limit": "0"},
+                                   {"limit": "abc"}, {"cursor": "%%%"}])
+def test_invalid_query_is_400(tables, query):
+    response, data = call(tables, **query)
+    assert response["statusCode"] == 400
+    assert "error" in data
+
+
+@pytest.mark.parametrize("mode", [harness.RAW, harness.MATERIALIZED])
+def test_cursor_from_another_sort_or_with_bad_key_is_400(tables, mode):
+    _, first = call(tables, mode, sortBy="name", limit="5")
+    forged = [
+        first["pagination"]["nextCursor"],
+        encode_cursor({"k": [{"a": 1}, [2]], "p": 1, "s": "messageCount"}),
+        encode_cursor({"k": ["12", "g@g.us"], "p": 1, "s": "messageCount"}),
+        encode_cursor({"k": [3, "g@g.us"], "p": 1, "s": "name"}),
+        encode_cursor({"k": ["2025-08-05T10:00:00.000Z", "g@g.us"], "p": 1}),
+    ]
+    for cursor in forged:
+        response, data = call(tables, mode, sortBy="messageCount", limit="5", cursor=cursor)
+        assert response["statusCode"] == 400, cursor
+        assert "error" in data
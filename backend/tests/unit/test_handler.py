@@ -2,71 +2,49 @@ import json
 
 import pytest
 
-from hello_world import app
-
-
-@pytest.fixture()
-def apigw_event():
-    """ Generates API GW Event"""
-
-    return {
-        "body": '{ "test": "body"}',
-        "resource": "/{proxy+}",
-        "requestContext": {
-            "resourceId": "123456",
-            "apiId": "1234567890",
-            "resourcePath": "/{proxy+}",
-            "httpMethod": "POST",
-            "requestId": "c6af9ac6-7b61-11e6-9a41-93e8deadbeef",
-            "accountId": "123456789012",
-            "identity": {
-                "apiKey": "",
-                "userArn": "",
-                "cognitoAuthenticationType": "",
-                "caller": "",
-                "userAgent": "Custom User Agent String",
-                "user": "",
-                "cognitoIdentityPoolId": "",
-                "cognitoIdentityId": "",
-                "cognitoAuthenticationProvider": "",
-                "sourceIp": "127.0.0.1",
-                "accountId": "",
-            },
-            "stage": "prod",
-        },
-        "queryStringParameters": {"foo": "bar"},
-        "headers": {
-            "Via": "1.1 08f323deadbeefa7af34d5feb414ce27.cloudfront.net (CloudFront)",
-            "Accept-Language": "en-US,en;q=0.8",
-            "CloudFront-Is-Desktop-Viewer": "true",
-            "CloudFront-Is-SmartTV-Viewer": "false",
-            "CloudFront-Is-Mobile-Viewer": "false",
-            "X-Forwarded-For": "127.0.0.1, 127.0.0.2",
-            "CloudFront-Viewer-Country": "US",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Upgrade-Insecure-Requests": "1",
-            "X-Forwarded-Port": "443",
-            "Host": "1234567890.execute-api.us-east-1.amazonaws.com",
-            "X-Forwarded-Proto": "https",
-            "X-Amz-Cf-Id": "aaaaaaaaaae3VYQb9jd-nvCd-de396Uhbp027Y2JvkCPNLmGJHqlaA==",
-            "CloudFront-Is-Tablet-Viewer": "false",
-            "Cache-Control": "max-age=0",
-            "User-Agent": "Custom User Agent String",
-            "CloudFront-Forwarded-Proto": "https",
-            "Accept-Encoding": "gzip, deflate, sdch",
-        },
-        "pathParameters": {"proxy": "/examplepath"},
-        "httpMethod": "POST",
-        "stageVariables": {"baz": "qux"},
-        "path": "/examplepath",
-    }
-
-
-def test_lambda_handler(apigw_event):
-
-    ret = app.lambda_handler(apigw_event, "")
+from local import harness
+
+KEYS = {
+    "alerts": {"alerts", "total", "page", "hasMore", "nextCursor"},
+    "metricsToday": {"date", "metrics"},
+    "groupsOverview": {"groups"},
+    "groups": {"groups", "pagination"},
+    "hourly": {"date", "data", "summary"},
+    "weekly": {"period", "data", "summary"},
+    "groupStats": {"group", "period", "metrics", "activity", "members"},
+    "dashboard": {"metrics", "alerts", "groups", "hourly", "weekly"},
+}
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return harness.build_dataset(2000, groups=12, days=8, zipf=1.1, client_ratio=0.7)
+
+
+@pytest.mark.parametrize("mode", [harness.RAW, harness.MATERIALIZED])
+@pytest.mark.parametrize("name", sorted(harness.HANDLERS))
+def test_lambda_handler(tables, name, mode):
+    module = harness.load_handler(name)
+    with harness.installed(module, tables, mode):
+        ret = harness.invoke(module, name)
     data = json.loads(ret["body"])
 
     assert ret["statusCode"] == 200
-    assert "message" in ret["body"]
-    assert data["message"] == "hello world"
+    assert KEYS[name] <= set(data)
+    assert harness.read_units(tables) > 0
+    harness.reset_stats(tables)
+
+
+@pytest.mark.parametrize("name, query", [
+    ("weekly", {"startDate": "2025-13-01", "endDate": "2025-08-06"}),
+    ("weekly", {"startDate": "2025-08-01", "endDate": "ontem"}),
+    ("hourly", {"date": "nope"}),
+])
+def test_malformed_dates_are_400(tables, name, query):
+    module = harness.load_handler(name)
+    with harness.installed(module, tables, harness.RAW):
+        ret = module.lambda_handler({"queryStringParameters": query}, None)
+
+    assert ret["statusCode"] == 400
+    assert "inválida" in json.loads(ret["body"])["error"]
+    harness.reset_stats(tables)
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+from common.messages import DAY_SHARDS, day_buckets, day_shards, iter_scan, query_window
+from local import synthetic
+
+END = datetime(2025, 8, 5, 12, tzinfo=timezone.utc)
+
+
+def make_table():
+    return synthetic.load(
+        synthetic.messages_table(),
+        synthetic.generate_messages(5000, groups=20, days=10, end=END),
+    )
+
+
+def scan_all(table):
+    items = []
+    response = table.scan()
+    items.extend(response["Items"])
+    while "LastEvaluatedKey" in response:
+        response = table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
+        items.extend(response["Items"])
+    return items
+
+
+def test_day_buckets_spans_utc_days():
+    start = datetime(2025, 8, 4, 3, tzinfo=timezone.utc)
+    assert day_buckets(start, start + timedelta(days=1)) == ["2025-08-04", "2025-08-05"]
+    assert day_buckets(start.replace(hour=0), start.replace(hour=0) + timedelta(days=1)) == ["2025-08-04"]
+
+
+def test_each_day_is_spread_over_its_shards():
+    items = [m for m in scan_all(make_table()) if m["timestamp"].startswith("2025-08-03")]
+    per_shard = {}
+    for m in items:
+        per_shard[m["dayShard"]] = per_shard.get(m["dayShard"], 0) + 1
+
+    assert set(per_shard) == set(day_shards("2025-08-03"))
+    # Nenhuma partição do índice fica com muito mais que a sua parte das escritas do dia
+    assert max(per_shard.values()) < 2 * len(items) / DAY_SHARDS
+
+
+def test_query_window_matches_scan():
+    table = make_table()
+    start = datetime(2025, 8, 2, 3, tzinfo=timezone.utc)
+    end = start + timedelta(days=2)
+    lo, hi = "2025-08-02T03:00:00", "2025-08-04T03:00:00"
+    expected = sorted(m["messageId"] for m in scan_all(table) if lo <= m["timestamp"] < hi)
+
+    table.reset_stats()
+    items = query_window(table, start, end)
+
+    assert sorted(m["messageId"] for m in items) == expected
+    assert [m["timestamp"] for m in items] == sorted(m["timestamp"] for m in items)
+    assert table.request_count == 3 * DAY_SHARDS  # um query por shard de cada dia UTC tocado
+
+
+def test_query_window_by_group():
+    table = make_table()
+    start = datetime(2025, 8, 1, tzinfo=timezone.utc)
+    items = query_window(table, start, start + timedelta(days=3), group_id="0003@g.us")
+
+    assert items
+    assert {m["groupId"] for m in items} == {"0003@g.us"}
+    assert table.request_count == 1
+
+
+def test_parallel_scan_returns_every_item_once():
+    table = make_table()
+    expected = sorted(m["messageId"] for m in scan_all(table))
+
+    items = list(iter_scan(table, segments=4, fields=("messageId", "timestamp")))
+
+    assert sorted(m["messageId"] for m in items) == expected
+    assert set(items[0]) == {"messageId", "timestamp"}
+
+
+def test_query_window_projection_keeps_timestamp():
+    table = make_table()
+    start = datetime(2025, 8, 3, tzinfo=timezone.utc)
+    items = query_window(table, start, start + timedelta(days=1), fields=("direction",))
+
+    assert items
+    assert set(items[0]) == {"timestamp", "direction"}
@@ -0,0 +1,77 @@
+import json
+from datetime import timedelta
+
+import pytest
+
+from common.columnar import CLIENT_CODE, average_minutes, last_per_group, local_window, rollup_frame
+from common.messages import RESPONSE_LOOKAHEAD, iter_scan
+from common.payloads import metricas_por_dias
+from common.records import to_records
+from common.timezones import day_range, today
+from local import harness
+
+TODAY = today(now=harness.END)
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return harness.build_dataset(4000, groups=20, days=20, client_ratio=0.7)
+
+
+def call(tables, mode=harness.RAW, **query):
+    module = harness.load_handler("metricsToday")
+    harness.reset_stats(tables)
+    with harness.installed(module, tables, mode):
+        response = module.lambda_handler({"queryStringParameters": query or None}, None)
+    return response, json.loads(response["body"])
+
+
+def test_one_pass_matches_day_by_day(tables):
+    frame = rollup_frame(to_records(sorted(iter_scan(tables["messages"]), key=lambda m: m["timestamp"])))
+    days = [TODAY - timedelta(days=offset) for offset in range(8)]
+    metrics = metricas_por_dias(frame, days)
+
+    for day in days:
+        window, _ = local_window(frame, day, 1)
+        _, directions = last_per_group(window)
+        assert metrics[day]["totalMessages"] == int(window["messages"].sum())
+        assert metrics[day]["averageResponseTime"] == average_minutes(window["rtLastSumSec"].sum(),
+                                                                      window["rtLastCount"].sum())
+        assert metrics[day]["activeGroups"] == len(directions)
+        assert metrics[day]["waitingClients"] == int((directions == CLIENT_CODE).sum())
+
+
+@pytest.mark.parametrize("query", [{}, {"compareTo": "lastWeek"}, {"compareTo": "weekAverage"},
+                                   {"date": "2025-08-01", "compareTo": "yesterday"}])
+def test_rollups_and_messages_agree(tables, query):
+    _, raw = call(tables, harness.RAW, **query)
+    _, materialized = call(tables, harness.MATERIALIZED, **query)
+    assert raw == materialized
+
+
+def test_week_average_compares_with_mean(tables):
+    _, data = call(tables, compareTo="weekAverage")
+    days = [call(tables, date=day)[1]["metrics"]["totalMessages"]["value"] for day in data["compareTo"]["dates"]]
+
+    mean = round(sum(days) / 7, 2)
+    total = data["metrics"]["totalMessages"]
+    assert len(data["compareTo"]["dates"]) == 7
+    assert total["change"]["value"] == pytest.approx(abs(total["value"] - mean), abs=0.011)
+
+
+def test_last_week_reads_only_the_two_days(tables):
+    def messages_on(day):
+        # O dia + a folga das respostas depois da meia-noite
+        start, end = day_range(day, day)
+        start, end = (dt.strftime("%Y-%m-%dT%H:%M:%S") for dt in (start, end + RESPONSE_LOOKAHEAD))
+        return sum(1 for item in iter_scan(tables["messages"]) if start <= item["timestamp"] < end)
+
+    expected = messages_on(TODAY) + messages_on(TODAY - timedelta(days=7))
+    call(tables, compareTo="lastWeek")
+    assert tables["messages"].items_read == expected
+
+
+@pytest.mark.parametrize("query", [{"compareTo": "lastYear"}, {"date": "ontem"}])
+def test_invalid_query_is_400(tables, query):
+    response, data = call(tables, **query)
+    assert response["statusCode"] == 400 and "error" in data
@@ -0,0 +1,43 @@
+from common.pairing import LAST_CLIENT, pair_responses
+
+
+def minutes(samples):
+    return [round(delta, 2) for _, _, delta in samples]
+
+
+def test_each_client_message_is_paired_with_next_team_reply():
+    events = [
+        ("g1", 0, "client", "a"),
+        ("g1", 60, "client", "b"),
+        ("g1", 300, "team", "c"),
+    ]
+    samples = pair_responses(events)
+    assert [ref for ref, _, _ in samples] == ["a", "b"]
+    assert minutes(samples) == [5.0, 4.0]
+
+
+def test_last_client_mode_pairs_only_message_before_reply():
+    events = [
+        ("g1", 0, "client", "a"),
+        ("g1", 60, "client", "b"),
+        ("g1", 300, "team", "c"),
+    ]
+    assert [ref for ref, _, _ in pair_responses(events, mode=LAST_CLIENT)] == ["b"]
+
+
+def test_replies_from_other_groups_are_ignored():
+    events = [
+        ("g1", 0, "client", "a"),
+        ("g2", 60, "team", "x"),
+        ("g1", 600, "team", "b"),
+    ]
+    assert minutes(pair_responses(events)) == [10.0]
+
+
+def test_slow_replies_are_discarded():
+    events = [
+        ("g1", 0, "client", "a"),
+        ("g1", 180 * 60, "team", "b"),
+        ("g1", 180 * 60 + 1, "client", "c"),
+    ]
+    assert pair_responses(events) == []
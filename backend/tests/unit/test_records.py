@@ -0,0 +1,33 @@
+import json
+
+from common.messages import parse_timestamp
+from common.records import CLIENT, TEAM, epoch_seconds, to_records
+from local import synthetic
+
+
+def test_epoch_seconds_matches_full_parse():
+    for ts in ("2025-08-05T12:34:56.789Z", "2025-08-05T12:34:56Z", "2025-08-05T09:34:56.789-03:00"):
+        assert epoch_seconds(ts) == int(parse_timestamp(ts).timestamp())
+
+
+def test_records_are_sorted_and_share_strings():
+    items = list(synthetic.generate_messages(500, groups=5, days=1))
+    records = to_records(reversed(items))
+
+    assert [r.timestamp for r in records] == sorted(m["timestamp"] for m in items)
+    assert {r.direction for r in records} <= {CLIENT, TEAM}
+    by_group = {}
+    for record in records:
+        assert by_group.setdefault(record.group_id, record.group_id) is record.group_id
+
+
+def test_content_is_decoded_lazily_once():
+    item = synthetic.make_message("m1", "g1", parse_timestamp("2025-08-05T12:00:00Z"), "client", "Oi, tudo bem?")
+    record = to_records([item])[0]
+    assert isinstance(record._content, str)
+    assert record.text == "Oi, tudo bem?"
+    assert record.content is record.content
+    assert record.sender == json.loads(item["from"])
+
+    bare = to_records([{"timestamp": item["timestamp"], "groupId": "g1", "direction": "team"}])[0]
+    assert bare.text == "" and bare.sender == {}
@@ -0,0 +1,23 @@
+from benchmarks.relevance import legacy
+from common.relevance import IGNORED_MESSAGES, RelevanceClassifier, is_irrelevant_message
+from local import synthetic
+
+
+def test_classifier_matches_legacy_rules():
+    texts = list(synthetic.whatsapp_texts(3000)) + synthetic.WHATSAPP_SHORT + [None, "Ok. 👍", "tudo okay?"]
+    assert [is_irrelevant_message(t) for t in texts] == [legacy(t) for t in texts]
+
+
+def test_examples():
+    assert is_irrelevant_message("Obrigadão!!")
+    assert is_irrelevant_message("Tudo bem, obrigado")
+    assert is_irrelevant_message("")
+    assert not is_irrelevant_message("O boleto de março ainda não chegou")
+
+
+def test_batch_and_memo():
+    classifier = RelevanceClassifier(IGNORED_MESSAGES)
+    texts = ["ok", "Preciso da segunda via", "ok", "OK!", "Preciso da segunda via"]
+    assert classifier.classify_many(texts) == [True, False, True, True, False]
+    # "ok" e "OK!" normalizam para o mesmo texto
+    assert classifier.memo_info().currsize == 2
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from common import responses
+from local import harness
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return harness.build_dataset(3000, groups=120, days=3, client_ratio=0.7)
+
+
+def call(name, tables, accept=None):
+    module = harness.load_handler(name)
+    event = {"queryStringParameters": harness.HANDLERS[name][1](harness.END.date()),
+             "headers": {"Accept-Encoding": accept} if accept else {}}
+    with harness.installed(module, tables, harness.MATERIALIZED):
+        return module.lambda_handler(event, None)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate", "gzip"),
+    ("deflate", None),
+    ("gzip;q=0, *;q=0.5", None if not responses._brotli() else "br"),
+    ("identity", None),
+    ("", None),
+])
+def test_choose_encoding(header, expected):
+    assert responses.choose_encoding(header) == expected
+
+
+def test_large_body_is_gzipped(tables):
+    plain = call("groupsOverview", tables)
+    compressed = call("groupsOverview", tables, accept="gzip")
+
+    assert "Content-Encoding" not in plain["headers"]
+    assert compressed["isBase64Encoded"] is True
+    assert compressed["headers"]["Content-Encoding"] == "gzip"
+    assert compressed["headers"]["Vary"] == "Accept-Encoding"
+    assert len(compressed["body"]) < len(plain["body"]) / 3
+    assert json.loads(responses.decode_body(compressed)) == json.loads(plain["body"])
+    # JSON compacto
+    assert plain["body"] == json.dumps(json.loads(plain["body"]), separators=(",", ":"))
+
+
+def test_brotli_when_available(tables):
+    pytest.importorskip("brotli")
+    compressed = call("groupsOverview", tables, accept="gzip, deflate, br")
+
+    assert compressed["headers"]["Content-Encoding"] == "br"
+    assert json.loads(responses.decode_body(compressed)) == json.loads(call("groupsOverview", tables)["body"])
+
+
+def test_small_and_error_bodies_pass_through():
+    small = responses.compress_response({"statusCode": 200, "headers": {}, "body": "{}"}, "gzip")
+    error = responses.compress_response({"statusCode": 400, "headers": {}, "body": "x" * 5000}, "gzip")
+
+    assert "isBase64Encoded" not in small and small["headers"]["Vary"] == "Accept-Encoding"
+    assert error["body"] == "x" * 5000
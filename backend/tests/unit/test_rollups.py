@@ -0,0 +1,164 @@
+import json
+from datetime import date, datetime, timezone
+
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from activity import hourly
+from rollups import app as rollups_app
+from common.rollups import (
+    apply_messages, compare_rollups, compute_member_rollups, compute_rollups, item_from_member_row, item_from_row,
+    load_member_rollups, load_rollups, pending_from_messages,
+)
+from common.records import to_records
+from local import synthetic
+from local.table import LocalResource
+from scripts.backfill_rollups import backfill
+from scripts.check_rollups import check_day
+
+END = datetime(2025, 8, 6, tzinfo=timezone.utc)
+
+
+def messages():
+    return list(synthetic.generate_messages(3000, groups=15, days=3, end=END, client_ratio=0.7))
+
+
+def test_incremental_updates_match_recomputation():
+    items = messages()
+    metrics = synthetic.metrics_table()
+    resource = LocalResource(metrics, synthetic.applied_table())
+    for i in range(0, len(items), 97):
+        apply_messages(metrics, items[i:i + 97], resource)
+
+    assert_matches_recomputation(metrics, items)
+
+
+def assert_matches_recomputation(metrics, items):
+    records = to_records(items)
+    expected = compute_rollups(records)
+    dates = sorted({row["date"] for row in expected.values()})
+    assert compare_rollups(expected, load_rollups(metrics, dates)) == []
+
+    # Membros e tipos por hora
+    members = compute_member_rollups(records)
+    for group_id in {key[2] for key in members}:
+        stored = {(row["date"], row["hour"], row["groupId"]): row for row in load_member_rollups(metrics, dates, group_id)}
+        assert stored == {key: row for key, row in members.items() if key[2] == group_id}
+
+
+def failing_updates(table, fail_on):
+    # update_item dos rollups que falha (throttling) nas chamadas de número fail_on
+    update_item, calls = table.update_item, [0]
+
+    def update(**kwargs):
+        calls[0] += 1
+        if calls[0] in fail_on:
+            raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "UpdateItem")
+        return update_item(**kwargs)
+    return update
+
+
+def test_redelivered_and_bisected_batches_count_once(monkeypatch):
+    items = messages()
+    metrics = synthetic.metrics_table()
+    applied = synthetic.applied_table()
+    resource = LocalResource(metrics, applied)
+    for i in range(0, len(items), 97):
+        batch = items[i:i + 97]
+        # Falha no meio do lote: parte dos grupos (e das linhas) já foi gravada
+        monkeypatch.setattr(metrics, "update_item", failing_updates(metrics, {3, 10, 11}))
+        _, failed = apply_messages(metrics, batch, resource)
+        assert failed
+        monkeypatch.undo()
+        # O Lambda reentrega o lote e depois as metades (BisectBatchOnFunctionError)
+        assert apply_messages(metrics, batch, resource)[1] == set()
+        apply_messages(metrics, batch[:48], resource)
+        apply_messages(metrics, batch[48:], resource)
+
+    assert_matches_recomputation(metrics, items)
+    # Registro de pendentes pequeno: sem ids nem deltas, só clientes, versão e (no máximo) o token
+    for item in metrics.query(KeyConditionExpression=Key("date").eq("pending"))["Items"]:
+        assert set(item) <= {"date", "metricType", "clients", "version", "outbox"}
+        assert "outbox" not in item
+    markers = [item["id"] for item in applied.scan()["Items"] if "#batch#" not in item["id"]]
+    assert sorted(markers) == sorted(f"rollups#{item['messageId']}" for item in items)
+
+
+def test_pending_written_before_batch_items_is_flushed():
+    group_id = messages()[0]["groupId"]
+    items = [item for item in messages() if item["groupId"] == group_id]
+    first = to_records(items[:len(items) // 2])
+    metrics = synthetic.metrics_table()
+    # Registro antigo: ids aplicados e deltas ainda não aplicados no próprio item
+    outbox = [item_from_row(row) for row in compute_rollups(first).values()]
+    outbox += [item_from_member_row(row) for row in compute_member_rollups(first).values()]
+    metrics.put_item(Item={"date": "pending", "metricType": group_id, "version": 3,
+                           "clients": pending_from_messages(first).get(group_id, []),
+                           "applied": {record.message_id: 1 for record in first}, "outbox": outbox})
+
+    apply_messages(metrics, items[len(items) // 2:], LocalResource(metrics, synthetic.applied_table()))
+    assert_matches_recomputation(metrics, items)
+    assert set(metrics.get_item(Key={"date": "pending", "metricType": group_id})["Item"]) == {
+        "date", "metricType", "clients", "version"}
+
+
+def test_handler_reports_failed_groups(monkeypatch):
+    items = messages()[:200]
+    serializer = TypeSerializer()
+    event = {"Records": [
+        {"eventName": "INSERT", "dynamodb": {"SequenceNumber": str(1000 + i),
+                                             "NewImage": {k: serializer.serialize(v) for k, v in item.items()}}}
+        for i, item in enumerate(items)
+    ]}
+    metrics = synthetic.metrics_table()
+    monkeypatch.setattr(rollups_app, "metrics_table", metrics)
+    monkeypatch.setattr(rollups_app, "dynamodb", LocalResource(metrics, synthetic.applied_table()))
+    update_item = metrics.update_item
+
+    def update(**kwargs):
+        if kwargs["Key"]["metricType"].startswith(f"hour#{items[0]['groupId']}#"):
+            raise ClientError({"Error": {"Code": "ThrottlingException"}}, "UpdateItem")
+        return update_item(**kwargs)
+
+    monkeypatch.setattr(metrics, "update_item", update)
+    failures = rollups_app.lambda_handler(event, None)["batchItemFailures"]
+    assert {f["itemIdentifier"] for f in failures} == {
+        str(1000 + i) for i, item in enumerate(items) if item["groupId"] == items[0]["groupId"]}
+
+    monkeypatch.setattr(metrics, "update_item", update_item)
+    assert rollups_app.lambda_handler(event, None) == {"batchItemFailures": []}
+    assert_matches_recomputation(metrics, items)
+
+
+def test_backfill_and_checker():
+    msgs = synthetic.load(synthetic.messages_table(), messages())
+    metrics = synthetic.metrics_table()
+    backfill(msgs, metrics, date(2025, 8, 3), date(2025, 8, 5))
+
+    assert check_day(msgs, metrics, date(2025, 8, 4)) == []
+
+    row = metrics.query(KeyConditionExpression=Key("date").eq("2025-08-04"))["Items"][0]
+    metrics.update_item(Key={"date": row["date"], "metricType": row["metricType"]},
+                        UpdateExpression="ADD #m :one",
+                        ExpressionAttributeNames={"#m": "messages"},
+                        ExpressionAttributeValues={":one": 1})
+    assert [d[1] for d in check_day(msgs, metrics, date(2025, 8, 4))] == ["messages"]
+
+
+def test_hourly_serves_same_payload_from_rollups(monkeypatch):
+    msgs = synthetic.load(synthetic.messages_table(), messages())
+    metrics = synthetic.metrics_table()
+    backfill(msgs, metrics, date(2025, 8, 3), date(2025, 8, 5))
+    monkeypatch.setattr(hourly, "messages_table", msgs)
+    monkeypatch.setattr(hourly, "metrics_table", metrics)
+    event = {"queryStringParameters": {"date": "2025-08-04"}}
+
+    monkeypatch.setenv("ROLLUPS_ENABLED", "false")
+    raw = json.loads(hourly.lambda_handler(event, None)["body"])
+    monkeypatch.setenv("ROLLUPS_ENABLED", "true")
+    msgs.reset_stats()
+    served = json.loads(hourly.lambda_handler(event, None)["body"])
+
+    assert served == raw
+    assert msgs.request_count == 0
@@ -0,0 +1,83 @@
+import math
+import random
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pytest
+
+from common import sketch
+from common.columnar import percentiles_by, rollup_frame
+from common.pairing import pair_responses
+from common.payloads import total_percentiles, weekly_payload
+from common.records import to_records
+from local import synthetic
+
+END = datetime(2025, 8, 6, tzinfo=timezone.utc)
+
+
+def lower_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[math.floor(q * (len(ordered) - 1))]
+
+
+def samples(n, seed=7):
+    rng = random.Random(seed)
+    # Cauda longa, como o tempo de resposta real (1 s .. 3 h)
+    return [min(max(round(rng.lognormvariate(5, 1.5)), 1), 10799) for _ in range(n)]
+
+
+@pytest.mark.parametrize("n", [1, 10, 1000, 20000])
+def test_quantiles_within_relative_accuracy(n):
+    values = samples(n)
+    merged = {}
+    for value in values:
+        sketch.add(merged, value)
+
+    for _, q in sketch.QUANTILES + (("min", 0.0), ("max", 1.0)):
+        exact = lower_quantile(values, q)
+        assert abs(sketch.quantile(merged, q) - exact) <= sketch.RELATIVE_ACCURACY * exact
+
+
+def test_merge_equals_sketch_of_all_samples():
+    values = samples(5000)
+    whole, parts = {}, [{} for _ in range(24)]
+    for i, value in enumerate(values):
+        sketch.add(whole, value)
+        sketch.add(parts[i % 24], value)
+
+    merged = {}
+    for part in parts:
+        sketch.merge(merged, part)
+    assert merged == whole
+    assert sketch.from_attributes("rtSketch", sketch.to_attributes("rtSketch", whole)) == whole
+    assert sketch.percentiles({}) == {"p50": 0, "p90": 0, "p99": 0}
+
+
+def test_frame_percentiles_match_exact_samples():
+    records = to_records(synthetic.generate_messages(5000, groups=20, days=3, end=END, client_ratio=0.6))
+    frame = rollup_frame(records)
+    events = [(r.group_id, r.epoch, r.direction, None) for r in records]
+    seconds = [round(delta * 60) for _, _, delta in pair_responses(events)]
+
+    expected = {}
+    for value in seconds:
+        sketch.add(expected, value)
+    assert total_percentiles(frame) == sketch.percentiles(expected)
+    for label, q in sketch.QUANTILES:
+        exact = lower_quantile(seconds, q) / 60
+        assert total_percentiles(frame)[label] == pytest.approx(exact, rel=sketch.RELATIVE_ACCURACY, abs=0.01)
+
+    # Sem amostras no bucket → 0
+    empty = percentiles_by(frame, np.zeros(len(frame["hour"]), dtype=np.int64) + 1, 2)[0]
+    assert empty == {"p50": 0, "p90": 0, "p99": 0}
+
+
+def test_weekly_exposes_percentiles():
+    records = to_records(synthetic.generate_messages(3000, groups=10, days=3, end=END))
+    payload = weekly_payload(rollup_frame(records), date(2025, 8, 3), date(2025, 8, 5))
+
+    summary = payload["summary"]["responseTimePercentiles"]
+    assert summary["unit"] == "minutes" and summary["p50"] <= summary["p90"] <= summary["p99"]
+    for day in payload["data"]:
+        times = day["responseTime"]
+        assert times["p50"] <= times["p90"] <= times["p99"]
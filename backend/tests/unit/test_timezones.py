@@ -0,0 +1,59 @@
+import json
+import random
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from activity import hourly
+from common import timezones
+from common.columnar import local_hours
+from local import synthetic
+
+ZONES = ["America/Sao_Paulo", "America/New_York", "Europe/Berlin", "Asia/Kolkata", "UTC"]
+
+
+@pytest.mark.parametrize("name", ZONES)
+def test_offset_table_matches_zoneinfo(name):
+    rng = random.Random(7)
+    zone = ZoneInfo(name)
+    epochs = [rng.randrange(1262304000, 2208988800) for _ in range(2000)]
+    for epoch in epochs:
+        local = datetime.fromtimestamp(epoch, timezone.utc).astimezone(zone)
+        assert timezones.local_date_str(epoch, name) == local.date().isoformat()
+
+    hours = np.array(epochs, dtype=np.int64) // 3600
+    expected = [int((datetime.fromtimestamp(h * 3600, timezone.utc).astimezone(zone).replace(tzinfo=None)
+                     - datetime(1970, 1, 1)).total_seconds()) // 3600 for h in hours]
+    assert local_hours(hours, name).tolist() == expected
+
+
+@pytest.mark.parametrize("name, day, hours", [
+    ("America/Sao_Paulo", date(2018, 11, 4), 23),   # horário de verão começava à meia-noite
+    ("America/Sao_Paulo", date(2019, 2, 16), 25),
+    ("Europe/Berlin", date(2025, 3, 30), 23),
+    ("Europe/Berlin", date(2025, 10, 26), 25),
+    ("America/Sao_Paulo", date(2025, 8, 5), 24),
+])
+def test_day_range_follows_transitions(name, day, hours):
+    start, end = timezones.day_range(day, day, name)
+    assert end - start == timedelta(hours=hours)
+    assert timezones.local_date_str(int(start.timestamp()), name) == day.isoformat()
+    assert timezones.local_date_str(int(start.timestamp()) - 1, name) == (day - timedelta(days=1)).isoformat()
+
+
+def test_hourly_buckets_by_local_hour(monkeypatch):
+    items = [
+        synthetic.make_message("m1", "0001@g.us", datetime(2025, 8, 5, 2, 30, tzinfo=timezone.utc), "client", "Oi"),
+        synthetic.make_message("m2", "0001@g.us", datetime(2025, 8, 5, 3, 10, tzinfo=timezone.utc), "team", "Olá"),
+        synthetic.make_message("m3", "0002@g.us", datetime(2025, 8, 5, 15, 0, tzinfo=timezone.utc), "client", "Oi"),
+    ]
+    # Em -03: m1 é 04/08 23h (fora do dia), m2 05/08 00h, m3 05/08 12h
+    monkeypatch.setattr(hourly, "messages_table", synthetic.load(synthetic.messages_table(), items))
+    monkeypatch.setenv("TIMEZONE", "America/Sao_Paulo")
+
+    body = json.loads(hourly.lambda_handler({"queryStringParameters": {"date": "2025-08-05"}}, None)["body"])
+
+    counts = {entry["hour"]: entry["messages"] for entry in body["data"] if entry["messages"]}
+    assert counts == {"00:00": 1, "12:00": 1}
@@ -0,0 +1,102 @@
+import json
+import math
+from datetime import datetime, timezone
+
+import pytest
+
+from common import ingest
+from local import synthetic
+from local.queue import LocalQueue
+from local.table import LocalResource
+from webhook import app as webhook
+from webhook import consumer
+
+SECRET = "s3cret"
+END = datetime(2025, 8, 6, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    queue = LocalQueue()
+    messages = synthetic.messages_table()
+    groups = synthetic.load(synthetic.groups_table(), synthetic.generate_groups(3))
+    groups.update_item(Key={"groupId": "0001@g.us"}, UpdateExpression="SET messageCount = :c",
+                       ExpressionAttributeValues={":c": 7})
+    monkeypatch.setattr(webhook, "sqs", queue)
+    monkeypatch.setattr(consumer, "dynamodb", LocalResource(messages, groups))
+    monkeypatch.setattr(ingest, "_backoff", lambda attempt: None)
+    monkeypatch.setenv("WEBHOOK_SECRET", SECRET)
+    monkeypatch.setenv("INGEST_QUEUE_URL", queue.url)
+    return queue, messages, groups
+
+
+def post(payload, secret=SECRET):
+    body = json.dumps(payload)
+    event = {"body": body, "headers": {"x-webhook-signature": ingest.sign(body, secret)}}
+    response = webhook.lambda_handler(event, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def drain(queue, batch_size=10):
+    while (event := queue.receive(batch_size)) is not None:
+        queue.settle(event, consumer.lambda_handler(event, None))
+
+
+def test_rejects_bad_signature(env):
+    queue = env[0]
+    status, body = post({"type": "status", "data": {}}, secret="outro")
+    assert (status, body["error"]["code"]) == (401, "INVALID_SIGNATURE")
+    assert len(queue) == 0
+
+
+def test_single_and_array_events_are_stored(env):
+    queue, messages, groups = env
+    events = list(synthetic.webhook_events(60, groups=3, end=END))
+    status, body = post(events[0])
+    assert (status, body) == (200, {"success": True, "accepted": 1, "messageId": events[0]["data"]["message"]["id"]})
+
+    burst = events[1:] + [
+        events[5],  # reentrega
+        {"type": "status", "data": {"status": {"groupId": "0001@g.us", "type": "typing"}}},
+        {"type": "group", "data": {"group": {"id": "0001@g.us", "action": "update", "data": {"name": "Novo nome"}}}},
+        {"type": "message", "data": {"message": {"id": "x"}}},
+    ]
+    status, body = post(burst)
+    assert status == 200
+    assert body["accepted"] == 61 and [r["index"] for r in body["rejected"]] == [62]
+    drain(queue)
+
+    assert len(messages) == 60
+    # Mesmo formato dos itens que já estão na tabela
+    expected = list(synthetic.generate_messages(60, groups=3, days=1, end=END))[3]
+    stored = messages.get_item(Key={"messageId": expected["messageId"], "timestamp": expected["timestamp"]})
+    assert stored["Item"] == expected
+    # Só o nome (e a chave de ordenação por nome) muda: o estado da conversa continua lá
+    assert groups.get_item(Key={"groupId": "0001@g.us"})["Item"] == {
+        "groupId": "0001@g.us", "groupName": "Novo nome", "nameKey": "novo nome", "messageCount": 7}
+
+
+def test_unprocessed_items_are_retried_and_reported(env, monkeypatch):
+    queue, messages, groups = env
+    resource = LocalResource(messages, groups, max_batch_keys=7)
+    monkeypatch.setattr(consumer, "dynamodb", resource)
+    post(list(synthetic.webhook_events(100, groups=3, end=END)))
+    drain(queue, batch_size=100)
+    assert len(messages) == 100
+    # Cada lote de 25 precisa de ceil(25/7) chamadas
+    assert resource.request_count == 4 * math.ceil(25 / 7)
+
+    # Sem progresso nenhum: a mensagem volta para a fila e é gravada na reentrega
+    monkeypatch.setattr(ingest, "MAX_WRITE_ATTEMPTS", 2)
+    post(list(synthetic.webhook_events(30, groups=3, end=END, seed=9)))
+    resource.max_batch_keys = 0
+    event = queue.receive()
+    before = resource.request_count
+    result = consumer.lambda_handler(event, None)
+    assert result["batchItemFailures"] == [{"itemIdentifier": event["Records"][0]["messageId"]}]
+    # Lotes de 25 + 5, duas tentativas cada (MAX_WRITE_ATTEMPTS lido na chamada)
+    assert resource.request_count - before == 2 * 2
+    queue.settle(event, result)
+    resource.max_batch_keys = None
+    drain(queue)
+    assert queue.redelivered == 1 and len(messages) == 130
@@ -0,0 +1,67 @@
+import base64
+import json
+import os
+
+from common.aws import lazy_client
+from common.ingest import InvalidEvent, enqueue, parse_events, to_records, valid_signature
+
+sqs = lazy_client('sqs')
+
+CORS_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "OPTIONS,GET,POST,PUT,DELETE,PATCH",
+    "Access-Control-Allow-Headers": "*"
+}
+
+# ==============================
+# 📨 POST /webhook/whatsapp
+# Valida a assinatura e os eventos e só enfileira (INGEST_QUEUE_URL); a gravação
+# em lote fica com webhook/consumer.py, então o webhook responde rápido mesmo
+# em rajadas de broadcast.
+# ==============================
+
+def response(status, body):
+    return {
+        "statusCode": status,
+        "headers": CORS_HEADERS,
+        "body": json.dumps(body, ensure_ascii=False)
+    }
+
+def error(status, code, message):
+    return response(status, {"success": False, "error": {"code": code, "message": message}})
+
+def header(event, name):
+    headers = event.get("headers") or {}
+    name = name.lower()
+    return next((value for key, value in headers.items() if key.lower() == name), None)
+
+def lambda_handler(event, context):
+    body = event.get("body") or ""
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body).decode("utf-8")
+
+    # Assinatura sobre o corpo cru, antes de qualquer parse
+    if not valid_signature(body, header(event, "X-Webhook-Signature"), os.environ.get("WEBHOOK_SECRET")):
+        return error(401, "INVALID_SIGNATURE", "Assinatura inválida")
+
+    try:
+        events = parse_events(body)
+    except InvalidEvent as exc:
+        return error(400, exc.code, str(exc))
+
+    records, rejected = to_records(events)
+    if rejected and not records:
+        first = rejected[0]
+        return error(400, first["code"], first["message"])
+
+    if records:
+        enqueue(sqs, os.environ["INGEST_QUEUE_URL"], records)
+
+    result = {"success": not rejected, "accepted": len(records)}
+    if len(events) == 1 and records and records[0]["i"].get("messageId"):
+        result["messageId"] = records[0]["i"]["messageId"]
+    if rejected:
+        result["rejected"] = rejected
+    print(f"📨 {len(events)} eventos → {len(records)} enfileirados, {len(rejected)} rejeitados")
+    return response(200, result)
@@ -0,0 +1,22 @@
+import json
+
+from common.aws import lazy_resource
+from common.ingest import write_records
+
+dynamodb = lazy_resource('dynamodb')
+
+# ==============================
+# 📥 Fila do webhook → crm-mensagens (BatchWriteItem, 25 itens por chamada)
+# Itens que continuam em UnprocessedItems depois das novas tentativas devolvem
+# só as mensagens SQS deles (ReportBatchItemFailures); o resto do lote é confirmado.
+# ==============================
+
+def lambda_handler(event, context):
+    batches = [(record["messageId"], json.loads(record["body"])) for record in event.get("Records", [])]
+    if not batches:
+        return {"batchItemFailures": []}
+
+    failures = write_records(dynamodb, batches)
+    total = sum(len(records) for _, records in batches)
+    print(f"📥 {len(batches)} mensagens da fila, {total} itens → {len(failures)} mensagens com falha")
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in sorted(failures)]}